@@ -8,4 +8,11 @@ class LLMConfig(BaseModel):
     api_key: str = "test-key"
     temperature: float = Field(default=0.7, ge=0, le=1)
     max_tokens: int = 1000
-    cache_ttl: int = 3600  # 1 hora 
\ No newline at end of file
+    cache_ttl: int = 3600  # 1 hora
+    
+    # RAG
+    chunk_size: int = 1000
+    chunk_overlap: int = 200
+    similarity_threshold: float = Field(default=0.3, ge=-1, le=1)
+    vector_store_path: str = ".chroma"
+    collection_name: str = "synapse_docs" 
\ No newline at end of file
@@ -62,6 +62,8 @@ class Settings(BaseSettings):
     QDRANT_URL: str = "http://localhost:6335"
     QDRANT_API_KEY: Optional[str] = None
     QDRANT_TIMEOUT: float = 10.0
+    QDRANT_GRPC_PORT: int = 6334
+    QDRANT_PREFER_GRPC: bool = True
     QDRANT_COLLECTION: str = "synapse_collection"
     
     # GitHub settings
@@ -59,6 +59,8 @@ class TestSettings(BaseSettings):
     QDRANT_URL: str = "http://localhost:6335"
     QDRANT_API_KEY: str = "test-key"
     QDRANT_TIMEOUT: float = 10.0
+    QDRANT_GRPC_PORT: int = 6334
+    QDRANT_PREFER_GRPC: bool = False
     QDRANT_COLLECTION: str = "test_collection"
     
     # GitHub
@@ -1,15 +1,26 @@
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from src.core.memory import MemorySystem
 from src.core.retrieval import RetrievalSystem
 from src.core.tools import ToolManager
+from src.services.embedding_service import EmbeddingService
 
 class LLMSystem:
     def __init__(
         self,
         memory_system: Optional[MemorySystem] = None,
         retrieval_system: Optional[RetrievalSystem] = None,
-        tool_manager: Optional[ToolManager] = None
+        tool_manager: Optional[ToolManager] = None,
+        embedding_service: Optional[EmbeddingService] = None
     ):
+        # O cliente OpenAI só é criado no primeiro embedding
+        self.embedding_service = embedding_service or EmbeddingService()
         self.memory_system = memory_system or MemorySystem()
-        self.retrieval_system = retrieval_system or RetrievalSystem()
-        self.tool_manager = tool_manager or ToolManager() 
\ No newline at end of file
+        self.retrieval_system = retrieval_system or RetrievalSystem(
+            embed_query=self.embedding_service.get_embedding,
+            vector_size=self.embedding_service.dimensions
+        )
+        self.tool_manager = tool_manager or ToolManager()
+
+    async def retrieve(self, query: str, k: int = 3, filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """Documentos relevantes para a query, via o sistema de retrieval"""
+        return await self.retrieval_system.retrieve(query, k=k, filters=filters)
@@ -1,37 +1,263 @@
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional
+from collections import deque
 from datetime import datetime
+from itertools import islice
+import asyncio
+import math
+import re
+import time
+
+from src.utils.logger import get_logger
+
+logger = get_logger("memory")
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def _tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def default_importance(message: str, metadata: dict) -> float:
+    """Importância base de uma mensagem entre 0 e 1"""
+    if "importance" in metadata:
+        return float(metadata["importance"])
+
+    # Mensagens longas, perguntas e turnos do utilizador tendem a ser mais relevantes
+    score = min(len(message) / 500, 0.5)
+    if "?" in message:
+        score += 0.2
+    if metadata.get("role") == "user":
+        score += 0.1
+    return min(score, 1.0)
+
+
+class _Turn:
+    """Entrada do working set com os dados usados na consolidação"""
+    __slots__ = ('id', 'memory', 'tokens', 'importance', 'created')
+
+    def __init__(self, turn_id: int, memory: dict, importance: float, created: datetime):
+        self.id = turn_id
+        self.memory = memory
+        self.tokens = set(_tokenize(memory['message']))
+        self.importance = importance
+        self.created = created
+
 
 class ConversationMemory:
-    def __init__(self, max_history: int = 1000):
-        self.conversation_history = []
+    """
+    Memória de conversa com working set limitado.
+
+    Os turnos recentes vivem num ring buffer com índice invertido. Quando um
+    turno sai do buffer, a sua importância com decaimento temporal decide se é
+    promovido para o vector store ou simplesmente descartado. Cada turno custa
+    memória e CPU limitados, independentemente da duração da conversa.
+
+    Os turnos promovidos esperam numa fila até ``consolidate``; quando a fila
+    chega a ``max_pending_promotions`` a consolidação arranca sozinha no event
+    loop em execução, e ``end_session`` promove o working set inteiro. A fila
+    guarda no máximo ``max_queued_promotions`` turnos: sem event loop, ou com
+    o vector store a falhar, as promoções mais antigas são descartadas e
+    contadas em ``dropped_promotions``. Depois de uma falha a consolidação
+    automática espera um backoff exponencial até ``max_retry_delay``.
+    """
+
+    def __init__(
+        self,
+        max_history: int = 1000,
+        vector_store=None,
+        half_life: float = 3600.0,
+        promote_threshold: float = 0.3,
+        max_pending_promotions: int = 256,
+        max_queued_promotions: int = 4096,
+        max_retry_delay: float = 60.0,
+        importance_fn: Callable[[str, dict], float] = default_importance
+    ):
+        """
+        Args:
+            max_history: Turnos mantidos no ring buffer
+            vector_store: Destino opcional com ``add_document(content, metadata)``
+            half_life: Segundos até a importância de um turno cair para metade
+            promote_threshold: Importância decaída mínima para promover um turno
+            max_pending_promotions: Promoções em espera que disparam um ``consolidate``
+            max_queued_promotions: Limite da fila de promoções; acima dele as
+                mais antigas são descartadas
+            max_retry_delay: Espera máxima, em segundos, antes de voltar a
+                consolidar sozinho depois de falhas seguidas
+            importance_fn: Calcula a importância base de (mensagem, metadata)
+        """
         self.max_history = max_history
-        
+        self.vector_store = vector_store
+        self.half_life = half_life
+        self.promote_threshold = promote_threshold
+        self.max_pending_promotions = max_pending_promotions
+        self.max_retry_delay = max_retry_delay
+        self.importance_fn = importance_fn
+        self.dropped_promotions = 0
+
+        self._buffer: deque = deque()
+        self._index: Dict[str, Dict[int, _Turn]] = {}  # token -> {turn id -> turno}
+        self._next_id = 0
+        self._pending_promotions: deque = deque(maxlen=max(max_queued_promotions, max_pending_promotions))
+        self._consolidation: Optional[asyncio.Task] = None
+        self._failures = 0
+        self._retry_at = 0.0
+
+    @property
+    def conversation_history(self) -> List[dict]:
+        """
+        Turnos atualmente no working set, do mais antigo para o mais recente.
+
+        Devolve uma cópia só de leitura; para alterar o histórico use
+        ``add_memory`` e ``clear``.
+        """
+        return [turn.memory for turn in self._buffer]
+
+    def _decayed(self, turn: _Turn, now: datetime) -> float:
+        age = (now - turn.created).total_seconds()
+        return turn.importance * math.pow(0.5, age / self.half_life)
+
     def add_memory(self, message: str, metadata: Optional[dict] = None):
         """Adiciona uma nova memória ao histórico"""
+        metadata = metadata or {}
+        now = datetime.now()
         memory = {
             'message': message,
-            'timestamp': datetime.now().isoformat(),
-            'metadata': metadata or {}
+            'timestamp': now.isoformat(),
+            'metadata': metadata
         }
-        self.conversation_history.append(memory)
-        
-        # Limita o tamanho do histórico
-        if len(self.conversation_history) > self.max_history:
-            self.conversation_history = self.conversation_history[-self.max_history:]
-            
+        turn = _Turn(self._next_id, memory, self.importance_fn(message, metadata), now)
+        self._next_id += 1
+        self._buffer.append(turn)
+
+        for token in turn.tokens:
+            self._index.setdefault(token, {})[turn.id] = turn
+
+        # Consolida o turno mais antigo quando o buffer excede o limite
+        while len(self._buffer) > self.max_history:
+            self._evict(self._buffer.popleft(), now)
+
+    def _evict(self, turn: _Turn, now: datetime):
+        for token in turn.tokens:
+            postings = self._index.get(token)
+            if postings is not None:
+                postings.pop(turn.id, None)
+                if not postings:
+                    del self._index[token]
+
+        if self.vector_store is not None and self._decayed(turn, now) >= self.promote_threshold:
+            self._queue_promotion(turn.memory)
+            if len(self._pending_promotions) >= self.max_pending_promotions:
+                self._schedule_consolidation()
+
+    def _queue_promotion(self, memory: dict, retry: bool = False):
+        """Põe um turno na fila; com a fila cheia descarta a promoção mais antiga"""
+        if len(self._pending_promotions) == self._pending_promotions.maxlen:
+            self.dropped_promotions += 1
+            if self.dropped_promotions % 1000 == 1:
+                logger.warning(f"Fila de promoções cheia; {self.dropped_promotions} memórias descartadas")
+            if retry:
+                # O turno a repetir é o mais antigo: descarta-o a ele
+                return
+        if retry:
+            self._pending_promotions.appendleft(memory)
+        else:
+            self._pending_promotions.append(memory)
+
+    def _schedule_consolidation(self):
+        """Arranca a consolidação em segundo plano se houver um event loop a correr"""
+        if self._consolidation is not None and not self._consolidation.done():
+            return
+        if time.monotonic() < self._retry_at:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Sem loop a fila espera pelo próximo consolidate, até ao seu limite
+            return
+        self._consolidation = loop.create_task(self.consolidate())
+        self._consolidation.add_done_callback(self._consolidation_done)
+
+    @staticmethod
+    def _consolidation_done(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Erro ao consolidar memórias: {task.exception()}")
+
+    async def consolidate(self) -> int:
+        """Promove os turnos salientes pendentes para o vector store"""
+        promoted = 0
+        while self._pending_promotions:
+            memory = self._pending_promotions.popleft()
+            try:
+                await self.vector_store.add_document(
+                    memory['message'],
+                    {**memory['metadata'], 'timestamp': memory['timestamp']}
+                )
+            except Exception:
+                # Volta para a fila e adia a próxima consolidação automática
+                self._queue_promotion(memory, retry=True)
+                self._failures += 1
+                self._retry_at = time.monotonic() + min(2.0 ** (self._failures - 1), self.max_retry_delay)
+                raise
+            promoted += 1
+        self._failures = 0
+        self._retry_at = 0.0
+        return promoted
+
+    async def end_session(self) -> int:
+        """
+        Fecha a sessão: avalia todo o working set para promoção e consolida.
+
+        Returns:
+            Número de turnos promovidos para o vector store
+        """
+        now = datetime.now()
+        while self._buffer:
+            self._evict(self._buffer.popleft(), now)
+        if self._consolidation is not None and not self._consolidation.done():
+            await asyncio.gather(self._consolidation, return_exceptions=True)
+        if self.vector_store is None:
+            return 0
+        return await self.consolidate()
+
     def get_history(self, limit: Optional[int] = None) -> List[dict]:
         """Retorna o histórico de conversas"""
         if limit:
-            return self.conversation_history[-limit:]
+            recent = [turn.memory for turn in islice(reversed(self._buffer), limit)]
+            recent.reverse()
+            return recent
         return self.conversation_history
-        
+
     def clear(self):
-        """Limpa o histórico de conversas"""
-        self.conversation_history = []
-        
-    def search(self, query: str) -> List[dict]:
-        """Busca por mensagens no histórico que contenham a query"""
-        return [
-            memory for memory in self.conversation_history 
-            if query.lower() in memory['message'].lower()
-        ] 
\ No newline at end of file
+        """Limpa o histórico de conversas; promoções pendentes são mantidas"""
+        self._buffer.clear()
+        self._index.clear()
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[dict]:
+        """
+        Busca por mensagens do working set que contenham todos os termos da query.
+
+        Usa o índice invertido e ordena por importância decaída. Ao contrário da
+        antiga busca por substring, compara palavras inteiras: "pyth" não
+        encontra "python", e "deploy python" exige as duas palavras.
+        """
+        tokens = set(_tokenize(query))
+        if not tokens:
+            return []
+
+        postings = [self._index.get(token) for token in tokens]
+        if not all(postings):
+            return []
+
+        # Interseção a partir da lista de postings mais curta
+        postings.sort(key=len)
+        matches = [
+            turn for turn_id, turn in postings[0].items()
+            if all(turn_id in other for other in postings[1:])
+        ]
+
+        now = datetime.now()
+        matches.sort(key=lambda turn: self._decayed(turn, now), reverse=True)
+        if limit:
+            matches = matches[:limit]
+        return [turn.memory for turn in matches]
@@ -1,7 +1,32 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
 class RetrievalSystem:
-    def __init__(self):
-        self.vector_store = None  # Será configurado com Qdrant
-        
-    def retrieve(self, query: str, k: int = 3):
+    def __init__(
+        self,
+        vector_store=None,
+        *,
+        embed_query: Callable[[str], Awaitable[List[float]]],
+        vector_size: Optional[int] = None
+    ):
+        """
+        Args:
+            vector_store: Vector store com ``search(embedding, limit, filters)``;
+                por omissão é usado o QdrantService
+            embed_query: Gera o embedding de uma query (obrigatório)
+            vector_size: Tamanho dos embeddings de ``embed_query``, usado nas
+                collections do QdrantService criado por omissão
+        """
+        self.vector_store = vector_store
+        self.embed_query = embed_query
+        self.vector_size = vector_size
+
+    async def retrieve(self, query: str, k: int = 3, filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
         """Recupera documentos relevantes baseados na query"""
-        pass 
\ No newline at end of file
+        if self.vector_store is None:
+            from src.services.qdrant_service import QdrantService
+            options = {"vector_size": self.vector_size} if self.vector_size else {}
+            self.vector_store = QdrantService(**options)
+
+        embedding = await self.embed_query(query)
+        return await self.vector_store.search(embedding, limit=k, filters=filters)
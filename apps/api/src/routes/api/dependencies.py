@@ -10,6 +10,7 @@ from src.llm.llm_service import LLMService
 from src.rag.rag_system import RAGSystem
 from src.database import Database
 from src.db.supabase import SupabaseClient
+from src.services.rag_service import RAGService
 
 security = HTTPBearer()
 
@@ -36,11 +37,17 @@ async def get_rag_system() -> RAGSystem:
     await rag.initialize()
     return rag
 
+@lru_cache()
 def get_supabase_client() -> SupabaseClient:
-    """Get Supabase client."""
+    """Get Supabase client, shared so its connections are reused."""
     settings = get_settings()
     return SupabaseClient(settings.SUPABASE_URL, settings.SUPABASE_KEY)
 
+@lru_cache()
+def get_rag_service() -> RAGService:
+    """Get the document RAG service, shared so its store stays warm."""
+    return RAGService()
+
 def invalidate_token(token: str) -> None:
     """Add token to blacklist."""
     token_blacklist.add(token)
@@ -119,4 +126,5 @@ async def get_current_user(
 RAGDep = Annotated[RAGSystem, Depends(get_rag_system)]
 LLMDep = Annotated[LLMService, Depends(get_llm_client)]
 DBDep = Annotated[Database, Depends(get_db)]
-SupabaseDep = Annotated[SupabaseClient, Depends(get_supabase_client)]
\ No newline at end of file
+SupabaseDep = Annotated[SupabaseClient, Depends(get_supabase_client)]
+RAGServiceDep = Annotated[RAGService, Depends(get_rag_service)]
\ No newline at end of file
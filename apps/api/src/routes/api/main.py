@@ -1,11 +1,15 @@
 """Main API module."""
+import asyncio
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from prometheus_client import make_asgi_app, Counter, Histogram
 from src.api.routes import health, chat
 from src.api.middleware.rate_limit import RateLimitMiddleware
 from src.api.middleware.error_handler import ErrorHandlerMiddleware
-from src.api.dependencies import get_current_user
+from src.api.dependencies import get_current_user, get_rag_service
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 # Define metrics
 REQUEST_COUNT = Counter(
@@ -70,6 +74,19 @@ app.include_router(
     tags=["test"]
 )
 
+# Preload the document store in the background so boot is not blocked;
+# RAG queries arriving earlier wait on the same warm-up
+@app.on_event("startup")
+async def warm_rag_service():
+    """Start loading the embedding model and persisted vector store."""
+    task = asyncio.create_task(get_rag_service().warm_up())
+    task.add_done_callback(_log_warm_up_failure)
+    app.state.rag_warm_up = task
+
+def _log_warm_up_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"RAG warm-up failed, retrying on first query: {task.exception()}")
+
 # Root health check for Prometheus
 @app.get("/")
 async def root():
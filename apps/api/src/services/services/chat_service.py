@@ -1,4 +1,4 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator
 from loguru import logger
 from fastapi import HTTPException
 from supabase import create_client, Client
@@ -6,14 +6,22 @@ from datetime import datetime
 import json
 from collections import defaultdict
 import asyncio
-import threading
-from queue import Queue
+import itertools
 import uuid
 
+from src.db.async_client import AsyncSupabase
+from .chat_state import RedisChatState
+
 class ChatService:
     """Service to manage chat sessions and messages with in-memory caching."""
     
-    def __init__(self, supabase_url: str, supabase_key: str, persist_interval: int = 60):
+    def __init__(
+        self,
+        supabase_url: str,
+        supabase_key: str,
+        persist_interval: int = 60,
+        redis_url: Optional[str] = None
+    ):
         """
         Initialize chat service with both Supabase and in-memory cache.
         
@@ -21,76 +29,101 @@ class ChatService:
             supabase_url: Supabase project URL
             supabase_key: Supabase API key
             persist_interval: Interval in seconds to persist cache to Supabase
+            redis_url: Optional Redis URL to share hot state across workers
         """
         self.supabase: Client = create_client(supabase_url, supabase_key)
+        self.db = AsyncSupabase(self.supabase)
+        
+        # Shared hot state; when set, the process-local cache is unused and a
+        # single elected worker flushes to Supabase
+        self._state: Optional[RedisChatState] = None
+        self._flusher: Optional[asyncio.Task] = None
+        if redis_url:
+            self._state = RedisChatState(redis_url, lease_ttl=persist_interval * 3)
         
         # In-memory cache
         self._sessions_cache: Dict[str, Dict] = {}  # user_id -> {session_id -> session}
-        self._messages_cache: Dict[str, List[Dict]] = {}  # session_id -> [messages]
+        self._messages_cache: Dict[str, _MessageWindow] = {}  # session_id -> cached newest messages
+        self._history_complete = set()  # Sessions whose cache reaches the first message
         self._dirty_sessions = set()  # Sessions that need to be persisted
         self._dirty_messages = set()  # Messages that need to be persisted
         
-        # Persistence queue
-        self._persist_queue: Queue = Queue()
         self._persist_interval = persist_interval
         
-        # Start persistence thread
-        self._start_persistence_worker()
-        
-        logger.debug("🔧 ChatService initialized with in-memory cache and Supabase persistence")
+        if self._state:
+            logger.debug("🔧 ChatService initialized with shared Redis state and Supabase persistence")
+        else:
+            logger.debug("🔧 ChatService initialized with in-memory cache and Supabase persistence")
     
     def _start_persistence_worker(self):
-        """Start the background thread for persistence."""
-        def persist_worker():
-            while True:
-                try:
-                    # Persist dirty data every interval
-                    self._persist_dirty_data()
-                    asyncio.run(asyncio.sleep(self._persist_interval))
-                except Exception as e:
-                    logger.error(f"❌ Error in persistence worker: {str(e)}")
-                    
-        thread = threading.Thread(target=persist_worker, daemon=True)
-        thread.start()
+        """Start the background persistence task on the running loop if not started yet."""
+        if self._flusher is not None and not self._flusher.done():
+            return
+        
+        if self._state:
+            worker = self._state.run_flusher(
+                self._persist_rows,
+                self._update_row,
+                self._persist_interval
+            )
+        else:
+            worker = self._persist_worker()
+        self._flusher = asyncio.get_running_loop().create_task(worker)
+    
+    async def _persist_worker(self):
+        """Persist dirty data every interval."""
+        while True:
+            await asyncio.sleep(self._persist_interval)
+            await self._persist_dirty_data()
     
     async def _persist_dirty_data(self):
         """Persist dirty sessions and messages to Supabase."""
+        # Swap in fresh sets before awaiting, so anything marked dirty while an
+        # upsert runs is written by the next pass instead of being cleared
+        dirty_sessions, self._dirty_sessions = self._dirty_sessions, set()
+        dirty_messages, self._dirty_messages = self._dirty_messages, set()
         try:
             # Persist dirty sessions
-            if self._dirty_sessions:
+            if dirty_sessions:
                 sessions_to_persist = [
                     self._sessions_cache[user_id][session_id]
-                    for session_id in self._dirty_sessions
+                    for session_id in dirty_sessions
                     for user_id in self._sessions_cache
                     if session_id in self._sessions_cache[user_id]
                 ]
                 
                 if sessions_to_persist:
-                    self.supabase.table("chat_sessions")\
-                        .upsert(sessions_to_persist)\
-                        .execute()
+                    await self._persist_rows("chat_sessions", sessions_to_persist)
                     
-                self._dirty_sessions.clear()
+                dirty_sessions = set()
                 logger.debug(f"💾 Persisted {len(sessions_to_persist)} sessions to Supabase")
             
             # Persist dirty messages
-            if self._dirty_messages:
+            if dirty_messages:
                 messages_to_persist = [
-                    msg for session_id in self._dirty_messages
-                    for msg in self._messages_cache.get(session_id, [])
+                    msg for session_id in dirty_messages
+                    for msg in self._messages_cache.get(session_id, ())
                 ]
                 
                 if messages_to_persist:
-                    self.supabase.table("messages")\
-                        .upsert(messages_to_persist)\
-                        .execute()
+                    await self._persist_rows("messages", messages_to_persist)
                     
-                self._dirty_messages.clear()
+                dirty_messages = set()
                 logger.debug(f"💾 Persisted {len(messages_to_persist)} messages to Supabase")
                 
         except Exception as e:
             logger.error(f"❌ Error persisting data: {str(e)}")
             # Keep items marked as dirty if persistence fails
+            self._dirty_sessions |= dirty_sessions
+            self._dirty_messages |= dirty_messages
+    
+    async def _persist_rows(self, table: str, rows: List[Dict]):
+        """Upsert rows into Supabase off the event loop."""
+        await self.db.execute(self.supabase.table(table).upsert(rows))
+    
+    async def _update_row(self, table: str, row_id: str, fields: Dict[str, Any]):
+        """Update one Supabase row off the event loop."""
+        await self.db.execute(self.supabase.table(table).update(fields).eq("id", row_id))
     
     async def create_session(
         self,
@@ -111,7 +144,14 @@ class ChatService:
                 "updated_at": datetime.utcnow().isoformat()
             }
             
+            if self._state:
+                self._start_persistence_worker()
+                await self._state.save_session(session)
+                logger.debug(f"✅ Created chat session for user {user_id} in shared state")
+                return session
+            
             # Add to cache
+            self._start_persistence_worker()
             if user_id not in self._sessions_cache:
                 self._sessions_cache[user_id] = {}
             self._sessions_cache[user_id][session["id"]] = session
@@ -127,8 +167,13 @@ class ChatService:
     async def get_sessions(self, user_id: str, status: str = "active") -> List[Dict]:
         """Get chat sessions from cache, falling back to Supabase."""
         try:
+            if self._state:
+                sessions = await self._state.get_sessions(user_id)
+                if sessions is not None:
+                    return [s for s in sessions if not status or s["status"] == status]
+            
             # Check cache first
-            if user_id in self._sessions_cache:
+            elif user_id in self._sessions_cache:
                 sessions = [
                     session for session in self._sessions_cache[user_id].values()
                     if not status or session["status"] == status
@@ -141,12 +186,17 @@ class ChatService:
                 .select("*")\
                 .eq("user_id", user_id)
                 
-            if status:
+            # The shared state is hydrated with every status, then filtered
+            if status and not self._state:
                 query = query.eq("status", status)
                 
-            result = query.order("last_message_at", desc=True).execute()
+            result = await self.db.execute(query.order("last_message_at", desc=True))
             
             # Cache the results
+            if self._state:
+                await self._state.cache_sessions(user_id, result.data)
+                return [s for s in result.data if not status or s["status"] == status]
+            
             self._sessions_cache[user_id] = {
                 session["id"]: session for session in result.data
             }
@@ -172,8 +222,17 @@ class ChatService:
             if not session_id or not content:
                 raise ValueError("Session ID and content are required")
             
+            if self._state:
+                return await self._add_shared_message(session_id, content, role, metadata, status)
+            
+            self._start_persistence_worker()
+            
+            # The database sequence keeps seq unique and increasing across workers
+            seq = await self._next_message_seq()
+            
             message = {
                 "id": str(uuid.uuid4()),  # Generate UUID for new message
+                "seq": seq,  # Monotonic cursor for pagination
                 "session_id": session_id,
                 "content": content,
                 "role": role,
@@ -182,10 +241,8 @@ class ChatService:
                 "created_at": datetime.utcnow().isoformat()
             }
             
-            # Add to cache
-            if session_id not in self._messages_cache:
-                self._messages_cache[session_id] = []
-            self._messages_cache[session_id].append(message)
+            # Add to cache, preserving seq order
+            self._messages_cache.setdefault(session_id, _MessageWindow()).add(message)
             self._dirty_messages.add(session_id)
             
             # Update session's last_message_at in cache
@@ -210,48 +267,134 @@ class ChatService:
         self,
         session_id: str,
         limit: int = 50,
-        before_id: Optional[str] = None,
+        before_seq: Optional[int] = None,
         status: Optional[str] = None
     ) -> List[Dict]:
-        """Get messages from cache, falling back to Supabase."""
+        """
+        Get a page of messages, newest first, using keyset pagination on ``seq``.
+        
+        Args:
+            session_id: Chat session ID
+            limit: Maximum number of messages to return
+            before_seq: Only return messages with ``seq`` lower than this cursor
+            status: Optional message status filter
+            
+        Returns:
+            Up to ``limit`` messages ordered by ``seq`` descending. Pass the
+            ``seq`` of the last message as ``before_seq`` to get the next page.
+        """
         try:
-            # Check cache first
-            if session_id in self._messages_cache:
-                messages = self._messages_cache[session_id]
-                
-                # Apply filters
-                if status:
-                    messages = [m for m in messages if m["status"] == status]
-                if before_id:
-                    messages = [m for m in messages if m["id"] < before_id]
-                
-                # Sort and limit
-                messages.sort(key=lambda x: x["created_at"], reverse=True)
-                return messages[:limit]
+            if self._state:
+                return await self._get_shared_messages(session_id, limit, before_seq, status)
             
-            # If not in cache, get from Supabase and cache
-            query = self.supabase.table("messages")\
-                .select("*")\
-                .eq("session_id", session_id)
+            window = self._messages_cache.setdefault(session_id, _MessageWindow())
+            page = window.page(limit, before_seq, status)
             
-            if status:
-                query = query.eq("status", status)
+            # Continue below the cached window with a single keyset query; a
+            # cursor far below the window goes straight to Supabase
+            if len(page) < limit and session_id not in self._history_complete:
+                oldest = window.oldest_seq
+                cursor = before_seq
+                if oldest is not None:
+                    cursor = oldest if before_seq is None else min(oldest, before_seq)
                 
-            if before_id:
-                query = query.lt("id", before_id)
+                missing = limit - len(page)
+                rows = await self._query_messages(session_id, missing, cursor, status)
+                page.extend(rows)
                 
-            result = query.order("created_at", desc=True).limit(limit).execute()
-            
-            # Cache the results
-            self._messages_cache[session_id] = result.data
+                # Only unfiltered pages adjacent to the window extend the cache
+                if not status and cursor == oldest:
+                    window.extend_older(rows)
+                    if len(rows) < missing:
+                        self._history_complete.add(session_id)
             
-            logger.debug(f"📜 Retrieved {len(result.data)} messages from session {session_id}")
-            return result.data
+            logger.debug(f"📜 Retrieved {len(page)} messages from session {session_id}")
+            return page
             
         except Exception as e:
             logger.error(f"❌ Error fetching messages: {str(e)}")
             raise HTTPException(status_code=500, detail="Failed to fetch messages")
     
+    async def _add_shared_message(
+        self,
+        session_id: str,
+        content: str,
+        role: str,
+        metadata: Optional[Dict[str, Any]],
+        status: str
+    ) -> Dict:
+        """Append a message to the shared session stream."""
+        self._start_persistence_worker()
+        
+        # Seed the shared seq counter from the persisted tail once per session
+        if not await self._state.has_seq(session_id):
+            tail = await self._query_messages(session_id, 1)
+            await self._state.init_seq(session_id, tail[0]["seq"] + 1 if tail else 0)
+        
+        message = {
+            "id": str(uuid.uuid4()),
+            "session_id": session_id,
+            "content": content,
+            "role": role,
+            "status": status,
+            "metadata": metadata or {},
+            "created_at": datetime.utcnow().isoformat()
+        }
+        message["seq"] = await self._state.append_message(message)
+        await self._state.update_session(session_id, {
+            "last_message_at": message["created_at"],
+            "updated_at": message["created_at"]
+        })
+        
+        logger.debug(f"💬 Added {role} message to session {session_id} in shared state")
+        return message
+    
+    async def _get_shared_messages(
+        self,
+        session_id: str,
+        limit: int,
+        before_seq: Optional[int],
+        status: Optional[str]
+    ) -> List[Dict]:
+        """Page through the shared stream, continuing into Supabase below it."""
+        page, oldest_seq = await self._state.get_messages(session_id, limit, before_seq, status)
+        
+        if len(page) < limit:
+            cursor = before_seq
+            if oldest_seq is not None:
+                cursor = oldest_seq if before_seq is None else min(oldest_seq, before_seq)
+            if cursor is None or cursor > 0:
+                page.extend(await self._query_messages(session_id, limit - len(page), cursor, status))
+        
+        logger.debug(f"📜 Retrieved {len(page)} messages from session {session_id}")
+        return page
+    
+    async def _query_messages(
+        self,
+        session_id: str,
+        limit: int,
+        before_seq: Optional[int] = None,
+        status: Optional[str] = None
+    ) -> List[Dict]:
+        """Fetch one keyset page from Supabase, ordered by ``seq`` descending."""
+        query = self.supabase.table("messages")\
+            .select("*")\
+            .eq("session_id", session_id)
+        
+        if status:
+            query = query.eq("status", status)
+            
+        if before_seq is not None:
+            query = query.lt("seq", before_seq)
+            
+        result = await self.db.execute(query.order("seq", desc=True).limit(limit))
+        return result.data
+    
+    async def _next_message_seq(self) -> int:
+        """Reserve the next message seq from the database sequence."""
+        result = await self.db.execute(self.supabase.rpc("next_message_seq", {}))
+        return result.data
+    
     async def update_session_status(
         self,
         session_id: str,
@@ -260,8 +403,14 @@ class ChatService:
     ) -> Dict:
         """Update session status in cache and queue for persistence."""
         try:
-            # Update in cache if present
             session = None
+            if self._state:
+                fields = {"status": status, "updated_at": datetime.utcnow().isoformat()}
+                if metadata:
+                    fields["metadata"] = metadata
+                session = await self._state.update_session(session_id, fields)
+            
+            # Update in cache if present
             for user_sessions in self._sessions_cache.values():
                 if session_id in user_sessions:
                     session = user_sessions[session_id]
@@ -281,10 +430,11 @@ class ChatService:
                 if metadata:
                     update_data["metadata"] = metadata
                     
-                result = self.supabase.table("chat_sessions")\
-                    .update(update_data)\
-                    .eq("id", session_id)\
-                    .execute()
+                result = await self.db.execute(
+                    self.supabase.table("chat_sessions")
+                    .update(update_data)
+                    .eq("id", session_id)
+                )
                 session = result.data[0]
             
             logger.debug(f"📝 Updated session {session_id} status to {status}")
@@ -302,8 +452,14 @@ class ChatService:
     ) -> Dict:
         """Update message status in cache and queue for persistence."""
         try:
-            # Update in cache if present
             message = None
+            if self._state:
+                fields = {"status": status}
+                if metadata:
+                    fields["metadata"] = metadata
+                message = await self._state.update_message(message_id, fields)
+            
+            # Update in cache if present
             for session_messages in self._messages_cache.values():
                 for msg in session_messages:
                     if msg["id"] == message_id:
@@ -322,10 +478,11 @@ class ChatService:
                 if metadata:
                     update_data["metadata"] = metadata
                     
-                result = self.supabase.table("messages")\
-                    .update(update_data)\
-                    .eq("id", message_id)\
-                    .execute()
+                result = await self.db.execute(
+                    self.supabase.table("messages")
+                    .update(update_data)
+                    .eq("id", message_id)
+                )
                 message = result.data[0]
             
             logger.debug(f"📝 Updated message {message_id} status to {status}")
@@ -347,19 +504,23 @@ class ChatService:
                 if session_id in user_sessions:
                     del user_sessions[session_id]
             
-            if session_id in self._messages_cache:
-                del self._messages_cache[session_id]
+            self._messages_cache.pop(session_id, None)
+            self._history_complete.discard(session_id)
+            if self._state:
+                await self._state.delete_session(session_id)
             
             # Remove from Supabase
-            self.supabase.table("messages")\
-                .delete()\
-                .eq("session_id", session_id)\
-                .execute()
+            await self.db.execute(
+                self.supabase.table("messages")
+                .delete()
+                .eq("session_id", session_id)
+            )
                 
-            result = self.supabase.table("chat_sessions")\
-                .delete()\
-                .eq("id", session_id)\
-                .execute()
+            result = await self.db.execute(
+                self.supabase.table("chat_sessions")
+                .delete()
+                .eq("id", session_id)
+            )
                 
             success = len(result.data) > 0
             if success:
@@ -372,4 +533,88 @@ class ChatService:
     
     async def flush(self):
         """Force immediate persistence of all cached data."""
-        await self._persist_dirty_data() 
\ No newline at end of file
+        if self._state:
+            await self._state.flush(self._persist_rows, self._update_row)
+            return
+        await self._persist_dirty_data()
+
+
+class _MessageWindow:
+    """
+    Newest cached messages of one session, contiguous down to ``oldest_seq``.
+    
+    Older pages are appended to ``_older`` (seq descending) and new messages
+    to ``_newer`` (seq ascending), so growing either end never copies the
+    cached history.
+    """
+    
+    def __init__(self):
+        self._older: List[Dict] = []
+        self._newer: List[Dict] = []
+    
+    def __len__(self) -> int:
+        return len(self._older) + len(self._newer)
+    
+    def __iter__(self) -> Iterator[Dict]:
+        yield from reversed(self._older)
+        yield from self._newer
+    
+    @property
+    def oldest_seq(self) -> Optional[int]:
+        if self._older:
+            return self._older[-1]["seq"]
+        if self._newer:
+            return self._newer[0]["seq"]
+        return None
+    
+    def add(self, message: Dict):
+        """Insert a new message; concurrent adds may arrive slightly out of order."""
+        self._newer.insert(_bisect_seq(self._newer, message["seq"]), message)
+    
+    def extend_older(self, rows: List[Dict]):
+        """Append a page fetched just below the window, seq descending."""
+        self._older.extend(rows)
+    
+    def page(self, limit: int, before_seq: Optional[int], status: Optional[str]) -> List[Dict]:
+        """Walk the window backwards from the cursor, O(log n + limit)."""
+        newer_end = len(self._newer)
+        older_start = 0
+        if before_seq is not None:
+            newer_end = _bisect_seq(self._newer, before_seq)
+            older_start = _bisect_seq_desc(self._older, before_seq)
+        
+        page = []
+        candidates = itertools.chain(
+            (self._newer[index] for index in range(newer_end - 1, -1, -1)),
+            itertools.islice(self._older, older_start, None)
+        )
+        for message in candidates:
+            if len(page) >= limit:
+                break
+            if not status or message["status"] == status:
+                page.append(message)
+        return page
+
+
+def _bisect_seq(messages: List[Dict], seq: int) -> int:
+    """Return the index of the first message whose ``seq`` is >= ``seq``."""
+    low, high = 0, len(messages)
+    while low < high:
+        mid = (low + high) // 2
+        if messages[mid]["seq"] < seq:
+            low = mid + 1
+        else:
+            high = mid
+    return low
+
+
+def _bisect_seq_desc(messages: List[Dict], seq: int) -> int:
+    """Return the index of the first message whose ``seq`` is < ``seq`` (descending list)."""
+    low, high = 0, len(messages)
+    while low < high:
+        mid = (low + high) // 2
+        if messages[mid]["seq"] >= seq:
+            low = mid + 1
+        else:
+            high = mid
+    return low
@@ -0,0 +1,512 @@
+from typing import Optional, List, Dict, Any, Callable, Awaitable, Tuple
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import WatchError
+from datetime import datetime
+import json
+import asyncio
+import uuid
+
+# Atomically assign the next seq and append the message to the session stream.
+# Stream IDs are "0-<seq + 1>" so XREVRANGE walks the same keyset as Supabase.
+APPEND_MESSAGE_SCRIPT = """
+local seq = redis.call('INCR', KEYS[1]) - 1
+redis.call('XADD', KEYS[2], '0-' .. (seq + 1), 'data', ARGV[1])
+redis.call('HSET', KEYS[3], ARGV[2], ARGV[3] .. ':' .. seq)
+redis.call('SADD', KEYS[4], ARGV[3])
+return seq
+"""
+
+# Write only the given session fields, and only if the session still exists.
+# ARGV is session id, last_message_at score ('' to keep it), then field/value pairs.
+UPDATE_SESSION_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return false
+end
+for i = 3, #ARGV, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+if ARGV[2] ~= '' then
+    redis.call('ZADD', KEYS[2], ARGV[2], ARGV[1])
+end
+redis.call('SADD', KEYS[3], ARGV[1])
+return redis.call('HGETALL', KEYS[1])
+"""
+
+# Remove stream entries up to ARGV[1] together with their message_session
+# entries and status overlays. Overlays still waiting in dirty:updates are
+# kept for the flusher, which prunes them once applied.
+PRUNE_MESSAGES_SCRIPT = """
+local entries = redis.call('XRANGE', KEYS[1], '-', ARGV[1])
+for _, entry in ipairs(entries) do
+    local message_id = cjson.decode(entry[2][2])['id']
+    redis.call('HDEL', KEYS[2], message_id)
+    if redis.call('SISMEMBER', KEYS[4], ARGV[2] .. ':' .. message_id) == 0 then
+        redis.call('HDEL', KEYS[3], message_id)
+    end
+    redis.call('XDEL', KEYS[1], entry[1])
+end
+return #entries
+"""
+
+# Hydrate a user's sessions loaded from Supabase and mark the user loaded.
+# ARGV is the session key prefix, then id/score/JSON field map triples.
+# Sessions already in Redis were created or updated here and may not be
+# flushed yet, so they are kept as they are.
+CACHE_SESSIONS_SCRIPT = """
+for i = 2, #ARGV, 3 do
+    local key = ARGV[1] .. ARGV[i]
+    if redis.call('EXISTS', key) == 0 then
+        for field, value in pairs(cjson.decode(ARGV[i + 2])) do
+            redis.call('HSET', key, field, value)
+        end
+        redis.call('ZADD', KEYS[1], ARGV[i + 1], ARGV[i])
+    end
+end
+redis.call('SET', KEYS[2], 1)
+return 1
+"""
+
+# Take or renew the flusher lease only if nobody else holds it.
+ACQUIRE_LEASE_SCRIPT = """
+local owner = redis.call('GET', KEYS[1])
+if not owner then
+    redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    return 1
+end
+if owner == ARGV[1] then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return 1
+end
+return 0
+"""
+
+PersistFn = Callable[[str, List[Dict]], Awaitable[None]]
+UpdateFn = Callable[[str, str, Dict], Awaitable[None]]
+
+
+def _stream_id(seq: int) -> str:
+    """Stream entry ID for a message seq."""
+    return f"0-{seq + 1}"
+
+
+def _seq_from_id(entry_id: str) -> int:
+    """Message seq for a stream entry ID."""
+    return int(entry_id.split("-")[1]) - 1
+
+
+def _message_ref(ref: str) -> Tuple[str, int]:
+    """Session id and seq from a message_session value."""
+    session_id, seq = ref.rsplit(":", 1)
+    return session_id, int(seq)
+
+
+def _score(timestamp: Optional[str]) -> float:
+    """Sorted-set score for an ISO timestamp."""
+    if not timestamp:
+        return 0.0
+    return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp()
+
+
+class RedisChatState:
+    """
+    Shared hot state for ChatService across API workers.
+
+    Layout (all keys live under ``namespace``):
+        session:<id>          hash of JSON-encoded session fields
+        user:<id>:sessions    sorted set of session ids by last_message_at
+        seq:<session_id>      next message seq
+        messages:<session_id> stream of messages, entry ID derived from seq
+        updates:<session_id>  hash message_id -> JSON status/metadata overlay
+        message_session       hash message_id -> "<session_id>:<seq>" for hot messages
+        dirty:*               sets drained by the elected flusher
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        namespace: str = "chat",
+        lease_ttl: int = 30,
+        max_stream_length: int = 1000
+    ):
+        """
+        Initialize the shared chat state.
+
+        Args:
+            redis_url: Redis connection URL
+            namespace: Key prefix for all chat keys
+            lease_ttl: Flusher lease duration in seconds, longer than the flush interval
+            max_stream_length: Flushed messages kept hot per session
+        """
+        self.redis: Redis = Redis.from_url(redis_url, decode_responses=True)
+        self.namespace = namespace
+        self.worker_id = str(uuid.uuid4())
+        self.lease_ttl = lease_ttl
+        self.max_stream_length = max_stream_length
+        self._append_message = self.redis.register_script(APPEND_MESSAGE_SCRIPT)
+        self._acquire_lease = self.redis.register_script(ACQUIRE_LEASE_SCRIPT)
+        self._update_session = self.redis.register_script(UPDATE_SESSION_SCRIPT)
+        self._prune_messages = self.redis.register_script(PRUNE_MESSAGES_SCRIPT)
+        self._cache_sessions = self.redis.register_script(CACHE_SESSIONS_SCRIPT)
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((self.namespace,) + parts)
+
+    @staticmethod
+    def _encode(record: Dict[str, Any]) -> Dict[str, str]:
+        return {field: json.dumps(value) for field, value in record.items()}
+
+    @staticmethod
+    def _decode(record: Dict[str, str]) -> Dict[str, Any]:
+        return {field: json.loads(value) for field, value in record.items()}
+
+    # Sessions
+
+    async def save_session(self, session: Dict, dirty: bool = True):
+        """Store a session and index it under its user."""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self._key("session", session["id"]), mapping=self._encode(session))
+            pipe.zadd(
+                self._key("user", session["user_id"], "sessions"),
+                {session["id"]: _score(session.get("last_message_at"))}
+            )
+            if dirty:
+                pipe.sadd(self._key("dirty", "sessions"), session["id"])
+            await pipe.execute()
+
+    async def cache_sessions(self, user_id: str, sessions: List[Dict]):
+        """
+        Hydrate a user's sessions loaded from Supabase without marking them dirty.
+
+        Sessions already in Redis are newer than the store and are left as they are.
+        """
+        args = [self._key("session", "")]
+        for session in sessions:
+            args.extend((
+                session["id"],
+                _score(session.get("last_message_at")),
+                json.dumps(self._encode(session))
+            ))
+        await self._cache_sessions(
+            keys=[self._key("user", user_id, "sessions"), self._key("user", user_id, "loaded")],
+            args=args
+        )
+
+    async def get_sessions(self, user_id: str) -> Optional[List[Dict]]:
+        """
+        Return a user's sessions, newest first, or None if not hydrated yet.
+
+        Sessions created before the first hydration do not count: until the
+        user's sessions were loaded from Supabase, the set may be partial.
+        """
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.exists(self._key("user", user_id, "loaded"))
+            pipe.zrevrange(self._key("user", user_id, "sessions"), 0, -1)
+            loaded, session_ids = await pipe.execute()
+
+        if not loaded:
+            return None
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for session_id in session_ids:
+                pipe.hgetall(self._key("session", session_id))
+            records = await pipe.execute()
+        return [self._decode(record) for record in records if record]
+
+    async def update_session(self, session_id: str, fields: Dict[str, Any]) -> Optional[Dict]:
+        """Write only the given session fields, returning the session or None if absent."""
+        key = self._key("session", session_id)
+        user_id = await self.redis.hget(key, "user_id")
+        if not user_id:
+            return None
+
+        score = _score(fields["last_message_at"]) if fields.get("last_message_at") else ""
+        args = [session_id, score]
+        for field, value in self._encode(fields).items():
+            args.extend((field, value))
+
+        record = await self._update_session(
+            keys=[
+                key,
+                self._key("user", json.loads(user_id), "sessions"),
+                self._key("dirty", "sessions")
+            ],
+            args=args
+        )
+        if not record:
+            return None
+        return self._decode(dict(zip(record[::2], record[1::2])))
+
+    async def delete_session(self, session_id: str):
+        """Drop a session and its messages from the shared state."""
+        key = self._key("session", session_id)
+        user_id = await self.redis.hget(key, "user_id")
+        await self._prune_stream(session_id, "+")
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            if user_id:
+                pipe.zrem(self._key("user", json.loads(user_id), "sessions"), session_id)
+            pipe.delete(
+                key,
+                self._key("seq", session_id),
+                self._key("messages", session_id),
+                self._key("updates", session_id),
+                self._key("flushed", session_id)
+            )
+            pipe.srem(self._key("dirty", "sessions"), session_id)
+            pipe.srem(self._key("dirty", "messages"), session_id)
+            await pipe.execute()
+
+    # Messages
+
+    async def has_seq(self, session_id: str) -> bool:
+        """Whether the session's seq counter is already shared."""
+        return bool(await self.redis.exists(self._key("seq", session_id)))
+
+    async def init_seq(self, session_id: str, next_seq: int):
+        """Seed the seq counter from the persisted tail; first worker wins."""
+        await self.redis.set(self._key("seq", session_id), next_seq, nx=True)
+
+    async def append_message(self, message: Dict) -> int:
+        """Append a message and return the seq assigned to it."""
+        session_id = message["session_id"]
+        body = {field: value for field, value in message.items() if field != "seq"}
+        return await self._append_message(
+            keys=[
+                self._key("seq", session_id),
+                self._key("messages", session_id),
+                self._key("message_session"),
+                self._key("dirty", "messages")
+            ],
+            args=[json.dumps(body), message["id"], session_id]
+        )
+
+    def _message_from_entry(self, entry_id: str, fields: Dict[str, str], updates: Dict[str, str]) -> Dict:
+        message = json.loads(fields["data"])
+        message["seq"] = _seq_from_id(entry_id)
+        if message["id"] in updates:
+            message.update(json.loads(updates[message["id"]]))
+        return message
+
+    async def get_messages(
+        self,
+        session_id: str,
+        limit: int,
+        before_seq: Optional[int] = None,
+        status: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[int]]:
+        """
+        Walk the session stream backwards from the cursor.
+
+        Returns:
+            The page (newest first) and the lowest seq held in the stream, or
+            None if the stream is empty. Anything older lives only in Supabase.
+        """
+        stream = self._key("messages", session_id)
+        upper = "+" if before_seq is None else _stream_id(before_seq - 1)
+        page: List[Dict] = []
+        oldest = None
+
+        while len(page) < limit and (before_seq is None or before_seq > 0):
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.xrevrange(stream, max=upper, min="-", count=limit)
+                pipe.hgetall(self._key("updates", session_id))
+                pipe.xrange(stream, min="-", max="+", count=1)
+                entries, updates, oldest = await pipe.execute()
+
+            for entry_id, fields in entries:
+                message = self._message_from_entry(entry_id, fields, updates)
+                if not status or message["status"] == status:
+                    page.append(message)
+                    if len(page) >= limit:
+                        break
+
+            if len(entries) < limit:
+                break
+            before_seq = _seq_from_id(entries[-1][0])
+            upper = _stream_id(before_seq - 1)
+
+        if oldest is None:
+            oldest = await self.redis.xrange(stream, min="-", max="+", count=1)
+
+        return page, _seq_from_id(oldest[0][0]) if oldest else None
+
+    async def update_message(self, message_id: str, fields: Dict[str, Any]) -> Optional[Dict]:
+        """
+        Overlay status/metadata on a hot message.
+
+        Returns:
+            The full message with the overlay applied, or None if it is not hot
+        """
+        ref = await self.redis.hget(self._key("message_session"), message_id)
+        if not ref:
+            return None
+
+        session_id, seq = _message_ref(ref)
+        key = self._key("updates", session_id)
+        entry_id = _stream_id(seq)
+
+        # Optimistic merge so concurrent overlays on one message are not lost
+        async with self.redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(key)
+                    current = await pipe.hget(key, message_id)
+                    overlay = json.loads(current) if current else {}
+                    overlay.update(fields)
+                    encoded = json.dumps(overlay)
+
+                    pipe.multi()
+                    pipe.hset(key, message_id, encoded)
+                    pipe.sadd(self._key("dirty", "updates"), f"{session_id}:{message_id}")
+                    pipe.xrange(self._key("messages", session_id), min=entry_id, max=entry_id)
+                    _, _, entries = await pipe.execute()
+                    break
+                except WatchError:
+                    continue
+
+        if not entries:
+            return None
+        entry_id, entry = entries[0]
+        return self._message_from_entry(entry_id, entry, {message_id: encoded})
+
+    # Flushing
+
+    async def acquire_flusher_lease(self) -> bool:
+        """Elect this worker as the single flusher, renewing if already held."""
+        return bool(await self._acquire_lease(
+            keys=[self._key("flusher")],
+            args=[self.worker_id, self.lease_ttl * 1000]
+        ))
+
+    async def flush(
+        self,
+        persist: PersistFn,
+        update: UpdateFn,
+        batch_size: int = 100
+    ):
+        """
+        Drain dirty sessions, new stream entries and message updates to the store.
+
+        Args:
+            persist: Coroutine upserting rows into a table
+            update: Coroutine applying fields to one row by id
+            batch_size: Dirty ids popped per round-trip
+        """
+        await self._flush_sessions(persist, batch_size)
+        await self._flush_messages(persist, batch_size)
+        await self._flush_updates(update, batch_size)
+
+    async def _flush_sessions(self, persist: PersistFn, batch_size: int):
+        dirty = self._key("dirty", "sessions")
+        while True:
+            session_ids = await self.redis.spop(dirty, batch_size)
+            if not session_ids:
+                return
+
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for session_id in session_ids:
+                    pipe.hgetall(self._key("session", session_id))
+                records = await pipe.execute()
+
+            sessions = [self._decode(record) for record in records if record]
+            try:
+                if sessions:
+                    await persist("chat_sessions", sessions)
+                    logger.debug(f"💾 Persisted {len(sessions)} sessions to Supabase")
+            except Exception:
+                await self.redis.sadd(dirty, *session_ids)
+                raise
+
+    async def _flush_messages(self, persist: PersistFn, batch_size: int):
+        dirty = self._key("dirty", "messages")
+        while True:
+            session_ids = await self.redis.spop(dirty, batch_size)
+            if not session_ids:
+                return
+
+            try:
+                for session_id in session_ids:
+                    await self._flush_stream(session_id, persist)
+            except Exception:
+                await self.redis.sadd(dirty, *session_ids)
+                raise
+
+    async def _flush_stream(self, session_id: str, persist: PersistFn):
+        stream = self._key("messages", session_id)
+        cursor_key = self._key("flushed", session_id)
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.get(cursor_key)
+            pipe.hgetall(self._key("updates", session_id))
+            cursor, updates = await pipe.execute()
+
+        entries = await self.redis.xrange(stream, min=cursor or "-", max="+")
+        if cursor and entries and entries[0][0] == cursor:
+            entries = entries[1:]
+        if not entries:
+            return
+
+        messages = [self._message_from_entry(entry_id, fields, updates) for entry_id, fields in entries]
+        await persist("messages", messages)
+        logger.debug(f"💾 Persisted {len(messages)} messages from session {session_id} to Supabase")
+
+        # Only flushed entries are ever trimmed from the hot stream
+        last_seq = _seq_from_id(entries[-1][0])
+        await self.redis.set(cursor_key, entries[-1][0])
+        if last_seq >= self.max_stream_length:
+            await self._prune_stream(session_id, _stream_id(last_seq - self.max_stream_length))
+
+    async def _prune_stream(self, session_id: str, max_id: str) -> int:
+        """Drop stream entries up to ``max_id`` with their lookup and overlay entries."""
+        return await self._prune_messages(
+            keys=[
+                self._key("messages", session_id),
+                self._key("message_session"),
+                self._key("updates", session_id),
+                self._key("dirty", "updates")
+            ],
+            args=[max_id, session_id]
+        )
+
+    async def _flush_updates(self, update: UpdateFn, batch_size: int):
+        dirty = self._key("dirty", "updates")
+        while True:
+            members = await self.redis.spop(dirty, batch_size)
+            if not members:
+                return
+
+            try:
+                for member in members:
+                    session_id, message_id = member.split(":", 1)
+                    key = self._key("updates", session_id)
+                    overlay = await self.redis.hget(key, message_id)
+                    if overlay:
+                        await update("messages", message_id, json.loads(overlay))
+                        # Overlays of messages trimmed from the stream are no longer read
+                        if not await self.redis.hexists(self._key("message_session"), message_id):
+                            await self.redis.hdel(key, message_id)
+            except Exception:
+                await self.redis.sadd(dirty, *members)
+                raise
+
+    async def run_flusher(
+        self,
+        persist: PersistFn,
+        update: UpdateFn,
+        interval: int
+    ):
+        """Flush every interval while this worker holds the flusher lease."""
+        while True:
+            try:
+                if await self.acquire_flusher_lease():
+                    await self.flush(persist, update)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Error in shared state flusher: {str(e)}")
+            await asyncio.sleep(interval)
+
+    async def close(self):
+        """Close the Redis connection pool."""
+        await self.redis.close()
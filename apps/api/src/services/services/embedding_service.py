@@ -3,9 +3,43 @@ import numpy as np
 from openai import AsyncOpenAI
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+DEFAULT_EMBEDDING_MODEL = "text-embedding-3-large"
+
+# Dimensões nativas dos modelos de embedding da OpenAI
+MODEL_DIMENSIONS = {
+    "text-embedding-3-large": 3072,
+    "text-embedding-3-small": 1536,
+    "text-embedding-ada-002": 1536
+}
+
 class EmbeddingService:
-    def __init__(self, openai_client: AsyncOpenAI):
-        self.client = openai_client
+    def __init__(
+        self,
+        openai_client: Optional[AsyncOpenAI] = None,
+        model: str = DEFAULT_EMBEDDING_MODEL,
+        dimensions: Optional[int] = None
+    ):
+        """
+        Args:
+            openai_client: Cliente OpenAI; por omissão é criado no primeiro
+                embedding, para que quem nunca gera embeddings não precise
+                de API key
+            model: Modelo de embedding
+            dimensions: Tamanho dos vetores pedido ao modelo; por omissão o
+                tamanho nativo do modelo
+        """
+        if dimensions is None and model not in MODEL_DIMENSIONS:
+            raise ValueError(f"Dimensões desconhecidas para o modelo {model}; indique dimensions")
+        self._client = openai_client
+        self.model = model
+        self._requested_dimensions = dimensions
+        self.dimensions = dimensions or MODEL_DIMENSIONS[model]
+    
+    @property
+    def client(self) -> AsyncOpenAI:
+        if self._client is None:
+            self._client = AsyncOpenAI()
+        return self._client
         
     @retry(
         stop=stop_after_attempt(3),
@@ -15,9 +49,11 @@ class EmbeddingService:
         """
         Gera embedding para um texto usando OpenAI
         """
+        options = {"dimensions": self._requested_dimensions} if self._requested_dimensions else {}
         response = await self.client.embeddings.create(
             input=text,
-            model="text-embedding-3-large"
+            model=self.model,
+            **options
         )
         return response.data[0].embedding
         
@@ -1,25 +1,294 @@
-from qdrant_client import QdrantClient
-from src.config.settings import settings
+import asyncio
+import uuid
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional
+
+from qdrant_client import AsyncQdrantClient, models
+from src.config.settings import get_settings
+from src.services.embedding_service import DEFAULT_EMBEDDING_MODEL, MODEL_DIMENSIONS
+
+# Campos de metadata usados em filtros; o índice evita varrer todos os pontos
+DEFAULT_PAYLOAD_INDEXES = {
+    "metadata.source": models.PayloadSchemaType.KEYWORD,
+    "metadata.type": models.PayloadSchemaType.KEYWORD,
+    "metadata.category": models.PayloadSchemaType.KEYWORD,
+    "metadata.url": models.PayloadSchemaType.KEYWORD,
+}
+
+
+def _point_id(doc_id: Any) -> Any:
+    """O Qdrant só aceita inteiros ou UUIDs; outros ids são mapeados para um UUID estável"""
+    if isinstance(doc_id, int):
+        return doc_id
+    try:
+        return str(uuid.UUID(str(doc_id)))
+    except ValueError:
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, str(doc_id)))
+
+
+def build_filter(filters: Optional[Dict[str, Any]]) -> Optional[models.Filter]:
+    """
+    Converte {campo: valor} num filtro Qdrant sobre a metadata.
+
+    Listas correspondem a qualquer um dos valores; dicts com gt/gte/lt/lte
+    definem um intervalo.
+    """
+    if not filters:
+        return None
+
+    conditions = []
+    for field, value in filters.items():
+        key = field if field.startswith("metadata.") else f"metadata.{field}"
+        if isinstance(value, dict):
+            conditions.append(models.FieldCondition(key=key, range=models.Range(**value)))
+        elif isinstance(value, (list, tuple, set)):
+            conditions.append(models.FieldCondition(key=key, match=models.MatchAny(any=list(value))))
+        else:
+            conditions.append(models.FieldCondition(key=key, match=models.MatchValue(value=value)))
+    return models.Filter(must=conditions)
+
+
+def _to_result(point: Any) -> Dict[str, Any]:
+    payload = point.payload or {}
+    result = {
+        "id": payload.get("id", point.id),
+        "content": payload.get("content", ""),
+        "metadata": payload.get("metadata", {}),
+    }
+    if getattr(point, "score", None) is not None:
+        result["score"] = point.score
+    if getattr(point, "vector", None) is not None:
+        result["embedding"] = point.vector
+    return result
+
 
 class QdrantService:
-    def __init__(self):
-        self.client = QdrantClient(
+    """
+    Vector store sobre Qdrant.
+
+    Usa o cliente assíncrono (gRPC quando disponível), envia upserts em lotes
+    paralelos e mantém índices de payload nos campos de metadata filtrados.
+    """
+
+    def __init__(
+        self,
+        client: Optional[AsyncQdrantClient] = None,
+        collection_name: Optional[str] = None,
+        batch_size: int = 256,
+        parallel: int = 4,
+        payload_indexes: Optional[Dict[str, Any]] = None,
+        vector_size: int = MODEL_DIMENSIONS[DEFAULT_EMBEDDING_MODEL]
+    ):
+        """
+        Args:
+            client: Cliente Qdrant; por omissão é criado a partir das settings
+            collection_name: Collection usada por omissão
+            batch_size: Pontos por pedido de upsert
+            parallel: Lotes de upsert enviados em simultâneo
+            payload_indexes: Campos a indexar e respetivo tipo
+            vector_size: Tamanho dos vetores das collections criadas; por
+                omissão o do modelo de embedding padrão do EmbeddingService
+        """
+        settings = get_settings() if client is None or collection_name is None else None
+        self.client = client or AsyncQdrantClient(
             url=settings.QDRANT_URL,
             api_key=settings.QDRANT_API_KEY,
-            timeout=settings.QDRANT_TIMEOUT
+            timeout=int(settings.QDRANT_TIMEOUT),
+            grpc_port=settings.QDRANT_GRPC_PORT,
+            prefer_grpc=settings.QDRANT_PREFER_GRPC
         )
+        self.collection_name = collection_name or settings.QDRANT_COLLECTION
+        self.batch_size = batch_size
+        self.parallel = parallel
+        self.payload_indexes = DEFAULT_PAYLOAD_INDEXES if payload_indexes is None else payload_indexes
+        self.vector_size = vector_size
 
-    def create_collection(self, collection_name: str, vector_size: int = 768):
-        """Cria uma nova collection no Qdrant"""
+    async def create_collection(self, collection_name: Optional[str] = None, vector_size: Optional[int] = None) -> bool:
+        """Cria uma nova collection no Qdrant com os índices de payload"""
+        collection_name = collection_name or self.collection_name
+        vector_size = vector_size or self.vector_size
         try:
-            self.client.create_collection(
-                collection_name=collection_name,
-                vectors_config={
-                    "size": vector_size,
-                    "distance": "Cosine"
-                }
-            )
+            if not await self.client.collection_exists(collection_name):
+                await self.client.create_collection(
+                    collection_name=collection_name,
+                    vectors_config=models.VectorParams(
+                        size=vector_size,
+                        distance=models.Distance.COSINE
+                    )
+                )
+            await self.create_payload_indexes(collection_name)
             return True
         except Exception as e:
             print(f"Erro ao criar collection: {e}")
-            return False 
\ No newline at end of file
+            return False
+
+    async def create_payload_indexes(self, collection_name: Optional[str] = None):
+        """Cria os índices de payload configurados"""
+        for field, schema in self.payload_indexes.items():
+            await self.client.create_payload_index(
+                collection_name=collection_name or self.collection_name,
+                field_name=field,
+                field_schema=schema
+            )
+
+    async def upsert_batch(self, documents: Iterable[Dict[str, Any]], collection_name: Optional[str] = None) -> int:
+        """
+        Insere ou atualiza documentos em lotes paralelos.
+
+        ``parallel`` workers consomem lotes de uma fila limitada enquanto o
+        iterável é lido, por isso a memória não depende do número de documentos.
+        Depois do primeiro erro os lotes restantes não são enviados.
+
+        Args:
+            documents: Dicts com ``id``, ``embedding``, ``content`` e ``metadata``
+
+        Returns:
+            Número de pontos enviados
+        """
+        collection_name = collection_name or self.collection_name
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.parallel)
+        errors: List[Exception] = []
+
+        async def worker():
+            while True:
+                points = await queue.get()
+                if points is None:
+                    return
+                if errors:
+                    continue
+                try:
+                    await self.client.upsert(collection_name=collection_name, points=points, wait=True)
+                except Exception as e:
+                    errors.append(e)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(self.parallel)]
+        total = 0
+        try:
+            for points in self._point_batches(documents):
+                if errors:
+                    break
+                await queue.put(points)
+                total += len(points)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        except BaseException:
+            for task in workers:
+                task.cancel()
+            raise
+
+        if errors:
+            raise errors[0]
+        return total
+
+    def _point_batches(self, documents: Iterable[Dict[str, Any]]) -> Iterator[List[models.PointStruct]]:
+        batch: List[models.PointStruct] = []
+        for document in documents:
+            batch.append(models.PointStruct(
+                id=_point_id(document["id"]),
+                vector=list(document["embedding"]),
+                payload={
+                    "id": document["id"],
+                    "content": document.get("content", ""),
+                    "metadata": document.get("metadata", {})
+                }
+            ))
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def delete(self, ids: Iterable[Any], collection_name: Optional[str] = None):
+        """Remove documentos pelos seus ids"""
+        await self.client.delete(
+            collection_name=collection_name or self.collection_name,
+            points_selector=models.PointIdsList(points=[_point_id(doc_id) for doc_id in ids]),
+            wait=True
+        )
+
+    async def search(
+        self,
+        embedding: List[float],
+        limit: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        score_threshold: Optional[float] = None,
+        collection_name: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Busca os documentos mais próximos, opcionalmente filtrados pela metadata"""
+        response = await self.client.query_points(
+            collection_name=collection_name or self.collection_name,
+            query=embedding,
+            query_filter=build_filter(filters),
+            limit=limit,
+            score_threshold=score_threshold,
+            with_payload=True
+        )
+        return [_to_result(point) for point in response.points]
+
+    async def search_batch(
+        self,
+        embeddings: List[List[float]],
+        limit: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        score_threshold: Optional[float] = None,
+        collection_name: Optional[str] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Executa várias buscas num único pedido"""
+        query_filter = build_filter(filters)
+        responses = await self.client.query_batch_points(
+            collection_name=collection_name or self.collection_name,
+            requests=[
+                models.QueryRequest(
+                    query=embedding,
+                    filter=query_filter,
+                    limit=limit,
+                    score_threshold=score_threshold,
+                    with_payload=True
+                )
+                for embedding in embeddings
+            ]
+        )
+        return [[_to_result(point) for point in response.points] for response in responses]
+
+    async def filter(
+        self,
+        filters: Optional[Dict[str, Any]],
+        limit: int = 100,
+        collection_name: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Devolve documentos cuja metadata corresponde aos filtros, sem busca vetorial"""
+        points, _ = await self.client.scroll(
+            collection_name=collection_name or self.collection_name,
+            scroll_filter=build_filter(filters),
+            limit=limit,
+            with_payload=True,
+            with_vectors=False
+        )
+        return [_to_result(point) for point in points]
+
+    async def export(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        batch_size: int = 256,
+        with_vectors: bool = True,
+        collection_name: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Percorre a collection com scroll, página a página, sem a carregar toda em memória"""
+        offset = None
+        while True:
+            points, offset = await self.client.scroll(
+                collection_name=collection_name or self.collection_name,
+                scroll_filter=build_filter(filters),
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=with_vectors
+            )
+            for point in points:
+                yield _to_result(point)
+            if offset is None:
+                break
+
+    async def close(self):
+        """Fecha o cliente"""
+        await self.client.close()
@@ -1,82 +1,181 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from ..config.llm_config import LLMConfig
+from src.rag.chroma_index import ChromaIndex
+from src.rag.chunking import chunk_id, document_key
 from src.utils.logger import get_logger
 
+logger = get_logger(__name__)
+
+
 class RAGService:
-    def __init__(self, config: LLMConfig):
-        self.config = config
-        self.embeddings = HuggingFaceEmbeddings(
+    """
+    RAG sobre um Chroma persistente.
+
+    Os chunks são identificados pelo documento (``source``/``url``/``path`` na
+    metadata) e pelo hash do conteúdo, por isso reindexar um documento só
+    calcula embeddings para chunks novos, e texto igual em documentos
+    diferentes não colide. Chunking e embeddings
+    correm num pool de workers, em lotes, fora do event loop.
+    """
+
+    def __init__(
+        self,
+        config: Optional[LLMConfig] = None,
+        index: Optional[ChromaIndex] = None,
+        embeddings: Optional[Any] = None,
+        embed_batch_size: int = 64,
+        embed_workers: int = 2
+    ):
+        """
+        Args:
+            config: Configuração com chunking, threshold e diretório do Chroma
+            index: Índice Chroma; por omissão é persistente em ``config.vector_store_path``
+            embeddings: Modelo com ``embed_documents``/``embed_query``
+            embed_batch_size: Chunks por lote de embeddings
+            embed_workers: Threads do pool de chunking e embeddings
+        """
+        self.config = config or LLMConfig()
+        self.embeddings = embeddings or HuggingFaceEmbeddings(
             model_name="all-MiniLM-L6-v2"
         )
-        self.vector_store = None
+        self.index = index or ChromaIndex(
+            self.config.collection_name,
+            persist_directory=self.config.vector_store_path
+        )
         self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=config.chunk_size,
-            chunk_overlap=config.chunk_overlap
+            chunk_size=self.config.chunk_size,
+            chunk_overlap=self.config.chunk_overlap
+        )
+        self.embed_batch_size = embed_batch_size
+        self._executor = ThreadPoolExecutor(max_workers=embed_workers, thread_name_prefix="rag-embed")
+        self._warm = False
+        self._warming: Optional[asyncio.Future] = None
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    async def warm_up(self):
+        """
+        Carrega o modelo e o índice persistido para servir queries sem latência de arranque.
+
+        Chamadas concorrentes esperam pelo mesmo carregamento; se falhar, a
+        próxima chamada tenta de novo.
+        """
+        if self._warm:
+            return
+        failed = self._warming is not None and self._warming.done() and (
+            self._warming.cancelled() or self._warming.exception() is not None
         )
-    
-    async def add_documents(self, documents: List[str], metadata: Optional[List[Dict]] = None) -> None:
-        """Adiciona documentos ao vector store"""
-        texts = []
-        metas = []
-        
-        # Processa cada documento
+        if self._warming is None or failed:
+            self._warming = asyncio.ensure_future(self._load())
+        await asyncio.shield(self._warming)
+
+    async def _load(self):
+        await self._run(self.embeddings.embed_query, "warm up")
+        await asyncio.to_thread(self.index.collection.count)
+        self._warm = True
+        logger.info("RAG service preloaded")
+
+    def _split(self, documents: List[str], metadata: Optional[List[Dict]]) -> List[Dict]:
+        chunks = []
         for i, doc in enumerate(documents):
-            chunks = self.text_splitter.split_text(doc)
-            texts.extend(chunks)
-            
-            # Adiciona metadata para cada chunk
-            if metadata and i < len(metadata):
-                metas.extend([metadata[i]] * len(chunks))
-            else:
-                metas.extend([{}] * len(chunks))
-        
-        # Cria ou atualiza vector store
-        if self.vector_store is None:
-            self.vector_store = Chroma.from_texts(
-                texts=texts,
-                embedding=self.embeddings,
-                metadatas=metas
+            meta = metadata[i] if metadata and i < len(metadata) else {}
+            document = document_key(doc, meta)
+            chunks.extend(
+                {"id": chunk_id(chunk, document), "content": chunk, "metadata": meta}
+                for chunk in self.text_splitter.split_text(doc)
+            )
+        return chunks
+
+    async def add_documents(self, documents: List[str], metadata: Optional[List[Dict]] = None) -> int:
+        """
+        Adiciona documentos ao vector store.
+
+        Returns:
+            Número de chunks novos indexados
+        """
+        chunks = await self._run(self._split, documents, metadata)
+        return await self.add_chunks(chunks)
+
+    async def add_chunks(self, chunks: List[Dict]) -> int:
+        """
+        Indexa chunks já divididos, calculando embeddings só para os que faltam.
+
+        Args:
+            chunks: Dicts com ``content``, ``metadata`` e opcionalmente ``id``;
+                sem ``id`` o documento é identificado pela metadata do chunk
+
+        Returns:
+            Número de chunks novos indexados
+        """
+        unique = {}
+        for chunk in chunks:
+            key = chunk.get("id") or chunk_id(
+                chunk["content"], document_key(chunk["content"], chunk.get("metadata"))
             )
-        else:
-            self.vector_store.add_texts(texts, metadatas=metas)
-    
+            unique.setdefault(key, chunk)
+        chunks = [{**chunk, "id": key} for key, chunk in unique.items()]
+        existing = await self.index.existing(chunk["id"] for chunk in chunks)
+        chunks = [chunk for chunk in chunks if chunk["id"] not in existing]
+
+        for start in range(0, len(chunks), self.embed_batch_size):
+            batch = chunks[start:start + self.embed_batch_size]
+            vectors = await self._run(self.embeddings.embed_documents, [chunk["content"] for chunk in batch])
+            await self.index.upsert_batch(
+                {**chunk, "embedding": vector} for chunk, vector in zip(batch, vectors)
+            )
+
+        logger.info(f"Indexed {len(chunks)} new chunks, skipped {len(existing)} already stored")
+        return len(chunks)
+
+    async def delete_chunks(self, ids: List[str]):
+        """Remove chunks do vector store"""
+        await self.index.delete(ids)
+
     async def process_query(self, query: str, context: Optional[Dict] = None) -> Dict:
         """Processa uma query usando RAG"""
         try:
-            if self.vector_store is None:
+            if not self._warm:
+                await self.warm_up()
+
+            # Busca documentos relevantes
+            embedding = await self._run(self.embeddings.embed_query, query)
+            docs = await self.index.search(
+                embedding,
+                limit=3,
+                score_threshold=self.config.similarity_threshold
+            )
+
+            if not docs:
                 return {
                     "type": "error",
-                    "content": "Vector store não inicializado. Adicione documentos primeiro."
+                    "content": "Nenhum documento relevante encontrado. Adicione documentos primeiro."
                 }
-            
-            # Busca documentos relevantes
-            docs = self.vector_store.similarity_search(
-                query,
-                k=3,
-                distance_threshold=self.config.similarity_threshold
-            )
-            
+
             # Formata resposta
-            sources = []
-            for doc in docs:
-                sources.append({
-                    "content": doc.page_content,
-                    "metadata": doc.metadata,
-                    "score": doc.metadata.get("score", 0.0)
-                })
-            
+            sources = [
+                {
+                    "content": doc["content"],
+                    "metadata": doc["metadata"],
+                    "score": doc["score"]
+                }
+                for doc in docs
+            ]
+
             return {
                 "type": "rag_response",
                 "content": "Documentos relevantes encontrados",
                 "sources": sources
             }
-            
+
         except Exception as e:
             return {
                 "type": "error",
                 "content": f"Erro ao processar query RAG: {str(e)}",
                 "error": str(e)
-            } 
\ No newline at end of file
+            }
@@ -79,6 +79,26 @@ async def test_track_error(metrics):
     )
     assert errors._value.get() == 1
 
+@pytest.mark.asyncio
+async def test_track_crawl_uses_fixed_source(metrics):
+    """Test page fetches share one source label whatever the host."""
+    await metrics.track_crawl(url="https://example.com/a?b=1", status=200, duration=0.2, size=512)
+    await metrics.track_crawl(url="https://other.org/", status=200, duration=0.1, size=128)
+    
+    requests = metrics.requests_total.labels(source="crawl", endpoint="crawl", status="200")
+    assert requests._value.get() == 2
+
+@pytest.mark.asyncio
+async def test_active_crawls_tracking(metrics):
+    """Test concurrent crawls add to and remove from the gauge."""
+    await metrics.add_active_crawls(3)
+    await metrics.add_active_crawls(2)
+    assert metrics.active_crawls._value.get() == 5
+    
+    await metrics.add_active_crawls(-3)
+    await metrics.add_active_crawls(-2)
+    assert metrics.active_crawls._value.get() == 0
+
 @pytest.mark.asyncio
 async def test_active_requests_tracking(metrics):
     """Test active requests tracking."""
@@ -0,0 +1,107 @@
+"""Tests for streamed, size-capped response bodies."""
+
+import httpx
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from src.analytics.metrics.crawler_metrics import CrawlerMetrics
+from src.crawlers.body import BodyReader, BodyTooLarge, UnsupportedContentType, sniff
+from src.crawlers.parallel_crawler import ParallelCrawler
+
+
+def test_declared_length_and_type_are_rejected_up_front():
+    with pytest.raises(BodyTooLarge):
+        BodyReader("text/html", "2000", max_bytes=1000)
+    with pytest.raises(UnsupportedContentType):
+        BodyReader("application/pdf")
+
+
+def test_missing_type_is_sniffed():
+    assert sniff(b"  <!DOCTYPE html><html>") == "text/html"
+    assert sniff(b"plain words") == "text/plain"
+    assert sniff(b"%PDF-1.7 ...") is None
+    assert sniff(b"ab\x00cd") is None
+
+    reader = BodyReader("application/octet-stream")
+    with pytest.raises(UnsupportedContentType):
+        reader.feed(b"\x89PNG\r\n\x1a\n")
+
+
+def test_multibyte_characters_split_across_chunks():
+    data = "<p>Olá, coração — ünïcödé</p>".encode("utf-8")
+    reader = BodyReader("text/html; charset=utf-8")
+
+    for i in range(len(data)):
+        reader.feed(data[i:i + 1])
+
+    assert reader.text() == "<p>Olá, coração — ünïcödé</p>"
+    assert reader.size == len(data)
+
+
+def test_charset_from_meta_tag():
+    data = '<html><head><meta charset="iso-8859-1"></head><p>café</p>'.encode("latin-1")
+    reader = BodyReader("text/html")
+
+    reader.feed(data)
+
+    assert "café" in reader.text()
+
+
+class Site:
+    """Streams bodies lazily and records how many bytes were produced."""
+
+    def __init__(self):
+        self.produced = 0
+
+    def body(self, total: int, chunk: bytes):
+        async def stream():
+            for _ in range(total // len(chunk)):
+                self.produced += len(chunk)
+                yield chunk
+        return stream()
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path == "/huge":
+            # No Content-Length: the cap has to be enforced while streaming
+            return httpx.Response(200, headers={"content-type": "text/html"},
+                                  content=self.body(500 * 1024 * 1024, b"<p>" + b"x" * 8189 + b"</p>"))
+        if path == "/video":
+            return httpx.Response(200, headers={"content-type": "video/mp4"},
+                                  content=self.body(50 * 1024 * 1024, b"\x00" * 8192))
+        if path == "/untyped":
+            return httpx.Response(200, content=self.body(50 * 1024 * 1024, b"PK\x03\x04" + b"\x00" * 8188))
+        return httpx.Response(200, headers={"content-type": "text/html; charset=utf-8"},
+                              text="<html><body><p>Olá</p></body></html>")
+
+
+@pytest.fixture
+async def crawler():
+    with patch("src.crawlers.parallel_crawler.CrawlerMetrics", return_value=AsyncMock(spec=CrawlerMetrics)):
+        crawler = ParallelCrawler(max_bytes=1024 * 1024)
+    crawler.site = Site()
+    crawler.client = httpx.AsyncClient(transport=httpx.MockTransport(crawler.site))
+    yield crawler
+    await crawler.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path,error", [
+    ("/huge", "BodyTooLarge"),
+    ("/video", "UnsupportedContentType"),
+    ("/untyped", "UnsupportedContentType"),
+])
+async def test_oversized_and_binary_bodies_are_abandoned_early(crawler, path, error):
+    result = await crawler.crawl_url(f"https://example.com{path}")
+
+    assert result is None
+    assert crawler.site.produced <= crawler.max_bytes + 8192
+    assert crawler.metrics.track_error.await_args.kwargs["error_type"] == error
+
+
+@pytest.mark.asyncio
+async def test_html_is_decoded_incrementally(crawler):
+    page = await crawler.crawl_url("https://example.com/page")
+
+    assert page.content == "<html><body><p>Olá</p></body></html>"
+    assert page.metadata["size"] == len(page.content.encode("utf-8"))
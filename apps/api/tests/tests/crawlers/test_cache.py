@@ -0,0 +1,196 @@
+"""Tests for the compressed, namespaced and size-bounded crawl cache."""
+
+import asyncio
+import random
+
+import pytest
+from unittest.mock import patch
+
+from src.crawlers.cache import CacheConfig, DistributedCache, compress, decompress, parse_size
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def client():
+    return fakeredis.FakeAsyncRedis()
+
+
+def make_cache(client, **config):
+    with patch("src.crawlers.cache.Redis.from_url", return_value=client):
+        return DistributedCache("redis://localhost", CacheConfig(**config))
+
+
+def page(i, size=2000):
+    # Distinct, poorly compressible bodies so sizes are predictable
+    rng = random.Random(i)
+    return {"content": "".join(rng.choice("abcdefghijklmnopqrstuvwxyz ") for _ in range(size))}
+
+
+def test_parse_size():
+    assert parse_size("1GB") == 1024 ** 3
+    assert parse_size("512 mb") == 512 * 1024 ** 2
+    assert parse_size("100") == 100
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+
+@pytest.mark.parametrize("codec", ["zstd", "gzip", "none"])
+def test_codecs_round_trip(codec):
+    if codec == "zstd":
+        pytest.importorskip("zstandard")
+    data = b"<p>hello</p>" * 100
+
+    blob = compress(data, codec)
+
+    assert decompress(blob) == data
+    assert codec == "none" or len(blob) < len(data) / 10
+
+
+@pytest.mark.asyncio
+async def test_values_are_compressed_and_round_trip(client):
+    cache = make_cache(client, compression="gzip")
+    content = {"content": "<p>repeated body</p>" * 500}
+
+    await cache.set("https://example.com", content)
+
+    assert await cache.get("https://example.com") == content
+    assert (await cache.usage())["bytes"] < len("<p>repeated body</p>" * 500) / 10
+
+
+@pytest.mark.asyncio
+async def test_clear_only_touches_its_namespace(client):
+    cache = make_cache(client, namespace="crawl")
+    other = make_cache(client, namespace="other")
+    await client.set("session:1", "keep me")
+    for i in range(1200):
+        await cache.set(f"https://example.com/{i}", {"content": str(i)})
+    await other.set("https://example.com/0", {"content": "other"})
+
+    await cache.clear()
+
+    assert await client.get("session:1") == b"keep me"
+    assert await other.get("https://example.com/0") == {"content": "other"}
+    assert await cache.get("https://example.com/0") is None
+    assert not [key async for key in client.scan_iter(match="crawl:*")]
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_keeps_recently_read_pages(client):
+    cache = make_cache(client, compression="none", max_size="10KB")
+    for i in range(4):
+        await cache.set(f"https://example.com/{i}", page(i))
+    await cache.get("https://example.com/0")
+
+    for i in range(4, 7):
+        await cache.set(f"https://example.com/{i}", page(i))
+
+    usage = await cache.usage()
+    assert usage["bytes"] <= usage["max_bytes"]
+    assert await cache.get("https://example.com/0") is not None
+    assert await cache.get("https://example.com/1") is None
+    assert await cache.get("https://example.com/6") is not None
+
+
+@pytest.mark.asyncio
+async def test_lfu_eviction_keeps_frequently_read_pages(client):
+    cache = make_cache(client, compression="none", max_size="10KB", eviction="lfu")
+    for i in range(4):
+        await cache.set(f"https://example.com/{i}", page(i))
+    for _ in range(3):
+        await cache.get("https://example.com/3")
+
+    for i in range(4, 7):
+        await cache.set(f"https://example.com/{i}", page(i))
+
+    assert await cache.get("https://example.com/3") is not None
+    assert (await cache.usage())["bytes"] <= 10 * 1024
+
+
+@pytest.mark.asyncio
+async def test_overwrites_and_invalidation_keep_accounting_exact(client):
+    cache = make_cache(client, compression="none")
+    await cache.set("https://example.com", page(1, size=3000))
+    await cache.set("https://example.com", page(2, size=1000))
+    await cache.set("https://example.com/other", page(3, size=500))
+
+    assert (await cache.usage())["entries"] == 2
+    await cache.invalidate("https://example.com")
+    await cache.invalidate("https://example.com/other")
+
+    assert await cache.usage() == {"bytes": 0, "entries": 0, "max_bytes": 1024 ** 3, "codec": "none"}
+
+
+@pytest.mark.asyncio
+async def test_expired_pages_release_their_space(client):
+    cache = make_cache(client, compression="none")
+    await cache.set("https://example.com", page(1))
+    await client.delete(cache._get_key("https://example.com"))  # as if the TTL ran out
+
+    assert await cache.get("https://example.com") is None
+    assert (await cache.usage())["bytes"] == 0
+
+
+@pytest.mark.asyncio
+async def test_large_bodies_go_to_shared_content_addressed_files(client, tmp_path):
+    cache = make_cache(client, disk_path=str(tmp_path), disk_threshold=1024, compression="none")
+    body = page(1, size=5000)
+    await cache.set("https://example.com/a", body)
+    await cache.set("https://example.com/b", body)
+    await cache.set("https://example.com/small", {"content": "tiny"})
+
+    files = [path for path in tmp_path.rglob("*") if path.is_file()]
+    assert len(files) == 1
+    assert len(await client.get(cache._get_key("https://example.com/a"))) < 100
+    assert await cache.get("https://example.com/b") == body
+
+    await cache.invalidate("https://example.com/a")
+    assert files[0].exists()
+    await cache.invalidate("https://example.com/b")
+    assert not files[0].exists()
+
+    await cache.clear()
+    assert not (tmp_path / "crawlcache").exists()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_keep_accounting_consistent(client, tmp_path):
+    cache = make_cache(client, disk_path=str(tmp_path), disk_threshold=1024, compression="none")
+    urls = [f"https://example.com/{i}" for i in range(4)]
+    bodies = [page(i, size=size) for i, size in enumerate([100, 3000, 3000, 5000])]
+    rng = random.Random(0)
+
+    async def churn(worker):
+        for _ in range(25):
+            url = rng.choice(urls)
+            if rng.random() < 0.2:
+                await cache.invalidate(url)
+            else:
+                await cache.set(url, rng.choice(bodies))
+
+    await asyncio.gather(*(churn(worker) for worker in range(8)))
+
+    sizes = {key: int(size) for key, size in (await client.hgetall(cache._sizes_key)).items()}
+    index = set(await client.zrange(cache._index_key, 0, -1))
+    stored = [await client.get(key) for key in index]
+    refs = {digest.decode(): int(n) for digest, n in (await client.hgetall(cache._refs_key)).items()}
+    pointers = [value[1:].decode() for value in stored if value[:1] == b"f"]
+
+    assert (await cache.usage())["bytes"] == sum(sizes.values())
+    assert index == set(sizes)
+    assert None not in stored
+    assert refs == {digest: pointers.count(digest) for digest in set(pointers)}
+    assert {path.name for path in tmp_path.rglob("*") if path.is_file()} == set(refs)
+
+
+@pytest.mark.asyncio
+async def test_refresh_renews_ttl_without_rewriting(client):
+    cache = make_cache(client, compression="none", ttl=60)
+    assert not await cache.refresh("https://example.com")
+    await cache.set("https://example.com", page(1))
+    key = cache._get_key("https://example.com")
+    await client.expire(key, 5)
+
+    assert await cache.refresh("https://example.com")
+    assert await client.ttl(key) > 5
+    assert (await cache.usage())["entries"] == 1
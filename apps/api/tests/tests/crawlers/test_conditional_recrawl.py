@@ -0,0 +1,161 @@
+"""Tests for conditional re-crawls with ETag/Last-Modified and content hashes."""
+
+import httpx
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from src.analytics.metrics.crawler_metrics import CrawlerMetrics
+from src.crawlers.cache import DistributedCache
+from src.crawlers.parallel_crawler import ParallelCrawler
+from src.crawlers.rag_integration import documents_from_pages
+
+fakeredis = pytest.importorskip("fakeredis")
+
+PAGES = {
+    "/etag": ("<p>Versioned by ETag</p>", {"etag": '"v1"'}),
+    "/dated": ("<p>Versioned by date</p>", {"last-modified": "Mon, 06 Jan 2025 10:00:00 GMT"}),
+    "/plain": ("<p>No validators at all</p>", {}),
+}
+
+
+class Site:
+    """Serves PAGES, answering 304 when the validators still match."""
+
+    def __init__(self):
+        self.requests = []
+        self.bytes_sent = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        body, headers = PAGES[request.url.path]
+        if headers.get("etag") and request.headers.get("if-none-match") == headers["etag"]:
+            return httpx.Response(304, headers=headers)
+        if headers.get("last-modified") and request.headers.get("if-modified-since") == headers["last-modified"]:
+            return httpx.Response(304, headers=headers)
+        self.bytes_sent += len(body)
+        return httpx.Response(200, text=body, headers=headers)
+
+
+@pytest.fixture
+def cache():
+    with patch("src.crawlers.cache.Redis.from_url", return_value=fakeredis.FakeAsyncRedis()):
+        yield DistributedCache("redis://localhost")
+
+
+@pytest.fixture
+async def crawler(cache):
+    site = Site()
+    with patch("src.crawlers.parallel_crawler.CrawlerMetrics", return_value=AsyncMock(spec=CrawlerMetrics)):
+        crawler = ParallelCrawler(concurrency=2, cache=cache)
+    crawler.client = httpx.AsyncClient(transport=httpx.MockTransport(site))
+    crawler.site = site
+    yield crawler
+    await crawler.close()
+
+
+URLS = [f"https://docs.example.com{path}" for path in PAGES]
+
+
+@pytest.mark.asyncio
+async def crawl_and_commit(crawler, urls):
+    pages = await crawler.crawl_urls(urls)
+    for page in pages:
+        await crawler.commit(page)
+    return pages
+
+
+@pytest.mark.asyncio
+async def test_recrawl_sends_validators_and_skips_unchanged_pages(crawler):
+    first = {page.url: page for page in await crawl_and_commit(crawler, URLS)}
+    first_bytes = crawler.site.bytes_sent
+    second = {page.url: page for page in await crawler.crawl_urls(URLS)}
+
+    assert not any(page.metadata["unchanged"] for page in first.values())
+    assert all(page.metadata["unchanged"] for page in second.values())
+    assert second[URLS[0]].status_code == second[URLS[1]].status_code == 304
+    assert second[URLS[0]].content == first[URLS[0]].content
+    assert crawler.site.bytes_sent - first_bytes == len(PAGES["/plain"][0])
+
+    revalidations = {request.url.path: request.headers for request in crawler.site.requests[3:]}
+    assert revalidations["/etag"]["if-none-match"] == '"v1"'
+    assert revalidations["/dated"]["if-modified-since"] == PAGES["/dated"][1]["last-modified"]
+    assert "if-none-match" not in revalidations["/plain"]
+
+
+@pytest.mark.asyncio
+async def test_unchanged_bodies_are_not_rewritten(crawler, cache):
+    await crawl_and_commit(crawler, URLS)
+
+    with patch.object(cache, "set", wraps=cache.set) as store:
+        second = await crawler.crawl_urls(URLS)
+
+    assert all(page.metadata["unchanged"] for page in second)
+    store.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_changed_body_is_detected_by_hash(crawler):
+    await crawl_and_commit(crawler, [URLS[2]])
+    with patch.dict(PAGES, {"/plain": ("<p>Rewritten page</p>", {})}):
+        page = await crawler.crawl_url(URLS[2])
+
+    assert page.metadata["unchanged"] is False
+    assert page.content == "<p>Rewritten page</p>"
+
+
+@pytest.mark.asyncio
+async def test_unchanged_pages_are_not_reindexed(crawler):
+    await crawl_and_commit(crawler, URLS)
+    with patch.dict(PAGES, {"/plain": ("<p>Rewritten page</p>", {})}):
+        documents = [document async for document in documents_from_pages(crawler.crawl_stream(URLS))]
+
+    assert [document.metadata["url"] for document in documents] == [URLS[2]]
+
+
+@pytest.mark.asyncio
+async def test_uncommitted_pages_are_fetched_again(crawler):
+    await crawler.crawl_urls(URLS)
+    second = await crawler.crawl_urls(URLS)
+
+    assert not any(page.metadata["unchanged"] for page in second)
+    assert all(page.status_code == 200 for page in second)
+
+
+@pytest.mark.asyncio
+async def test_validators_are_not_sent_without_cached_body(crawler, cache):
+    await crawl_and_commit(crawler, [URLS[0]])
+    await cache.redis.delete(cache._get_key(URLS[0]))
+
+    page = await crawler.crawl_url(URLS[0])
+
+    assert "if-none-match" not in crawler.site.requests[-1].headers
+    assert page.status_code == 200
+    assert page.content == PAGES["/etag"][0]
+    assert page.metadata["unchanged"] is True
+
+
+@pytest.mark.asyncio
+async def test_not_modified_without_cached_body_is_fetched_again(crawler, cache):
+    await crawl_and_commit(crawler, [URLS[0]])
+    headers = await cache.conditional_headers(URLS[0])
+    await cache.redis.delete(cache._get_key(URLS[0]))
+
+    with patch.object(cache, "conditional_headers", AsyncMock(return_value=headers)):
+        page = await crawler.crawl_url(URLS[0])
+
+    assert [request.headers.get("if-none-match") for request in crawler.site.requests[-2:]] == ['"v1"', None]
+    assert page.status_code == 200
+    assert page.content == PAGES["/etag"][0]
+
+
+@pytest.mark.asyncio
+async def test_invalidate_forgets_validators(cache):
+    await cache.set(URLS[0], {"content": "body", "status_code": 200})
+    validators = await cache.revalidate(URLS[0], 200, {"etag": '"v1"'}, "body")
+    assert await cache.conditional_headers(URLS[0]) == {}
+    await cache.commit_validators(URLS[0], validators)
+    assert await cache.conditional_headers(URLS[0]) == {"If-None-Match": '"v1"'}
+
+    await cache.invalidate(URLS[0])
+
+    assert await cache.conditional_headers(URLS[0]) == {}
@@ -0,0 +1,104 @@
+"""Tests for chunk dedup in the crawler ingestion path."""
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from src.analytics.metrics.crawler_metrics import CrawlerMetrics
+from src.crawlers.dedup import Deduplicator, shingles
+from src.crawlers.rag_integration import Document, RAGProcessor
+from src.rag.embeddings import EmbeddingGenerator
+from src.rag.index import InMemoryIndex
+
+ARTICLE = (
+    "Synapse stores crawled pages in a vector index so the assistant can cite "
+    "them later. Each page is split into chunks, embedded and written in batches "
+    "while the crawler keeps fetching new pages in the background. Near-duplicate "
+    "chunks such as navigation bars, footers and cookie banners are dropped before "
+    "embedding, which keeps the index small and the embedding bill predictable for "
+    "large crawls that revisit the same site many times over several weeks."
+)
+FOOTER = "Home About Careers Contact Privacy Policy Terms of Service Cookie settings Copyright 2024 Synapse"
+
+
+def test_exact_duplicates_ignore_whitespace():
+    dedup = Deduplicator()
+
+    assert dedup.check(FOOTER) is None
+    assert dedup.check("  " + FOOTER.replace(" ", "\n ")) == "exact"
+    assert dedup.stats.exact == 1
+
+
+def test_near_duplicates_are_detected():
+    dedup = Deduplicator()
+    assert dedup.check(ARTICLE) is None
+
+    assert dedup.check(ARTICLE.replace("later", "afterwards")) == "near"
+    assert dedup.check("A completely different text about rate limiting and queues in crawlers.") is None
+    assert (dedup.stats.unique, dedup.stats.near, dedup.stats.skipped) == (2, 1, 1)
+
+
+def test_shingles_of_short_text():
+    assert len(shingles("two words")) == 1
+    assert shingles("") == set()
+
+
+def test_bands_must_divide_permutations():
+    with pytest.raises(ValueError):
+        Deduplicator(num_perm=100, bands=32)
+
+
+@pytest.mark.asyncio
+async def test_processor_skips_duplicates_before_embedding():
+    with patch("src.crawlers.rag_integration.CrawlerMetrics", return_value=AsyncMock(spec=CrawlerMetrics)):
+        processor = RAGProcessor(EmbeddingGenerator(), InMemoryIndex())
+
+    with patch.object(processor, "_generate_embeddings", AsyncMock(side_effect=lambda c: [[0.0]] * len(c))) as embed:
+        first = await processor.process_documents([Document(content=ARTICLE), Document(content=FOOTER)])
+        calls = embed.await_count
+        second = await processor.process_documents([
+            Document(content=FOOTER),
+            Document(content=ARTICLE.replace("later", "afterwards"))
+        ])
+
+    assert first["duplicates_skipped"] == {"exact": 0, "near": 0}
+    assert second["duplicates_skipped"] == {"exact": 1, "near": 1}
+    assert second["embeddings"] == 0
+    assert embed.await_count == calls
+
+
+def test_released_chunks_are_new_again():
+    dedup = Deduplicator()
+    kind, key = dedup.reserve(FOOTER)
+    assert (kind, dedup.reserve(FOOTER)[0]) == (None, "exact")
+
+    dedup.release([key])
+
+    assert dedup.check(FOOTER) is None
+    assert len(dedup) == 1
+
+
+def test_capacity_evicts_oldest_committed_chunks():
+    dedup = Deduplicator(capacity=2)
+    texts = [f"distinct chunk number {i} about a different topic entirely" for i in range(3)]
+    for text in texts:
+        assert dedup.check(text) is None
+
+    assert len(dedup) == 2
+    assert dedup.check(texts[0]) is None  # forgotten, so new again
+    assert dedup.check(texts[2]) == "exact"
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_not_deduplicated_on_retry():
+    with patch("src.crawlers.rag_integration.CrawlerMetrics", return_value=AsyncMock(spec=CrawlerMetrics)):
+        processor = RAGProcessor(EmbeddingGenerator(), InMemoryIndex())
+    documents = [Document(content=ARTICLE), Document(content=FOOTER)]
+
+    with patch.object(processor, "_generate_embeddings", AsyncMock(side_effect=RuntimeError("down"))):
+        failed = await processor.process_documents(documents)
+    with patch.object(processor, "_generate_embeddings", AsyncMock(side_effect=lambda c: [[1.0]] * len(c))):
+        retried = await processor.process_documents(documents)
+
+    assert failed["success"] is False
+    assert retried["duplicates_skipped"] == {"exact": 0, "near": 0}
+    assert retried["vectors"] == 2
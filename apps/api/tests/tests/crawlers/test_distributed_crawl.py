@@ -0,0 +1,240 @@
+"""Tests for crawl workers coordinating through a shared Redis frontier."""
+
+import asyncio
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+import pytest
+from unittest.mock import AsyncMock, patch
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from src.analytics.metrics.crawler_metrics import CrawlerMetrics
+from src.crawlers.benchmark import serve_fixture_site
+from src.crawlers.distributed import CrawlWorker, RedisFrontier, run_worker
+from src.crawlers.parallel_crawler import ParallelCrawler
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+PAGES = 40
+BASE = "https://docs.example.com"
+
+
+def site(request: httpx.Request) -> httpx.Response:
+    """Binary tree of PAGES linked pages, plus an off-site link on each."""
+    number = int(request.url.path.rsplit("/", 1)[-1] or 0)
+    children = [child for child in (2 * number + 1, 2 * number + 2) if child < PAGES]
+    links = "".join(f'<a href="/p/{child}#top">child</a>' for child in children)
+    return httpx.Response(200, headers={"content-type": "text/html"},
+                          text=f'<html><body><p>Page {number}</p>{links}<a href="https://elsewhere.org/">x</a></body></html>')
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def make_frontier(server, **kwargs):
+    kwargs.setdefault("allowed_hosts", ["docs.example.com"])
+    kwargs.setdefault("host_delay", 0)
+    kwargs.setdefault("poll_interval", 0.01)
+    with patch("src.crawlers.distributed.Redis.from_url", return_value=fakeredis.FakeAsyncRedis(server=server)):
+        return RedisFrontier("redis://localhost", "test", **kwargs)
+
+
+def make_worker(server, concurrency=3, handler=site, **kwargs):
+    with patch("src.crawlers.parallel_crawler.CrawlerMetrics", return_value=AsyncMock(spec=CrawlerMetrics)):
+        crawler = ParallelCrawler(concurrency=concurrency)
+    crawler.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return CrawlWorker(make_frontier(server, **kwargs), crawler, concurrency=concurrency,
+                       respect_robots=False, retry_backoff=0)
+
+
+async def crawl(worker, delay=0.0):
+    await asyncio.sleep(delay)
+    return [page.url async for page in worker.run()]
+
+
+@pytest.mark.asyncio
+async def test_workers_share_the_frontier_and_visit_each_page_once(server):
+    workers = [make_worker(server) for _ in range(3)]
+    await workers[0].frontier.push(f"{BASE}/p/0")
+
+    crawled = await asyncio.gather(*(crawl(worker) for worker in workers))
+
+    urls = [url for urls in crawled for url in urls]
+    assert sorted(urls) == sorted(f"{BASE}/p/{i}" for i in range(PAGES))
+    assert all(urls for urls in crawled)  # the work was spread out
+    assert await workers[0].frontier.stats() == {"queued": 0, "leased": 0, "claimed": PAGES, "seen": PAGES}
+
+
+@pytest.mark.asyncio
+async def test_workers_can_join_mid_crawl(server):
+    first = make_worker(server, concurrency=1, host_delay=0.01)
+    late = make_worker(server, concurrency=1, host_delay=0.01)
+    await first.frontier.push(f"{BASE}/p/0")
+
+    early, joined = await asyncio.gather(crawl(first), crawl(late, delay=0.1))
+
+    assert len(early) + len(joined) == PAGES
+    assert joined
+    assert not set(early) & set(joined)
+
+
+@pytest.mark.asyncio
+async def test_max_pages_is_shared_across_workers(server):
+    workers = [make_worker(server, max_pages=10) for _ in range(3)]
+    await workers[0].frontier.push(f"{BASE}/p/0")
+
+    crawled = await asyncio.gather(*(crawl(worker) for worker in workers))
+
+    assert sum(len(urls) for urls in crawled) == 10
+
+
+@pytest.mark.asyncio
+async def test_expired_leases_are_retried_then_dropped(server):
+    frontier = make_frontier(server, lease_timeout=0.05, max_attempts=2)
+    await frontier.push(f"{BASE}/p/0")
+
+    lease, _ = await frontier.claim()
+    assert await frontier.claim() == (None, 0.01)  # leased elsewhere, keep polling
+
+    await asyncio.sleep(0.06)  # the worker holding it died
+    retry, _ = await frontier.claim()
+    assert (retry.url, retry.attempts) == (lease.url, 1)
+    assert not await frontier.ack(lease)  # the stale lease no longer counts
+
+    await asyncio.sleep(0.06)
+    assert await frontier.claim() == (None, None)
+    assert (await frontier.stats())["claimed"] == 0
+
+
+@pytest.mark.asyncio
+async def test_nacked_leases_are_requeued_then_dropped(server):
+    frontier = make_frontier(server, max_attempts=2)
+    await frontier.push(f"{BASE}/p/0")
+
+    lease, _ = await frontier.claim()
+    assert await frontier.nack(lease)
+    retry, _ = await frontier.claim()
+    assert (retry.url, retry.attempts) == (lease.url, 1)
+    assert not await frontier.nack(lease)  # no longer held
+
+    assert not await frontier.nack(retry)
+    assert await frontier.claim() == (None, None)
+    assert await frontier.stats() == {"queued": 0, "leased": 0, "claimed": 0, "seen": 1}
+
+
+@pytest.mark.asyncio
+async def test_failed_fetches_are_retried_and_final_errors_acked(server):
+    requests = []
+
+    def flaky(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        if request.url.path == "/p/1" and requests.count("/p/1") == 1:
+            return httpx.Response(503)
+        if request.url.path == "/p/38":
+            return httpx.Response(500)
+        if request.url.path == "/p/39":
+            return httpx.Response(404)
+        return site(request)
+
+    worker = make_worker(server, handler=flaky, max_attempts=3)
+    await worker.frontier.push(f"{BASE}/p/0")
+
+    urls = await crawl(worker)
+
+    assert sorted(urls) == sorted(f"{BASE}/p/{i}" for i in range(PAGES) if i != 38)
+    assert (requests.count("/p/1"), requests.count("/p/38"), requests.count("/p/39")) == (2, 3, 1)
+    assert (await worker.frontier.stats())["leased"] == 0
+
+
+@pytest.mark.asyncio
+async def test_frontier_errors_are_retried_then_raised(server):
+    worker = make_worker(server, concurrency=1)
+    await worker.frontier.push(f"{BASE}/p/0")
+    claim = worker.frontier.claim
+    outage = [RedisConnectionError("down")] * 2
+
+    async def flaky_claim():
+        if outage:
+            raise outage.pop()
+        return await claim()
+
+    with patch.object(worker.frontier, "claim", flaky_claim):
+        assert len(await crawl(worker)) == PAGES
+
+    with patch.object(worker.frontier, "claim", AsyncMock(side_effect=RedisConnectionError("down"))):
+        with pytest.raises(RedisConnectionError):
+            await asyncio.wait_for(crawl(worker), timeout=5)
+
+
+@pytest.mark.asyncio
+async def test_renewed_leases_are_kept(server):
+    frontier = make_frontier(server, lease_timeout=0.05)
+    await frontier.push(f"{BASE}/p/0")
+    lease, _ = await frontier.claim()
+
+    for _ in range(3):
+        await asyncio.sleep(0.03)
+        assert await frontier.renew(lease)
+
+    assert (await frontier.claim())[0] is None
+    assert await frontier.ack(lease)
+    assert not await frontier.renew(lease)
+
+
+@pytest.mark.asyncio
+async def test_hosts_are_paced_independently(server):
+    frontier = make_frontier(server, allowed_hosts=None, host_delay=5)
+    await frontier.extend([f"{BASE}/a", f"{BASE}/b", "https://other.org/a"], depth=0)
+
+    first, _ = await frontier.claim()
+    second, _ = await frontier.claim()
+    blocked, wait = await frontier.claim()
+
+    assert {first.host, second.host} == {"docs.example.com", "other.org"}
+    assert blocked is None and 4 < wait <= 5
+
+    await frontier.set_host_delay("other.org", 30)
+    assert await frontier.redis.hget(frontier._key("delay"), "other.org") == b"30000"
+
+
+@pytest.mark.asyncio
+async def test_clear_removes_only_the_crawl(server):
+    frontier = make_frontier(server)
+    await frontier.redis.set("unrelated", 1)
+    await frontier.push(f"{BASE}/p/0")
+
+    await frontier.clear()
+
+    assert await frontier.redis.keys() == [b"unrelated"]
+
+
+def _redis_available(url):
+    import redis
+    try:
+        return redis.Redis.from_url(url, socket_connect_timeout=0.2).ping()
+    except redis.RedisError:
+        return False
+
+
+@pytest.mark.integration
+def test_worker_processes_against_local_redis():
+    redis_url = "redis://localhost:6379/15"
+    if not _redis_available(redis_url):
+        pytest.skip("no local Redis")
+    crawl_id = uuid.uuid4().hex
+
+    with serve_fixture_site(words=50, links=3) as base_url, ProcessPoolExecutor(3) as pool:
+        futures = [
+            pool.submit(run_worker, redis_url, crawl_id, [f"{base_url}/page/0"], 4, 60, 0.0)
+            for _ in range(3)
+        ]
+        crawled = [future.result(timeout=60) for future in futures]
+
+    urls = [url for urls in crawled for url in urls]
+    assert len(urls) == len(set(urls)) == 60
+    assert sum(1 for urls in crawled if urls) > 1
+    asyncio.run(RedisFrontier(redis_url, crawl_id).clear())
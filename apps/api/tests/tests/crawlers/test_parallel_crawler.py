@@ -1,7 +1,9 @@
 """Tests for the parallel crawler module."""
 
+import asyncio
 import pytest
-from unittest.mock import Mock, AsyncMock, patch
+from contextlib import asynccontextmanager
+from unittest.mock import Mock, AsyncMock, patch, call
 from datetime import datetime
 from httpx import Response
 from src.crawlers.parallel_crawler import ParallelCrawler, WebContent
@@ -12,13 +14,26 @@ def mock_metrics():
     metrics = Mock()
     metrics.track_crawl = AsyncMock()
     metrics.track_error = AsyncMock()
-    metrics.set_active_crawls = AsyncMock()
+    metrics.add_active_crawls = AsyncMock()
     return metrics
 
+def _stream_from_get(client):
+    """Serve ``client.stream`` from the ``client.get`` mock, so tests keep configuring ``get``."""
+    @asynccontextmanager
+    async def stream(method, url, headers=None):
+        response = await (client.get(url, headers=headers) if headers else client.get(url))
+
+        async def chunks():
+            yield response.content
+        response.aiter_bytes = chunks
+        yield response
+    return stream
+
 @pytest.fixture
 def mock_client():
     client = Mock()
     client.get = AsyncMock()
+    client.stream = _stream_from_get(client)
     client.aclose = AsyncMock()
     return client
 
@@ -84,7 +99,7 @@ async def test_crawl_urls_parallel(crawler, mock_client, mock_metrics):
 
     assert len(results) == 2
     assert all(isinstance(r, WebContent) for r in results)
-    mock_metrics.set_active_crawls.assert_awaited_once_with(2)
+    assert mock_metrics.add_active_crawls.await_args_list == [call(2), call(-2)]
     assert mock_client.get.await_count == 2
 
 @pytest.mark.asyncio
@@ -136,4 +151,81 @@ async def test_metrics_integration(crawler, mock_client, mock_metrics):
     assert args["url"] == url
     assert args["status"] == 200
     assert isinstance(args["duration"], float)
-    assert args["size"] == len(b"Test content") 
\ No newline at end of file
+    assert args["size"] == len(b"Test content") 
+def _slow_get(active, peak, delay=0.01):
+    """Fake client.get recording peak concurrency overall and per host."""
+    async def get(url):
+        host = url.split("/")[2]
+        active[host] = active.get(host, 0) + 1
+        peak["total"] = max(peak.get("total", 0), sum(active.values()))
+        peak[host] = max(peak.get(host, 0), active[host])
+        await asyncio.sleep(delay)
+        active[host] -= 1
+        response = Mock(spec=Response)
+        response.text = url
+        response.status_code = 200
+        response.headers = {}
+        response.content = url.encode()
+        return response
+    return get
+
+@pytest.mark.asyncio
+async def test_global_and_per_host_limits(mock_metrics, mock_client):
+    with patch("src.crawlers.parallel_crawler.CrawlerMetrics", return_value=mock_metrics), \
+         patch("src.crawlers.parallel_crawler.httpx.AsyncClient", return_value=mock_client):
+        crawler = ParallelCrawler(concurrency=4, per_host_limit=1)
+    peak = {}
+    mock_client.get.side_effect = _slow_get({}, peak)
+    urls = [f"https://host{i % 3}.com/page{i}" for i in range(30)]
+
+    results = await crawler.crawl_urls(urls)
+
+    assert sorted(r.url for r in results) == sorted(urls)
+    assert peak["total"] == 3  # one per host, even with four workers
+    assert all(peak[f"host{i}.com"] == 1 for i in range(3))
+    assert not crawler.hosts._semaphores
+
+@pytest.mark.asyncio
+async def test_stream_consumes_input_lazily(crawler, mock_client):
+    mock_client.get.side_effect = _slow_get({}, {}, delay=0)
+    consumed = 0
+
+    def urls():
+        nonlocal consumed
+        for i in range(100_000):
+            consumed += 1
+            yield f"https://example.com/{i}"
+
+    received = []
+    async for page in crawler.crawl_stream(urls()):
+        received.append(page)
+        if len(received) == 5:
+            break
+
+    assert consumed < 20  # bounded by the queues, not the input size
+    await asyncio.sleep(0)
+    assert mock_client.get.await_count < 20
+
+@pytest.mark.asyncio
+async def test_stream_accepts_async_iterables(crawler, mock_client):
+    mock_client.get.side_effect = _slow_get({}, {}, delay=0)
+
+    async def urls():
+        for i in range(7):
+            yield f"https://example.com/{i}"
+
+    pages = [page async for page in crawler.crawl_stream(urls())]
+
+    assert len(pages) == 7
+
+@pytest.mark.asyncio
+async def test_stream_propagates_input_errors(crawler, mock_client):
+    mock_client.get.side_effect = _slow_get({}, {}, delay=0)
+
+    def urls():
+        yield "https://example.com/1"
+        raise RuntimeError("bad input")
+
+    with pytest.raises(RuntimeError):
+        async for _ in crawler.crawl_stream(urls()):
+            pass
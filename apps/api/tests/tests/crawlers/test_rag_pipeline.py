@@ -0,0 +1,72 @@
+"""Tests for the streaming chunk/embed/store pipeline in RAGProcessor."""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from src.analytics.metrics.crawler_metrics import CrawlerMetrics
+from src.crawlers.benchmark import fixture_page, run_pipeline_benchmark
+from src.crawlers.dedup import Deduplicator
+from src.crawlers.rag_integration import Document, RAGProcessor
+from src.rag.chunking import TextChunker
+from src.rag.embeddings import EmbeddingGenerator
+from src.rag.index import InMemoryIndex
+
+
+@pytest.fixture
+def processor():
+    with patch("src.crawlers.rag_integration.CrawlerMetrics", return_value=AsyncMock(spec=CrawlerMetrics)):
+        yield RAGProcessor(EmbeddingGenerator(), InMemoryIndex(), chunker=TextChunker(chunk_size=200, chunk_overlap=20), embed_batch_size=8, queue_size=4)
+
+
+@pytest.mark.asyncio
+async def test_stages_overlap_with_the_input_stream(processor):
+    stored_while_streaming = []
+
+    async def documents():
+        for i in range(40):
+            stored_while_streaming.append(len(processor.index))
+            yield Document(content=fixture_page(i, words=60), metadata={"page": i})
+            await asyncio.sleep(0)
+
+    result = await processor.process_documents(documents())
+
+    assert result["success"] is True
+    assert result["chunks"] > result["documents"] == 40
+    assert result["vectors"] == result["embeddings"] == len(processor.index)
+    assert stored_while_streaming[-1] > 0  # upserts started before the input ended
+    assert result["stages"]["embed"]["batches"] > 1
+    assert all(stats["throughput"] > 0 for stats in result["stages"].values())
+
+
+@pytest.mark.asyncio
+async def test_queue_depth_is_reported(processor):
+    await processor.process_documents([Document(content=fixture_page(i)) for i in range(5)])
+
+    queues = {call.args[0] for call in processor.metrics.set_queue_depth.await_args_list}
+    assert queues == {"chunks", "vectors"}
+    assert all(call.args[1] <= processor.queue_size for call in processor.metrics.set_queue_depth.await_args_list)
+
+
+@pytest.mark.asyncio
+async def test_failing_stage_stops_the_pipeline(processor):
+    processor.embedder.generate_batch = AsyncMock(side_effect=RuntimeError("embedding service down"))
+    documents = [Document(content=fixture_page(i)) for i in range(50)]
+
+    result = await asyncio.wait_for(processor.process_documents(documents), 5)
+
+    assert result == {"success": False, "error": "embedding service down"}
+    assert len(processor.index) == 0
+
+
+@pytest.mark.asyncio
+async def test_end_to_end_benchmark_against_fixture_server():
+    with patch("src.crawlers.rag_integration.CrawlerMetrics", return_value=AsyncMock(spec=CrawlerMetrics)), \
+         patch("src.crawlers.parallel_crawler.CrawlerMetrics", return_value=AsyncMock(spec=CrawlerMetrics)):
+        processor = RAGProcessor(EmbeddingGenerator(), InMemoryIndex(), deduplicator=Deduplicator(threshold=0.95))
+        benchmark = await run_pipeline_benchmark(pages=30, concurrency=4, words=300, processor=processor)
+
+    assert benchmark.pages == 30
+    assert benchmark.result["vectors"] == len(processor.index) > 0
+    assert benchmark.pages_per_second > 0
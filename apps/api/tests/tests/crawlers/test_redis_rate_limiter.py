@@ -0,0 +1,79 @@
+"""Tests for the Lua sliding-window rate limiter shared by crawler workers."""
+
+import asyncio
+
+import pytest
+from unittest.mock import patch
+
+from src.crawlers.rate_limiter import RateLimitConfig, RateLimiter
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def make_limiter(server, **config):
+    with patch("src.crawlers.rate_limiter.Redis.from_url", return_value=fakeredis.FakeAsyncRedis(server=server)):
+        return RateLimiter("redis://localhost", RateLimitConfig(**config))
+
+
+@pytest.mark.asyncio
+async def test_concurrent_checks_in_the_same_second_are_all_counted(server):
+    limiters = [make_limiter(server, max_requests_per_domain=10, requests_per_second=100) for _ in range(4)]
+
+    results = await asyncio.gather(*(limiters[i % 4].check_rate_limit("example.com") for i in range(25)))
+
+    assert sum(results) == 10
+    assert await limiters[0].redis.zcard("rate:domain:example.com") == 10
+
+
+@pytest.mark.asyncio
+async def test_acquire_many_grants_per_domain_and_global_budgets(server):
+    limiter = make_limiter(server, max_requests_per_domain=3, requests_per_second=1, cooldown_period=5)
+    domains = ["a.com"] * 5 + ["b.com"] * 2 + ["c.com"] + ["d.com"] * 4
+
+    granted = await limiter.acquire_many(domains)
+
+    assert granted == {"a.com": 3, "b.com": 2, "c.com": 0, "d.com": 0}
+    assert await limiter.acquire_many(["b.com"]) == {"b.com": 0}
+    assert await limiter.acquire_many([]) == {}
+
+
+@pytest.mark.asyncio
+async def test_denied_requests_do_not_consume_the_window(server):
+    limiter = make_limiter(server, max_requests_per_domain=2)
+
+    assert [await limiter.check_rate_limit("a.com") for _ in range(5)] == [True, True, False, False, False]
+    assert await limiter.redis.zcard("rate:domain:a.com") == 2
+
+
+@pytest.mark.asyncio
+async def test_window_slides(server):
+    limiter = make_limiter(server, max_requests_per_domain=2, cooldown_period=1)
+    assert await limiter.acquire_many(["a.com", "a.com"]) == {"a.com": 2}
+    assert not await limiter.check_rate_limit("a.com")
+
+    await asyncio.sleep(1.05)
+
+    assert await limiter.check_rate_limit("a.com")
+    assert 0 < await limiter.redis.pttl("rate:domain:a.com") <= 1000
+
+
+@pytest.mark.asyncio
+async def test_each_check_is_one_round_trip(server):
+    limiter = make_limiter(server)
+    await limiter.check_rate_limit("warmup.com")  # first use loads the script
+
+    with patch.object(limiter.redis, "evalsha", wraps=limiter.redis.evalsha) as evalsha, \
+         patch.object(limiter.redis, "pipeline") as pipeline, \
+         patch.object(limiter.redis, "expire") as expire:
+        await limiter.check_rate_limit("a.com")
+        await limiter.acquire_many(["a.com", "b.com", "c.com"])
+
+    assert evalsha.call_count == 2
+    pipeline.assert_not_called()
+    expire.assert_not_called()
@@ -0,0 +1,119 @@
+"""Tests for the non-blocking Supabase access layer."""
+
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock, AsyncMock
+
+from src.db.async_client import AsyncSupabase
+
+
+class SlowQuery:
+    """Blocking query that records the thread it ran on."""
+
+    def __init__(self, delay=0.05, data=None):
+        self.delay = delay
+        self.data = data or []
+        self.thread = None
+
+    def execute(self):
+        self.thread = threading.current_thread()
+        time.sleep(self.delay)
+        return MagicMock(data=self.data)
+
+
+@pytest.mark.asyncio
+async def test_sync_queries_run_off_the_event_loop():
+    """Blocking execute() calls run on the pool and overlap."""
+    db = AsyncSupabase(MagicMock())
+    queries = [SlowQuery(delay=0.1) for _ in range(5)]
+
+    started = time.monotonic()
+    await db.execute_many(queries)
+
+    assert time.monotonic() - started < 0.4
+    assert all(q.thread is not threading.main_thread() for q in queries)
+
+
+@pytest.mark.asyncio
+async def test_native_async_queries_are_awaited():
+    """Queries from an async client are awaited directly."""
+    db = AsyncSupabase(MagicMock())
+    query = MagicMock()
+    query.execute = AsyncMock(return_value=MagicMock(data=[1]))
+
+    result = await db.execute(query)
+
+    assert result.data == [1]
+
+
+@pytest.mark.asyncio
+async def test_execute_times_out():
+    """Slow requests raise TimeoutError without blocking the caller."""
+    db = AsyncSupabase(MagicMock(), timeout=0.01)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await db.execute(SlowQuery(delay=0.2))
+
+
+@pytest.mark.asyncio
+async def test_concurrent_inserts_are_batched():
+    """Inserts into the same table within the window share one request."""
+    client = MagicMock()
+    client.table.return_value.insert.side_effect = lambda rows: SlowQuery(delay=0, data=rows)
+    db = AsyncSupabase(client, batch_window=0.01)
+
+    results = await asyncio.gather(*(db.insert("crawls", {"n": i}) for i in range(10)))
+
+    assert client.table.return_value.insert.call_count == 1
+    assert [row["n"] for row in results] == list(range(10))
+
+
+@pytest.mark.asyncio
+async def test_batched_insert_failure_reaches_every_caller():
+    """A failed batch raises in each waiting caller."""
+    client = MagicMock()
+    client.table.return_value.insert.side_effect = RuntimeError("boom")
+    db = AsyncSupabase(client)
+
+    results = await asyncio.gather(
+        db.insert("crawls", {"n": 1}),
+        db.insert("crawls", {"n": 2}),
+        return_exceptions=True
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_timed_out_request_keeps_its_slot(monkeypatch):
+    """A timed-out request holds its pool slot until the thread finishes."""
+    from src.db import async_client
+
+    slots = asyncio.Semaphore(1)
+    monkeypatch.setattr(async_client, "_get_slots", lambda: slots)
+    db = AsyncSupabase(MagicMock(), timeout=0.01)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await db.execute(SlowQuery(delay=0.1))
+    assert slots.locked()
+
+    await db.execute(SlowQuery(delay=0), timeout=1)
+    assert not slots.locked()
+
+
+@pytest.mark.asyncio
+async def test_pending_flush_tasks_are_referenced():
+    """Batch flush tasks stay referenced until they complete."""
+    client = MagicMock()
+    client.table.return_value.insert.side_effect = lambda rows: SlowQuery(delay=0.05, data=rows)
+    db = AsyncSupabase(client, batch_window=0)
+
+    insert = asyncio.ensure_future(db.insert("crawls", {"n": 1}))
+    await asyncio.sleep(0.01)
+    assert len(db._flushes) == 1
+
+    await insert
+    await asyncio.sleep(0)
+    assert not db._flushes
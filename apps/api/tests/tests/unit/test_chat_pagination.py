@@ -0,0 +1,183 @@
+"""Tests for keyset pagination and the Supabase flush in ChatService."""
+
+import pytest
+from unittest.mock import patch
+from types import SimpleNamespace
+
+from src.services.chat_service import ChatService
+
+
+class FakeQuery:
+    """Minimal in-memory stand-in for the Supabase query builder."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+        self.next_seq = max((row["seq"] for row in rows), default=-1) + 1
+
+    def table(self, name):
+        self.filters = []
+        self._order = None
+        self._limit = None
+        return self
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row[column] == value)
+        return self
+
+    def lt(self, column, value):
+        self.filters.append(lambda row: row[column] < value)
+        return self
+
+    def order(self, column, desc=False):
+        self._order = (column, desc)
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def rpc(self, name, params):
+        assert name == "next_message_seq"
+        seq, self.next_seq = self.next_seq, self.next_seq + 1
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=seq))
+
+    def execute(self):
+        rows = [row for row in self.rows if all(f(row) for f in self.filters)]
+        column, desc = self._order
+        rows.sort(key=lambda row: row[column], reverse=desc)
+        self.calls.append(self._limit)
+        return SimpleNamespace(data=rows[:self._limit])
+
+
+def make_rows(session_id, count):
+    return [
+        {"id": f"m{seq}", "seq": seq, "session_id": session_id,
+         "content": str(seq), "role": "user", "status": "sent", "metadata": {}}
+        for seq in range(count)
+    ]
+
+
+@pytest.fixture
+def fake_db():
+    return FakeQuery(make_rows("s1", 120))
+
+
+@pytest.fixture
+def chat_service(fake_db):
+    with patch("src.services.chat_service.create_client", return_value=fake_db), \
+         patch.object(ChatService, "_start_persistence_worker"):
+        yield ChatService("http://localhost", "key")
+
+
+@pytest.mark.asyncio
+async def test_pages_walk_history_without_gaps(chat_service):
+    """Consecutive pages cover the full history exactly once, newest first."""
+    seen = []
+    cursor = None
+    while True:
+        page = await chat_service.get_session_messages("s1", limit=50, before_seq=cursor)
+        if not page:
+            break
+        seen.extend(m["seq"] for m in page)
+        cursor = page[-1]["seq"]
+
+    assert seen == list(range(119, -1, -1))
+
+
+@pytest.mark.asyncio
+async def test_cache_miss_does_not_truncate_history(chat_service, fake_db):
+    """A first page fetch must not hide older messages from later pages."""
+    first = await chat_service.get_session_messages("s1", limit=10)
+    second = await chat_service.get_session_messages("s1", limit=10, before_seq=first[-1]["seq"])
+
+    assert [m["seq"] for m in first] == list(range(119, 109, -1))
+    assert [m["seq"] for m in second] == list(range(109, 99, -1))
+
+
+@pytest.mark.asyncio
+async def test_cached_pages_do_not_query_supabase(chat_service, fake_db):
+    """Pages inside the cached window are served from memory."""
+    await chat_service.get_session_messages("s1", limit=50)
+    calls = len(fake_db.calls)
+
+    page = await chat_service.get_session_messages("s1", limit=20, before_seq=110)
+
+    assert len(fake_db.calls) == calls
+    assert [m["seq"] for m in page] == list(range(109, 89, -1))
+
+
+@pytest.mark.asyncio
+async def test_new_messages_continue_sequence(chat_service):
+    """Messages added to a cold session continue after the persisted tail."""
+    message = await chat_service.add_message("s1", "hello")
+    page = await chat_service.get_session_messages("s1", limit=2)
+
+    assert message["seq"] == 120
+    assert [m["seq"] for m in page] == [120, 119]
+
+
+@pytest.mark.asyncio
+async def test_far_cursor_queries_supabase_once(chat_service, fake_db):
+    """A cursor far below the cached window costs one query of ``limit`` rows."""
+    await chat_service.get_session_messages("s1", limit=10)
+    calls = len(fake_db.calls)
+
+    page = await chat_service.get_session_messages("s1", limit=10, before_seq=30)
+
+    assert fake_db.calls[calls:] == [10]
+    assert [m["seq"] for m in page] == list(range(29, 19, -1))
+
+
+@pytest.mark.asyncio
+async def test_seq_comes_from_database_sequence(fake_db):
+    """Workers sharing the database never hand out the same seq twice."""
+    with patch("src.services.chat_service.create_client", return_value=fake_db), \
+         patch.object(ChatService, "_start_persistence_worker"):
+        workers = [ChatService("http://localhost", "key") for _ in range(2)]
+
+    seqs = [
+        (await workers[i % 2].add_message("s2", str(i)))["seq"]
+        for i in range(4)
+    ]
+
+    assert seqs == [120, 121, 122, 123]
+    assert fake_db.calls == []
+
+
+@pytest.mark.asyncio
+async def test_rows_marked_dirty_during_upsert_are_kept(chat_service):
+    """A message added while the flush awaits Supabase is written by the next flush."""
+    written = []
+
+    async def persist(table, rows):
+        if not written:
+            await chat_service.add_message("s2", "during flush")
+        written.append((table, {row["session_id"] for row in rows}))
+
+    await chat_service.add_message("s1", "before flush")
+    with patch.object(chat_service, "_persist_rows", side_effect=persist):
+        await chat_service._persist_dirty_data()
+        assert chat_service._dirty_messages == {"s2"}
+        await chat_service._persist_dirty_data()
+
+    assert written == [("messages", {"s1"}), ("messages", {"s2"})]
+    assert chat_service._dirty_messages == set()
+
+
+@pytest.mark.asyncio
+async def test_failed_upsert_keeps_rows_dirty(chat_service):
+    """Rows from a failed flush are merged back with those marked since."""
+    await chat_service.add_message("s1", "hello")
+
+    async def fail(table, rows):
+        await chat_service.add_message("s2", "during flush")
+        raise RuntimeError("down")
+
+    with patch.object(chat_service, "_persist_rows", side_effect=fail):
+        await chat_service._persist_dirty_data()
+
+    assert chat_service._dirty_messages == {"s1", "s2"}
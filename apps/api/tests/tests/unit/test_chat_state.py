@@ -0,0 +1,193 @@
+"""Tests for the shared Redis chat state."""
+
+import asyncio
+import pytest
+from unittest.mock import patch
+
+from src.services.chat_state import RedisChatState
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def redis_server():
+    return fakeredis.FakeServer()
+
+
+def make_state(server, **kwargs):
+    client = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+    with patch("src.services.chat_state.Redis.from_url", return_value=client):
+        return RedisChatState("redis://localhost", **kwargs)
+
+
+def make_message(session_id, index):
+    return {
+        "id": f"m{index}",
+        "session_id": session_id,
+        "content": str(index),
+        "role": "user",
+        "status": "sent",
+        "metadata": {},
+        "created_at": "2024-01-01T00:00:00"
+    }
+
+
+@pytest.mark.asyncio
+async def test_workers_share_seq_and_messages(redis_server):
+    """Messages appended by one worker are visible to another in order."""
+    first, second = make_state(redis_server), make_state(redis_server)
+    await first.init_seq("s1", 5)
+
+    seqs = [
+        await (first if i % 2 else second).append_message(make_message("s1", i))
+        for i in range(4)
+    ]
+    page, oldest = await second.get_messages("s1", limit=3)
+
+    assert seqs == [5, 6, 7, 8]
+    assert [m["seq"] for m in page] == [8, 7, 6]
+    assert oldest == 5
+
+
+@pytest.mark.asyncio
+async def test_keyset_pages_and_status_overlay(redis_server):
+    """Status updates overlay stream entries and filters walk past them."""
+    state = make_state(redis_server)
+    for i in range(10):
+        await state.append_message(make_message("s1", i))
+    await state.update_message("m8", {"status": "read"})
+
+    page, _ = await state.get_messages("s1", limit=4, before_seq=9)
+    read, _ = await state.get_messages("s1", limit=4, status="read")
+
+    assert [m["seq"] for m in page] == [8, 7, 6, 5]
+    assert page[0]["status"] == "read"
+    assert [m["id"] for m in read] == ["m8"]
+
+
+@pytest.mark.asyncio
+async def test_single_flusher_drains_once(redis_server):
+    """Only the lease holder flushes, and each message is persisted once."""
+    first, second = make_state(redis_server), make_state(redis_server)
+    for i in range(3):
+        await first.append_message(make_message("s1", i))
+    await first.save_session({"id": "s1", "user_id": "u1", "status": "active"})
+
+    persisted = []
+
+    async def persist(table, rows):
+        persisted.append((table, [row["id"] for row in rows]))
+
+    async def update(table, row_id, fields):
+        persisted.append((table, row_id, fields))
+
+    assert await first.acquire_flusher_lease()
+    assert not await second.acquire_flusher_lease()
+
+    await first.flush(persist, update)
+    await first.flush(persist, update)
+
+    assert persisted == [("chat_sessions", ["s1"]), ("messages", ["m0", "m1", "m2"])]
+
+
+@pytest.mark.asyncio
+async def test_flushed_entries_are_trimmed(redis_server):
+    """The hot stream keeps at most max_stream_length flushed messages."""
+    state = make_state(redis_server, max_stream_length=2)
+    for i in range(5):
+        await state.append_message(make_message("s1", i))
+
+    async def persist(table, rows):
+        pass
+
+    await state.flush(persist, persist)
+    page, oldest = await state.get_messages("s1", limit=10)
+
+    assert [m["seq"] for m in page] == [4, 3]
+    assert oldest == 3
+
+
+@pytest.mark.asyncio
+async def test_update_message_returns_full_message(redis_server):
+    """Overlay updates return the merged message, not just the changed fields."""
+    state = make_state(redis_server)
+    await state.append_message(make_message("s1", 0))
+
+    await state.update_message("m0", {"status": "delivered"})
+    message = await state.update_message("m0", {"metadata": {"read": True}})
+
+    assert message["content"] == "0"
+    assert message["seq"] == 0
+    assert (message["status"], message["metadata"]) == ("delivered", {"read": True})
+
+
+@pytest.mark.asyncio
+async def test_update_session_keeps_concurrent_fields(redis_server):
+    """Each update writes only its own fields, so interleaved updates both land."""
+    first, second = make_state(redis_server), make_state(redis_server)
+    await first.save_session({"id": "s1", "user_id": "u1", "status": "active", "title": "a"})
+
+    await asyncio.gather(
+        first.update_session("s1", {"status": "archived"}),
+        second.update_session("s1", {"title": "b"})
+    )
+    session = await first.update_session("s1", {"last_message_at": "2024-01-02T00:00:00"})
+
+    assert (session["status"], session["title"]) == ("archived", "b")
+    assert await first.update_session("missing", {"title": "c"}) is None
+    assert await first.redis.zrange("chat:user:u1:sessions", 0, -1) == ["s1"]
+
+
+@pytest.mark.asyncio
+async def test_trim_and_delete_prune_message_lookups(redis_server):
+    """Trimmed and deleted messages leave no message_session or overlay entries."""
+    state = make_state(redis_server, max_stream_length=2)
+    for i in range(5):
+        await state.append_message(make_message("s1", i))
+        await state.append_message(make_message("s2", 10 + i))
+    await state.update_message("m0", {"status": "read"})
+    await state.update_message("m4", {"status": "read"})
+
+    updated = []
+
+    async def persist(table, rows):
+        pass
+
+    async def update(table, row_id, fields):
+        updated.append(row_id)
+
+    await state.flush(persist, update)
+
+    assert sorted(updated) == ["m0", "m4"]
+    assert await state.redis.hkeys("chat:updates:s1") == ["m4"]
+    assert sorted(await state.redis.hkeys("chat:message_session")) == ["m13", "m14", "m3", "m4"]
+    assert await state.update_message("m0", {"status": "sent"}) is None
+
+    await state.delete_session("s1")
+
+    assert sorted(await state.redis.hkeys("chat:message_session")) == ["m13", "m14"]
+
+
+@pytest.mark.asyncio
+async def test_sessions_created_before_hydration_do_not_hide_persisted_ones(redis_server):
+    """A session created first still leaves the user to be loaded from Supabase."""
+    state = make_state(redis_server)
+    new = {"id": "s3", "user_id": "u1", "status": "active", "title": "new",
+           "last_message_at": "2024-01-03T00:00:00"}
+    await state.save_session(new)
+
+    assert await state.get_sessions("u1") is None
+
+    persisted = [
+        {"id": "s3", "user_id": "u1", "status": "active", "title": "stale",
+         "last_message_at": "2024-01-01T00:00:00"},
+        {"id": "s2", "user_id": "u1", "status": "active", "title": "older",
+         "last_message_at": "2024-01-02T00:00:00"},
+        {"id": "s1", "user_id": "u1", "status": "archived", "title": "oldest",
+         "last_message_at": "2024-01-01T00:00:00"},
+    ]
+    await state.cache_sessions("u1", persisted)
+    sessions = await state.get_sessions("u1")
+
+    assert [s["id"] for s in sessions] == ["s3", "s2", "s1"]
+    assert sessions[0]["title"] == "new"
@@ -0,0 +1,127 @@
+"""Tests for ConversationMemory consolidation."""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+
+from src.core.memory import ConversationMemory
+
+
+@pytest.fixture
+def vector_store():
+    store = AsyncMock()
+    store.add_document = AsyncMock()
+    return store
+
+
+def test_working_set_is_bounded():
+    """Only the most recent max_history turns stay in the buffer."""
+    memory = ConversationMemory(max_history=3)
+    for i in range(10):
+        memory.add_memory(f"message {i}")
+
+    assert [m["message"] for m in memory.get_history()] == ["message 7", "message 8", "message 9"]
+    assert [m["message"] for m in memory.get_history(limit=2)] == ["message 8", "message 9"]
+
+
+def test_search_uses_index_and_forgets_evicted_turns():
+    """Search matches all query terms and ignores evicted turns."""
+    memory = ConversationMemory(max_history=2)
+    memory.add_memory("deploy the python service")
+    memory.add_memory("python tests are green")
+    memory.add_memory("deploy finished")
+
+    assert [m["message"] for m in memory.search("Python")] == ["python tests are green"]
+    assert memory.search("deploy python") == []
+    assert memory.search("") == []
+
+
+def test_search_ranks_by_importance():
+    """More important turns are returned first."""
+    memory = ConversationMemory()
+    memory.add_memory("note about redis", {"importance": 0.1})
+    memory.add_memory("decision about redis", {"importance": 0.9})
+
+    assert [m["message"] for m in memory.search("redis", limit=1)] == ["decision about redis"]
+
+
+@pytest.mark.asyncio
+async def test_salient_turns_are_promoted(vector_store):
+    """Evicted turns above the threshold go to the vector store, the rest are dropped."""
+    memory = ConversationMemory(max_history=1, vector_store=vector_store, promote_threshold=0.5)
+    memory.add_memory("small talk", {"importance": 0.1})
+    memory.add_memory("user prefers FastAPI", {"importance": 0.9})
+    memory.add_memory("latest turn", {"importance": 0.1})
+
+    assert await memory.consolidate() == 1
+    content, metadata = vector_store.add_document.call_args.args
+    assert content == "user prefers FastAPI"
+    assert metadata["importance"] == 0.9
+    assert "timestamp" in metadata
+
+
+@pytest.mark.asyncio
+async def test_importance_decays_over_time(vector_store):
+    """Old turns lose importance and are evicted without promotion."""
+    memory = ConversationMemory(
+        max_history=1, vector_store=vector_store, half_life=1e-9, promote_threshold=0.5
+    )
+    memory.add_memory("stale decision", {"importance": 1.0})
+    memory.add_memory("latest turn")
+
+    assert await memory.consolidate() == 0
+
+
+@pytest.mark.asyncio
+async def test_full_promotion_queue_consolidates(vector_store):
+    """Reaching max_pending_promotions consolidates instead of dropping turns."""
+    memory = ConversationMemory(max_history=1, vector_store=vector_store, max_pending_promotions=2)
+    for i in range(6):
+        memory.add_memory(f"decision {i}", {"importance": 1.0})
+    await asyncio.sleep(0)
+
+    await memory.end_session()
+
+    contents = [call.args[0] for call in vector_store.add_document.call_args_list]
+    assert contents == [f"decision {i}" for i in range(6)]
+    assert memory.get_history() == []
+
+
+@pytest.mark.asyncio
+async def test_failed_promotion_is_retried(vector_store):
+    """A turn that fails to reach the vector store stays queued."""
+    vector_store.add_document.side_effect = [RuntimeError("down"), None]
+    memory = ConversationMemory(max_history=1, vector_store=vector_store, promote_threshold=0.5)
+    memory.add_memory("user prefers FastAPI", {"importance": 0.9})
+    memory.add_memory("latest turn", {"importance": 0.1})
+
+    with pytest.raises(RuntimeError):
+        await memory.consolidate()
+    assert await memory.consolidate() == 1
+
+
+def test_promotion_queue_is_bounded_without_event_loop(vector_store):
+    """Without a loop to consolidate, the oldest promotions are dropped and counted."""
+    memory = ConversationMemory(max_history=1, vector_store=vector_store,
+                                max_pending_promotions=2, max_queued_promotions=4)
+    for i in range(11):
+        memory.add_memory(f"decision {i}", {"importance": 1.0})
+
+    assert len(memory._pending_promotions) == 4
+    assert memory.dropped_promotions == 6
+    assert [m["message"] for m in memory._pending_promotions] == [f"decision {i}" for i in range(6, 10)]
+
+
+@pytest.mark.asyncio
+async def test_failing_store_backs_off_and_stays_bounded(vector_store):
+    """A failing vector store neither grows the queue nor is retried on every turn."""
+    vector_store.add_document.side_effect = RuntimeError("down")
+    memory = ConversationMemory(max_history=1, vector_store=vector_store,
+                                max_pending_promotions=2, max_queued_promotions=4)
+    for i in range(50):
+        memory.add_memory(f"decision {i}", {"importance": 1.0})
+        await asyncio.sleep(0)
+
+    assert vector_store.add_document.await_count == 1
+    assert len(memory._pending_promotions) == 4
+    assert memory.dropped_promotions == 45
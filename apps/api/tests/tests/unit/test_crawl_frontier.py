@@ -0,0 +1,88 @@
+"""Tests for the crawl frontier, URL normalization and robots cache."""
+
+import pytest
+from unittest.mock import AsyncMock
+
+from src.crawler.frontier import BloomFilter, Frontier, ScalableBloomFilter, normalize_url
+from src.crawler.robots import RobotsCache
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("HTTP://Example.COM", "http://example.com/"),
+    ("https://example.com:443/a/./b/../c?b=2&a=1#top", "https://example.com/a/c?a=1&b=2"),
+    ("http://example.com:8080/docs/?utm_source=x&q=1", "http://example.com:8080/docs/?q=1"),
+    ("mailto:someone@example.com", None),
+    ("javascript:void(0)", None),
+])
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+def test_normalize_relative_links():
+    assert normalize_url("../b#frag", "https://example.com/a/page") == "https://example.com/b"
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"https://example.com/{i}")
+
+    assert all(f"https://example.com/{i}" in bloom for i in range(1000))
+    false_positives = sum(f"https://other.com/{i}" in bloom for i in range(10_000))
+    assert false_positives < 300
+
+
+def test_scalable_bloom_filter_grows_within_error_rate():
+    seen = ScalableBloomFilter(initial_capacity=1000, error_rate=0.01)
+    added = sum(seen.add(f"https://example.com/{i}") for i in range(20_000))
+
+    assert len(seen.filters) > 1
+    assert added > 19_800
+    assert not seen.add("https://example.com/5")
+    false_positives = sum(f"https://other.com/{i}" in seen for i in range(10_000))
+    assert false_positives < 150  # ~1% target plus sampling noise
+    assert seen.nbytes < 20_000 * 4  # a few bytes per URL, not a stored string
+
+
+@pytest.mark.asyncio
+async def test_frontier_dedups_and_filters():
+    frontier = Frontier(allowed_hosts=["www.example.com"], max_depth=1)
+
+    assert frontier.push("https://example.com/")
+    assert not frontier.push("https://EXAMPLE.com/#section")
+    assert not frontier.push("https://other.com/")
+    assert frontier.extend(["/a", "/a?", "b", "https://other.com/c"], depth=1, base="https://example.com/") == 2
+    assert not frontier.push("https://example.com/deep", depth=2)
+
+    popped = [await frontier.pop() for _ in range(4)]
+    assert popped == [("https://example.com/", 0), ("https://example.com/a", 1), ("https://example.com/b", 1), None]
+
+
+@pytest.mark.asyncio
+async def test_frontier_caps_pending_urls():
+    frontier = Frontier(max_pending=2)
+    frontier.extend([f"https://example.com/{i}" for i in range(5)], depth=0)
+
+    assert len(frontier) == 2
+    assert frontier.dropped == 3
+    await frontier.pop()
+    assert frontier.push("https://example.com/4")  # dropped URLs are not marked seen
+
+
+@pytest.mark.asyncio
+async def test_robots_rules_are_fetched_once_per_origin():
+    fetch = AsyncMock(return_value="User-agent: *\nDisallow: /private\nCrawl-delay: 2\n")
+    robots = RobotsCache(fetch, user_agent="SynapseCrawler")
+    frontier = Frontier(robots=robots)
+    frontier.extend(["https://example.com/private/x", "https://example.com/public"], depth=0)
+
+    assert await frontier.pop() == ("https://example.com/public", 0)
+    assert await robots.crawl_delay("https://example.com/") == 2.0
+    fetch.assert_awaited_once_with("https://example.com/robots.txt")
+
+
+@pytest.mark.asyncio
+async def test_unreachable_robots_allows_everything():
+    robots = RobotsCache(AsyncMock(side_effect=OSError("down")))
+
+    assert await robots.allowed("https://example.com/anything")
@@ -0,0 +1,117 @@
+"""Tests for per-host politeness and the concurrent crawl scheduler."""
+
+import asyncio
+import time
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from src.analytics.metrics.crawler_metrics import CrawlerMetrics
+from src.crawler.crawler import Crawler
+from src.crawler.frontier import Frontier
+from src.crawler.rate_limiter import RateLimiter, TokenBucket
+
+
+def test_token_bucket_reservations_queue_up():
+    bucket = TokenBucket(rate=10, capacity=2)
+    now = bucket.updated
+
+    assert [round(bucket.take(now), 3) for _ in range(4)] == [0.0, 0.0, 0.1, 0.2]
+    assert round(bucket.delay(now + 0.25), 3) == 0.05
+
+
+def test_domains_have_independent_budgets():
+    limiter = RateLimiter(rate_limit=1, period=1)
+
+    assert limiter.take("a.com") == 0
+    assert limiter.take("b.com") == 0
+    assert limiter.delay("a.com") > 0.9
+
+
+def test_crawl_delay_only_slows_a_domain_down():
+    limiter = RateLimiter(rate_limit=10, period=1)
+    limiter.set_crawl_delay("a.com", 2)
+    limiter.set_crawl_delay("b.com", 0.01)
+
+    assert limiter.delay("a.com") > 1.9
+    assert limiter.bucket("b.com").rate == 10
+
+
+def test_frontier_hands_out_ready_hosts_first():
+    frontier = Frontier(limiter=RateLimiter(rate_limit=1, period=10))
+    frontier.extend(["https://a.com/1", "https://a.com/2", "https://b.com/1"], depth=0)
+
+    first, _ = frontier.next_ready()
+    second, _ = frontier.next_ready()
+    item, wait = frontier.next_ready()
+
+    assert {first[0], second[0]} == {"https://a.com/1", "https://b.com/1"}
+    assert item is None and 9 < wait <= 10
+    assert len(frontier) == 1
+
+
+@pytest.fixture
+def crawler():
+    with patch("src.crawler.crawler.CrawlerMetrics", return_value=AsyncMock(spec=CrawlerMetrics)):
+        yield Crawler(rate_limit=20, period=1, concurrency=8)
+
+
+def fake_site(hosts, pages_per_host, robots=None):
+    site = {}
+    for host in hosts:
+        site[f"https://{host}/robots.txt"] = (robots or {}).get(host)
+        for i in range(pages_per_host):
+            links = "".join(f'<a href="https://{other}/{i + 1}">x</a>' for other in hosts if i + 1 < pages_per_host)
+            site[f"https://{host}/{i}" if i else f"https://{host}/"] = f"<title>{host} {i}</title>{links}"
+    return site
+
+
+@pytest.mark.asyncio
+async def test_crawl_keeps_hosts_busy_in_parallel_within_budget(crawler):
+    hosts = [f"host{i}.com" for i in range(4)]
+    site = fake_site(hosts, 5, robots={"host0.com": "User-agent: *\nCrawl-delay: 0.2"})
+    requests = {host: [] for host in hosts}
+    active = {"now": 0, "peak": 0}
+
+    async def get(url):
+        host = url.split("/")[2]
+        if not url.endswith("robots.txt"):
+            requests[host].append(time.monotonic())
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+            await asyncio.sleep(0.03)
+            active["now"] -= 1
+        return site.get(url)
+
+    frontier = Frontier(robots=crawler.robots, limiter=crawler.rate_limiter)
+    for host in hosts:
+        frontier.push(f"https://{host}/")
+
+    with patch.object(crawler, "_get", side_effect=get), patch("aiohttp.ClientSession", return_value=AsyncMock()):
+        crawler.robots.fetch = get
+        started = time.monotonic()
+        results = await crawler.crawl("https://host1.com/", max_pages=20, frontier=frontier)
+        elapsed = time.monotonic() - started
+
+    assert len(results) == 20
+    assert active["peak"] >= 3
+    for host, times in requests.items():
+        gaps = [b - a for a, b in zip(times, times[1:])]
+        minimum = 0.2 if host == "host0.com" else 0.05
+        assert all(gap >= minimum - 0.01 for gap in gaps), (host, gaps)
+    # Bounded by host0's Crawl-delay (4 * 0.2s), not by the sum of all hosts' budgets
+    assert elapsed < 1.5
+
+
+@pytest.mark.asyncio
+async def test_crawl_stops_when_frontier_is_exhausted(crawler):
+    site = {"https://example.com/": '<a href="/a">a</a>', "https://example.com/a": "<p>leaf</p>"}
+
+    async def get(url):
+        return site.get(url)
+
+    with patch.object(crawler, "_get", side_effect=get), patch("aiohttp.ClientSession", return_value=AsyncMock()):
+        crawler.robots.fetch = get
+        results = await asyncio.wait_for(crawler.crawl("https://example.com/", max_pages=50), 2)
+
+    assert sorted(result["url"] for result in results) == ["https://example.com/", "https://example.com/a"]
@@ -6,27 +6,34 @@ from bs4 import BeautifulSoup
 from aiohttp import ClientSession, ClientResponse
 from contextlib import asynccontextmanager
 from src.crawler.crawler import Crawler
-from src.analytics.metrics.crawler_metrics import CrawlerMetrics
-from src.utils.rate_limiter import RateLimiter
+from src.analytics.metrics.crawler_metrics import CRAWL_SOURCE, CrawlerMetrics
+from src.crawler.rate_limiter import RateLimiter
 
 @asynccontextmanager
 async def async_mock_cm(mock_obj):
     """Helper function to create async context managers."""
     yield mock_obj
 
+async def body_chunks(text):
+    """Body of a mocked response as a single chunk."""
+    if isinstance(text, str):
+        yield text.encode()
+
 @pytest.fixture
 def mock_rate_limiter():
     """Fixture for mocked rate limiter."""
     limiter = AsyncMock(spec=RateLimiter)
     limiter.acquire = AsyncMock()
+    limiter.delay = Mock(return_value=0.0)
+    limiter.take = Mock(return_value=0.0)
     return limiter
 
 @pytest.fixture
 def mock_metrics():
     """Fixture for mocked crawler metrics."""
     metrics = Mock(spec=CrawlerMetrics)
-    metrics.track_request = Mock(return_value=async_mock_cm(None))
-    metrics.track_error = Mock()
+    metrics.track_request = AsyncMock()
+    metrics.track_error = AsyncMock()
     return metrics
 
 @pytest.fixture
@@ -35,13 +42,19 @@ def mock_response():
     response = AsyncMock(spec=ClientResponse)
     response.status = 200
     response.text = AsyncMock()
+    response.headers = {"Content-Type": "text/html; charset=utf-8"}
+    response.content_length = None
+    # The crawler streams the body; serve whatever text() was set to return
+    response.content = Mock()
+    response.content.iter_chunked = Mock(side_effect=lambda size: body_chunks(response.text.return_value))
     return response
 
 @pytest.fixture
 def mock_session(mock_response):
     """Fixture for mocked aiohttp session."""
     session = AsyncMock(spec=ClientSession)
-    session.get = Mock(return_value=async_mock_cm(mock_response))
+    # Each get() returns a fresh context manager, like aiohttp
+    session.get = Mock(side_effect=lambda *args, **kwargs: async_mock_cm(mock_response))
     session.close = AsyncMock()
     return session
 
@@ -90,7 +103,7 @@ async def test_fetch_page_success(crawler, mock_session, mock_response):
     assert content == html_content
     crawler.rate_limiter.acquire.assert_awaited_once()
     assert mock_session.get.called
-    assert crawler.metrics.track_request.called
+    assert crawler.metrics.track_request.await_args.kwargs["source"] == CRAWL_SOURCE
 
 @pytest.mark.asyncio
 async def test_fetch_page_error(crawler, mock_session):
@@ -213,4 +226,57 @@ async def test_crawl_cycle_detection(crawler, mock_session, mock_response):
     assert len(results) > 0
     # Should not visit the same URL twice
     urls = [result['url'] for result in results]
-    assert len(urls) == len(set(urls)) 
\ No newline at end of file
+    assert len(urls) == len(set(urls)) 
+@pytest.mark.asyncio
+async def test_crawl_follows_frontier_rules(crawler, mock_session):
+    """Test crawling normalizes links and applies domain, depth and robots filters."""
+    site = {
+        "https://example.com/robots.txt": "User-agent: *\nDisallow: /private",
+        "https://example.com/": '<a href="/a#top">A</a><a href="/A/../a">A</a><a href="https://other.com/">X</a>'
+                                '<a href="/private/x">P</a>',
+        "https://example.com/a": '<a href="/b">B</a><a href="/">Home</a>',
+        "https://example.com/b": '<a href="/c">C</a>',
+    }
+    fetched = []
+    
+    async def fetch_page(url):
+        fetched.append(url)
+        return site.get(url)
+    
+    with patch.object(crawler, '_get', side_effect=fetch_page), \
+         patch('aiohttp.ClientSession', return_value=mock_session):
+        crawler.robots.fetch = fetch_page
+        results = await crawler.crawl("https://EXAMPLE.com", max_pages=10, max_depth=2)
+    
+    assert [result['url'] for result in results] == [
+        "https://example.com/", "https://example.com/a", "https://example.com/b"
+    ]
+    assert "https://example.com/private/x" not in fetched
+    assert "https://example.com/c" not in fetched  # depth 3
+
+@pytest.mark.asyncio
+async def test_extraction_errors_skip_only_that_page(crawler, mock_session):
+    """A page that fails to parse is counted as an error and the crawl goes on."""
+    site = {
+        "https://example.com/": '<a href="/bad">Bad</a><a href="/good">Good</a>',
+        "https://example.com/bad": "<p>broken</p>",
+        "https://example.com/good": "<p>fine</p>",
+    }
+    extract = crawler.extract_content
+
+    async def fetch_page(url):
+        return site.get(url)
+
+    async def flaky_extract(html):
+        if "broken" in html:
+            raise ValueError("unparsable")
+        return await extract(html)
+
+    with patch.object(crawler, '_get', side_effect=fetch_page), \
+         patch.object(crawler, 'extract_content', side_effect=flaky_extract), \
+         patch('aiohttp.ClientSession', return_value=mock_session):
+        crawler.robots.fetch = fetch_page
+        results = await crawler.crawl("https://example.com", max_pages=10)
+
+    assert sorted(result['url'] for result in results) == ["https://example.com/", "https://example.com/good"]
+    crawler.metrics.track_error.assert_awaited_once_with(source=CRAWL_SOURCE, endpoint="extract", error_type="ValueError")
@@ -0,0 +1,63 @@
+"""Tests for the indexed episodic memory store."""
+
+import pytest
+from datetime import datetime
+
+from src.memory.episodic import EpisodicStore
+
+
+def make_entry(day, event_type):
+    return {
+        "timestamp": datetime(2024, 1, day).isoformat(),
+        "type": event_type,
+        "details": {"day": day}
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = EpisodicStore(tmp_path / "memory.episodes", cache_size=2)
+    store.load()
+    for day in range(1, 11):
+        store.append(make_entry(day, "chat" if day % 2 else "task"))
+    return store
+
+
+def days(entries):
+    return [entry["details"]["day"] for entry in entries]
+
+
+def test_query_by_type(store):
+    """Entries of one type come back in time order."""
+    assert days(store.query("chat")) == [1, 3, 5, 7, 9]
+    assert store.query("missing") == []
+
+
+def test_query_by_time_range_and_limit(store):
+    """Ranges are inclusive and limit keeps the most recent matches."""
+    since, until = datetime(2024, 1, 3), datetime(2024, 1, 8)
+
+    assert days(store.query(since=since, until=until)) == [3, 4, 5, 6, 7, 8]
+    assert days(store.query("task", since=since, until=until, limit=2)) == [6, 8]
+
+
+def test_bodies_are_loaded_from_the_log(tmp_path, store):
+    """After a restart the index is rebuilt and bodies are read lazily."""
+    state = store.state()
+    store.append(make_entry(11, "chat"))
+    store.close()
+
+    reopened = EpisodicStore(tmp_path / "memory.episodes", cache_size=2)
+    reopened.load(state)
+
+    assert len(reopened) == 11
+    assert reopened._cache == {}
+    assert days(reopened.query("chat", limit=3)) == [7, 9, 11]
+    assert len(reopened._cache) == 2
+
+
+def test_out_of_order_timestamps_stay_sorted(store):
+    """A late entry with an older timestamp is indexed in time order."""
+    store.append(make_entry(2, "chat"))
+
+    assert days(store.query("chat", until=datetime(2024, 1, 3))) == [1, 2, 3]
@@ -0,0 +1,91 @@
+"""Tests for HTML parser backends, main content extraction and pooled parsing."""
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from src.analytics.metrics.crawler_metrics import CrawlerMetrics
+from src.crawler.crawler import Crawler
+from src.crawler.extraction import BACKENDS, default_backend, extract_html
+
+ARTICLE = """
+<html>
+    <head><title>Release notes</title><style>p { color: red; }</style></head>
+    <body>
+        <nav class="menu"><a href="/">Home</a> <a href="/docs">Docs</a> <a href="/blog">Blog</a></nav>
+        <div id="sidebar" class="widget">
+            <p><a href="/related/1">A related post that is mostly a link, not content</a></p>
+        </div>
+        <article class="post-content">
+            <h1>Version 2.0</h1>
+            <p>This release rewrites the crawler scheduler, so hosts are fetched in parallel.</p>
+            <p>Parsing moved to faster backends, and large pages are parsed in worker processes.</p>
+            <script>trackPageView();</script>
+            <p>See the <a href="/changelog">changelog</a> for the full list of changes, fixes and credits.</p>
+        </article>
+        <footer class="footer"><p>Copyright notice and the usual legal text, repeated on every page.</p></footer>
+    </body>
+</html>
+"""
+
+MODULES = {"selectolax": "selectolax.lexbor", "lxml": "lxml.html", "html.parser": "bs4"}
+
+
+@pytest.fixture(params=list(BACKENDS))
+def backend(request):
+    pytest.importorskip(MODULES[request.param])
+    return request.param
+
+
+def test_backends_agree_on_title_text_and_links(backend):
+    page = extract_html(ARTICLE, backend)
+
+    assert page["title"] == "Release notes"
+    assert page["links"] == ["/", "/docs", "/blog", "/related/1", "/changelog"]
+    assert "crawler scheduler" in page["text"]
+    assert "trackPageView" not in page["text"]
+    assert "color: red" not in page["text"]
+
+
+def test_main_content_skips_boilerplate(backend):
+    content = extract_html(ARTICLE, backend)["content"]
+
+    assert "crawler scheduler" in content
+    assert "full list of changes" in content
+    assert "Copyright" not in content
+    assert "related post" not in content
+    assert "Docs" not in content
+
+
+def test_page_without_paragraphs_falls_back_to_text(backend):
+    page = extract_html("<html><body><div>Just a short line</div></body></html>", backend)
+
+    assert page["title"] == ""
+    assert page["content"] == "Just a short line"
+
+
+def test_xhtml_declaration_and_comment_only_pages_parse(backend):
+    xhtml = '<?xml version="1.0" encoding="utf-8"?>\n<html><head><title>XHTML</title></head><body><p>Body</p></body></html>'
+
+    assert extract_html(xhtml, backend)["title"] == "XHTML"
+    assert extract_html("<!-- nothing here -->", backend) == {"title": "", "text": "", "links": [], "content": ""}
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        default_backend("regex")
+
+
+@pytest.mark.asyncio
+async def test_large_pages_are_parsed_in_a_process_pool():
+    with patch("src.crawler.crawler.CrawlerMetrics", return_value=AsyncMock(spec=CrawlerMetrics)):
+        async with Crawler(parse_workers=1, process_threshold=1_000) as crawler:
+            small = await crawler.extract_content("<title>Small</title><p>tiny</p>")
+            assert crawler._parse_pool is None
+
+            large = await crawler.extract_content(ARTICLE * 2)
+            assert crawler._parse_pool is not None
+
+        assert crawler._parse_pool is None
+    assert small["title"] == "Small"
+    assert large["title"] == "Release notes"
+    assert "crawler scheduler" in large["content"]
@@ -0,0 +1,137 @@
+"""Tests for the incremental project-docs indexer."""
+
+import asyncio
+import os
+import time
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.tools.index_project_docs import index_project_docs, load_manifest, watch_project_docs
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "docs" / "guide").mkdir(parents=True)
+    (tmp_path / "requirements").mkdir()
+    (tmp_path / "docs" / "guide" / "intro.md").write_text("# Intro\nSynapse overview.")
+    (tmp_path / "docs" / "setup.md").write_text("# Setup\nInstall steps.")
+    (tmp_path / "requirements" / "base.txt").write_text("numpy\n")
+    return tmp_path
+
+
+@pytest.fixture
+def rag():
+    service = MagicMock()
+    service.add_chunks = AsyncMock(side_effect=lambda chunks: len(chunks))
+    service.delete_chunks = AsyncMock()
+    return service
+
+
+@pytest.mark.asyncio
+async def test_first_run_indexes_everything(project, rag):
+    stats = await index_project_docs(project, workers=1, rag=rag)
+
+    assert stats["changed"] == 3
+    assert stats["added"] == 3
+    paths = {chunk["metadata"]["path"] for chunk in rag.add_chunks.call_args[0][0]}
+    assert paths == {"docs/guide/intro.md", "docs/setup.md", "requirements/base.txt"}
+    assert set(load_manifest(project / ".index_manifest.json")["files"]) == paths
+
+
+@pytest.mark.asyncio
+async def test_unchanged_tree_is_a_fast_noop(project, rag):
+    await index_project_docs(project, workers=1, rag=rag)
+    rag.add_chunks.reset_mock()
+
+    started = time.perf_counter()
+    stats = await index_project_docs(project, workers=1, rag=rag)
+
+    assert time.perf_counter() - started < 1.0
+    assert stats["changed"] == 0
+    rag.add_chunks.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_only_changed_files_are_reindexed(project, rag):
+    await index_project_docs(project, workers=1, rag=rag)
+    rag.add_chunks.reset_mock()
+
+    setup = project / "docs" / "setup.md"
+    setup.write_text("# Setup\nNew install steps.")
+    intro = project / "docs" / "guide" / "intro.md"
+    os.utime(intro, ns=(intro.stat().st_atime_ns, intro.stat().st_mtime_ns + 10**9))  # touched only
+
+    stats = await index_project_docs(project, workers=1, rag=rag)
+
+    assert stats["changed"] == 1
+    assert [c["metadata"]["path"] for c in rag.add_chunks.call_args[0][0]] == ["docs/setup.md"]
+    rag.delete_chunks.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_removed_files_delete_their_vectors(project, rag):
+    (project / "docs" / "copy.md").write_text("numpy\n")  # same content as base.txt
+    await index_project_docs(project, workers=1, rag=rag)
+    copy_ids = {
+        chunk["id"] for call in rag.add_chunks.call_args_list for chunk in call[0][0]
+        if chunk["metadata"]["path"] == "docs/copy.md"
+    }
+
+    (project / "requirements" / "base.txt").unlink()
+    (project / "docs" / "setup.md").unlink()
+    stats = await index_project_docs(project, workers=1, rag=rag)
+
+    assert stats["removed"] == 2
+    deleted = rag.delete_chunks.call_args[0][0]
+    assert len(deleted) == 2  # identical text in copy.md has its own chunk id
+    assert copy_ids and not copy_ids & set(deleted)
+    assert "docs/setup.md" not in load_manifest(project / ".index_manifest.json")["files"]
+
+
+@pytest.mark.asyncio
+async def test_edit_reembeds_only_changed_chunks(project, rag):
+    sections = [f"\n## Section {i}\n" + f"paragraph {i} " * 450 for i in range(3)]
+    guide = project / "docs" / "big.md"
+    guide.write_text("".join(sections))
+    await index_project_docs(project, workers=1, rag=rag)
+    rag.add_chunks.reset_mock()
+
+    sections[1] = "\n## Section 1\n" + "rewritten " * 200
+    guide.write_text("".join(sections))
+    stats = await index_project_docs(project, workers=1, rag=rag)
+
+    added = rag.add_chunks.call_args[0][0]
+    assert len(added) == 1 and "rewritten" in added[0]["content"]
+    assert stats["reused"] == 2
+    assert stats["deleted"] == 1
+
+
+@pytest.mark.parametrize("force_polling", [True, False])
+@pytest.mark.asyncio
+async def test_watch_batches_edits_into_one_run(project, rag, force_polling):
+    if not force_polling:
+        pytest.importorskip("watchfiles")
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(watch_project_docs(
+        project, workers=1, rag=rag, debounce=0.3, poll_interval=0.05,
+        force_polling=force_polling, stop_event=stop
+    ))
+    await asyncio.sleep(0.5)
+    rag.add_chunks.reset_mock()
+
+    for i in range(3):
+        (project / "docs" / f"new-{i}.md").write_text(f"note {i}")
+        await asyncio.sleep(0.05)
+    (project / "docs" / "ignored.txt").write_text("not indexed")
+
+    for _ in range(60):
+        await asyncio.sleep(0.1)
+        if rag.add_chunks.called:
+            break
+    stop.set()
+    await asyncio.wait_for(watcher, 5)
+
+    assert rag.add_chunks.call_count == 1
+    paths = sorted(chunk["metadata"]["path"] for chunk in rag.add_chunks.call_args[0][0])
+    assert paths == [f"docs/new-{i}.md" for i in range(3)]
@@ -0,0 +1,86 @@
+"""Tests for the append-only memory journal."""
+
+import pytest
+
+from src.memory.journal import MemoryJournal
+
+
+@pytest.fixture
+def snapshot_file(tmp_path):
+    return tmp_path / "memory.json"
+
+
+def test_replay_returns_appended_records(snapshot_file):
+    """Records survive a reopen in append order, with their offsets."""
+    journal = MemoryJournal(snapshot_file)
+    offsets = [journal.append({"op": "experience", "n": i}) for i in range(3)]
+    journal.close()
+
+    reopened = MemoryJournal(snapshot_file)
+    reopened.load_snapshot()
+    replayed = list(reopened.replay())
+
+    assert [offset for offset, _ in replayed] == offsets
+    assert [record["n"] for _, record in replayed] == [0, 1, 2]
+    assert reopened.read_at(offsets[1]) == {"op": "experience", "n": 1}
+
+
+def test_torn_tail_is_dropped(snapshot_file):
+    """A partial last line from a crash is ignored and truncated."""
+    journal = MemoryJournal(snapshot_file)
+    journal.append({"op": "experience", "n": 0})
+    journal.close()
+    with open(journal.journal_file, "ab") as f:
+        f.write(b'{"op": "exper')
+
+    reopened = MemoryJournal(snapshot_file)
+    reopened.load_snapshot()
+
+    assert [record["n"] for _, record in reopened.replay()] == [0]
+    reopened.append({"op": "experience", "n": 1})
+    reopened.close()
+    assert len(journal.journal_file.read_bytes().splitlines()) == 2
+
+
+def test_compaction_folds_journal_into_snapshot(snapshot_file):
+    """After compaction the snapshot holds the state and the journal is empty."""
+    journal = MemoryJournal(snapshot_file, compact_after=2)
+    journal.append({"op": "experience", "n": 0})
+    journal.append({"op": "experience", "n": 1})
+    assert journal.needs_compaction()
+
+    journal.compact({"episodic": [0, 1]})
+    journal.append({"op": "experience", "n": 2})
+    journal.close()
+
+    reopened = MemoryJournal(snapshot_file)
+    assert reopened.load_snapshot() == {"episodic": [0, 1]}
+    assert [record["n"] for _, record in reopened.replay()] == [2]
+
+
+def test_records_covered_by_snapshot_are_not_replayed(snapshot_file):
+    """A crash between snapshot and truncation does not duplicate records."""
+    journal = MemoryJournal(snapshot_file)
+    journal.append({"op": "experience", "n": 0})
+    journal.sync()
+    stale = journal.journal_file.read_bytes()
+
+    journal.compact({"episodic": [0]})
+    journal.close()
+    journal.journal_file.write_bytes(stale)
+
+    reopened = MemoryJournal(snapshot_file)
+    reopened.load_snapshot()
+    assert list(reopened.replay()) == []
+
+
+def test_fsync_is_batched(snapshot_file, monkeypatch):
+    """Appends only fsync once per batch."""
+    syncs = []
+    monkeypatch.setattr("src.memory.journal.os.fsync", syncs.append)
+
+    journal = MemoryJournal(snapshot_file, fsync_every=4, fsync_interval=3600)
+    for i in range(8):
+        journal.append({"op": "experience", "n": i})
+
+    assert len(syncs) == 2
@@ -1,7 +1,8 @@
 """Tests for the ParallelCrawler class."""
 
 import pytest
-from unittest.mock import Mock, AsyncMock, patch, MagicMock
+from contextlib import asynccontextmanager
+from unittest.mock import Mock, AsyncMock, patch, MagicMock, call
 import httpx
 from datetime import datetime
 from src.crawlers.parallel_crawler import ParallelCrawler, WebContent
@@ -13,7 +14,7 @@ def mock_metrics():
     metrics = AsyncMock(spec=CrawlerMetrics)
     metrics.track_crawl = AsyncMock()
     metrics.track_error = AsyncMock()
-    metrics.set_active_crawls = AsyncMock()
+    metrics.add_active_crawls = AsyncMock()
     return metrics
 
 @pytest.fixture
@@ -22,6 +23,17 @@ def mock_client():
     client = AsyncMock(spec=httpx.AsyncClient)
     client.get = AsyncMock()
     client.aclose = AsyncMock()
+
+    @asynccontextmanager
+    async def stream(method, url, headers=None):
+        # Streamed bodies come from the get() mock the tests configure
+        response = await client.get(url)
+
+        async def chunks():
+            yield response.content
+        response.aiter_bytes = chunks
+        yield response
+    client.stream = stream
     return client
 
 @pytest.fixture
@@ -107,7 +119,7 @@ async def test_crawl_urls_parallel(crawler, mock_client):
     assert all(isinstance(r, WebContent) for r in results)
     assert all(r.content == content for r in results)
     
-    crawler.metrics.set_active_crawls.assert_awaited_once_with(len(urls))
+    assert crawler.metrics.add_active_crawls.await_args_list == [call(len(urls)), call(-len(urls))]
     assert mock_client.get.await_count == len(urls)
 
 @pytest.mark.asyncio
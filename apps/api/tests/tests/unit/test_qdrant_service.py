@@ -0,0 +1,163 @@
+"""Tests for the Qdrant vector store adapter, run against local in-memory mode."""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+
+qdrant_client = pytest.importorskip("qdrant_client")
+
+from src.services.qdrant_service import QdrantService, build_filter
+from src.core.retrieval import RetrievalSystem
+from src.services.embedding_service import EmbeddingService
+
+
+def _documents(count):
+    return [
+        {
+            "id": f"doc-{i}",
+            "embedding": [1.0, float(i), 0.0],
+            "content": f"chunk {i}",
+            "metadata": {"source": "docs" if i % 2 else "blog", "chunk": i},
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+async def qdrant():
+    service = QdrantService(
+        client=qdrant_client.AsyncQdrantClient(location=":memory:"),
+        collection_name="test",
+        batch_size=4,
+        parallel=2
+    )
+    assert await service.create_collection(vector_size=3)
+    yield service
+    await service.close()
+
+
+@pytest.mark.asyncio
+async def test_upsert_in_batches_and_search(qdrant):
+    assert await qdrant.upsert_batch(_documents(10)) == 10
+
+    results = await qdrant.search([1.0, 0.0, 0.0], limit=2)
+
+    assert [r["id"] for r in results] == ["doc-0", "doc-1"]
+    assert results[0]["content"] == "chunk 0"
+    assert results[0]["score"] == pytest.approx(1.0)
+
+
+@pytest.mark.asyncio
+async def test_filtered_and_batched_search(qdrant):
+    await qdrant.upsert_batch(_documents(10))
+
+    results = await qdrant.search([1.0, 0.0, 0.0], limit=10, filters={"source": "docs"})
+    assert {r["metadata"]["source"] for r in results} == {"docs"}
+    assert len(results) == 5
+
+    ranged = await qdrant.search([1.0, 0.0, 0.0], limit=10, filters={"chunk": {"gte": 8}})
+    assert {r["id"] for r in ranged} == {"doc-8", "doc-9"}
+
+    batches = await qdrant.search_batch([[1.0, 0.0, 0.0], [1.0, 9.0, 0.0]], limit=1)
+    assert [batch[0]["id"] for batch in batches] == ["doc-0", "doc-9"]
+
+
+@pytest.mark.asyncio
+async def test_export_scrolls_every_point(qdrant):
+    await qdrant.upsert_batch(_documents(10))
+    await qdrant.delete(["doc-0"])
+
+    exported = [doc async for doc in qdrant.export(batch_size=3)]
+
+    assert sorted(doc["id"] for doc in exported) == [f"doc-{i}" for i in range(1, 10)]
+    assert all(len(doc["embedding"]) == 3 for doc in exported)
+
+
+def test_build_filter_matches_lists():
+    query_filter = build_filter({"source": ["docs", "blog"]})
+    assert query_filter.must[0].key == "metadata.source"
+    assert query_filter.must[0].match.any == ["docs", "blog"]
+    assert build_filter(None) is None
+
+
+@pytest.mark.asyncio
+async def test_retrieval_system_uses_vector_store(qdrant):
+    await qdrant.upsert_batch(_documents(4))
+    retrieval = RetrievalSystem(qdrant, embed_query=AsyncMock(return_value=[1.0, 3.0, 0.0]))
+
+    results = await retrieval.retrieve("chunk 3", k=1, filters={"source": "docs"})
+
+    assert [r["id"] for r in results] == ["doc-3"]
+
+
+@pytest.mark.asyncio
+async def test_upsert_reads_documents_lazily_with_fixed_workers():
+    """Batches are pulled from the iterator only as workers free up."""
+    in_flight = []
+    read = []
+
+    class SlowClient:
+        async def upsert(self, collection_name, points, wait):
+            in_flight.append(len(read))
+            await asyncio.sleep(0.01)
+
+    def documents():
+        for document in _documents(40):
+            read.append(document["id"])
+            yield document
+
+    service = QdrantService(client=SlowClient(), collection_name="test", batch_size=4, parallel=2)
+
+    assert await service.upsert_batch(documents()) == 40
+    # Two workers plus two queued batches are read ahead at most
+    assert in_flight[0] <= 4 * 4
+
+
+@pytest.mark.asyncio
+async def test_upsert_stops_after_a_failed_batch():
+    calls = []
+
+    class FailingClient:
+        async def upsert(self, collection_name, points, wait):
+            calls.append(len(points))
+            raise RuntimeError("down")
+
+    service = QdrantService(client=FailingClient(), collection_name="test", batch_size=4, parallel=2)
+
+    with pytest.raises(RuntimeError):
+        await service.upsert_batch(_documents(400))
+    assert len(calls) <= 4
+
+
+def test_retrieval_system_requires_embedder():
+    with pytest.raises(TypeError):
+        RetrievalSystem()
+
+
+def test_embedding_service_creates_its_client_lazily(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    service = EmbeddingService()
+
+    assert service._client is None
+    assert service.dimensions == 3072
+
+
+@pytest.mark.asyncio
+async def test_requested_dimensions_are_sent_to_the_model():
+    client = AsyncMock()
+    client.embeddings.create.return_value.data = [AsyncMock(embedding=[0.0] * 768)]
+    service = EmbeddingService(client, dimensions=768)
+
+    assert len(await service.get_embedding("hello")) == service.dimensions == 768
+    assert client.embeddings.create.await_args.kwargs["dimensions"] == 768
+
+
+@pytest.mark.asyncio
+async def test_default_collection_matches_the_embedding_model():
+    client = qdrant_client.AsyncQdrantClient(location=":memory:")
+    service = QdrantService(client=client, collection_name="default-size")
+
+    assert await service.create_collection()
+    info = await client.get_collection("default-size")
+    assert info.config.params.vectors.size == EmbeddingService().dimensions
+    await service.close()
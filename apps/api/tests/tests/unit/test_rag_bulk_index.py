@@ -0,0 +1,77 @@
+"""Tests for bulk document indexing in the memory RAGSystem."""
+
+import pytest
+from unittest.mock import MagicMock, AsyncMock, patch
+
+from src.memory.rag import RAGSystem
+
+
+@pytest.fixture
+def settings():
+    return MagicMock(SUPABASE_URL="http://localhost", SUPABASE_KEY="key")
+
+
+@pytest.fixture
+def supabase():
+    client = MagicMock()
+    client.inserted = []
+
+    def insert(rows):
+        if any(row["metadata"].get("broken") for row in rows):
+            raise RuntimeError("insert failed")
+        client.inserted.append(list(rows))
+        return MagicMock(execute=MagicMock(return_value=MagicMock(data=rows)))
+
+    client.table.return_value.insert.side_effect = insert
+    return client
+
+
+@pytest.fixture
+def rag(settings, supabase):
+    with patch("src.memory.rag.create_client", return_value=supabase), \
+         patch("src.memory.rag.EmbeddingService") as service_cls:
+        service = service_cls.return_value
+        service.generate_batch_embeddings = AsyncMock(
+            side_effect=lambda texts: [[float(len(text))] for text in texts]
+        )
+        yield RAGSystem(settings)
+
+
+@pytest.mark.asyncio
+async def test_bulk_index_batches_embeddings_and_inserts(rag, supabase):
+    """Chunks are embedded and inserted in batches, not one call per document."""
+    documents = [{"id": f"doc-{i}", "content": f"text {i}"} for i in range(25)]
+    progress = []
+
+    report = await rag.index_documents_bulk(
+        documents,
+        embed_batch_size=10,
+        insert_batch_size=10,
+        insert_workers=1,
+        on_progress=lambda r: progress.append(r.inserted)
+    )
+
+    assert report.documents == 25
+    assert report.inserted == 25
+    assert report.failures == {}
+    assert rag.embedding_service.generate_batch_embeddings.await_count < 25
+    assert all(len(batch) <= 10 for batch in supabase.inserted)
+    assert sum(len(batch) for batch in supabase.inserted) == 25
+    assert progress[-1] == 25
+    assert report.throughput > 0
+
+
+@pytest.mark.asyncio
+async def test_bulk_index_reports_failures_per_document(rag, supabase):
+    """A failing insert batch marks its documents failed and the rest succeed."""
+    documents = [
+        {"id": "good", "content": "fine"},
+        {"id": "bad", "content": "broken", "metadata": {"broken": True}},
+        {"id": "missing"},
+    ]
+
+    report = await rag.index_documents_bulk(documents, insert_batch_size=1, insert_workers=1)
+
+    assert set(report.failures) == {"bad", "missing"}
+    assert report.succeeded == 1
+    assert report.inserted == 1
@@ -6,14 +6,13 @@ from datetime import datetime, timedelta
 from unittest.mock import AsyncMock, patch
 from src.crawlers.rag_integration import RAGProcessor, Document
 from src.analytics.metrics.crawler_metrics import CrawlerMetrics
+from src.rag.embeddings import EmbeddingGenerator
+from src.rag.index import InMemoryIndex
 
 @pytest.fixture
 def mock_metrics():
     """Fixture for mocked metrics."""
-    metrics = AsyncMock(spec=CrawlerMetrics)
-    metrics.observe_duration = AsyncMock()
-    metrics.track_page = AsyncMock()
-    return metrics
+    return AsyncMock(spec=CrawlerMetrics)
 
 @pytest.fixture
 def sample_documents():
@@ -35,15 +34,20 @@ def sample_documents():
 async def processor(mock_metrics):
     """Fixture for RAG processor with mocked dependencies."""
     with patch('src.crawlers.rag_integration.CrawlerMetrics', return_value=mock_metrics):
-        processor = RAGProcessor()
+        processor = RAGProcessor(EmbeddingGenerator(), InMemoryIndex())
         yield processor
 
 @pytest.mark.asyncio
 async def test_initialization():
     """Test RAG processor initialization."""
-    processor = RAGProcessor()
+    processor = RAGProcessor(EmbeddingGenerator(), InMemoryIndex())
     assert isinstance(processor.metrics, CrawlerMetrics)
 
+def test_embedder_and_index_are_required():
+    """Test the processor never falls back to the random stub or a volatile index."""
+    with pytest.raises(TypeError):
+        RAGProcessor()
+
 @pytest.mark.asyncio
 async def test_process_documents_success(processor, sample_documents, mock_metrics):
     """Test successful document processing."""
@@ -56,8 +60,10 @@ async def test_process_documents_success(processor, sample_documents, mock_metri
     assert result['vectors'] == 2
     assert isinstance(result['duration'], float)
     
-    mock_metrics.observe_duration.assert_awaited_once()
-    mock_metrics.track_page.assert_awaited_once_with(status='success')
+    mock_metrics.track_pipeline.assert_awaited_once()
+    assert mock_metrics.track_pipeline.await_args[1]['status'] == 'success'
+    assert {call.args[0] for call in mock_metrics.track_stage.await_args_list} == {'chunk', 'embed', 'store'}
+    assert len(processor.index) == 2
 
 @pytest.mark.asyncio
 async def test_process_documents_empty(processor, mock_metrics):
@@ -79,16 +85,18 @@ async def test_process_documents_error(processor, sample_documents, mock_metrics
         assert result['success'] is False
         assert 'error' in result
         assert 'Chunking error' in result['error']
-        mock_metrics.track_page.assert_awaited_once_with(status='error')
+        mock_metrics.track_pipeline.assert_awaited_once_with(status='error')
 
 @pytest.mark.asyncio
 async def test_chunk_documents(processor, sample_documents):
     """Test document chunking."""
-    chunks = await processor._chunk_documents(sample_documents)
+    chunks = processor._chunk_documents(sample_documents)
     
     assert len(chunks) == 2
-    assert chunks[0] == sample_documents[0].content
-    assert chunks[1] == sample_documents[1].content
+    assert chunks[0]["content"] == sample_documents[0].content
+    assert chunks[1]["content"] == sample_documents[1].content
+    assert chunks[0]["metadata"]["source"] == "test1"
+    assert chunks[0]["id"] != chunks[1]["id"]
 
 @pytest.mark.asyncio
 async def test_generate_embeddings(processor):
@@ -97,18 +105,20 @@ async def test_generate_embeddings(processor):
     embeddings = await processor._generate_embeddings(chunks)
     
     assert len(embeddings) == 2
-    assert len(embeddings[0]) == 768  # Default embedding size
+    assert len(embeddings[0]) == processor.embedder.dimension
     assert all(isinstance(x, float) for x in embeddings[0])
 
 @pytest.mark.asyncio
 async def test_store_vectors(processor):
     """Test vector storage."""
-    embeddings = [[0.0] * 768 for _ in range(2)]
-    vectors = await processor._store_vectors(embeddings)
+    chunks = [
+        {"id": f"chunk-{i}", "content": f"Test chunk {i}", "metadata": {}, "embedding": [1.0, float(i)]}
+        for i in range(2)
+    ]
+    vectors = await processor._store_vectors(chunks)
     
-    assert len(vectors) == 2
-    assert all(isinstance(x, str) for x in vectors)
-    assert vectors[0].startswith("vector_")
+    assert vectors == ["chunk-0", "chunk-1"]
+    assert len(processor.index) == 2
 
 @pytest.mark.asyncio
 async def test_document_model():
@@ -131,9 +141,7 @@ async def test_metrics_integration(processor, sample_documents, mock_metrics):
         await processor.process_documents(sample_documents)
     
     # Verify metrics were tracked
-    assert mock_metrics.observe_duration.await_count == 1
-    assert mock_metrics.track_page.await_count == 1
+    assert mock_metrics.track_pipeline.await_count == 1
     
     # Verify duration was 1 second
-    duration_call = mock_metrics.observe_duration.await_args[0][0]
-    assert duration_call == 1.0 
\ No newline at end of file
+    assert mock_metrics.track_pipeline.await_args[1]['duration'] == 1.0 
\ No newline at end of file
@@ -0,0 +1,59 @@
+"""Tests for the query cache in the memory RAGSystem."""
+
+import pytest
+from unittest.mock import MagicMock, AsyncMock, patch
+
+from src.memory.rag import RAGSystem
+
+
+@pytest.fixture
+def supabase():
+    client = MagicMock()
+    client.rpc.return_value.execute.return_value = MagicMock(
+        data=[{"id": 1, "content": "Synapse uses Supabase"}]
+    )
+    client.table.return_value.insert.return_value.execute.return_value = MagicMock(data=[{"id": 2}])
+    return client
+
+
+@pytest.fixture
+def rag(supabase):
+    settings = MagicMock(SUPABASE_URL="http://localhost", SUPABASE_KEY="key")
+    with patch("src.memory.rag.create_client", return_value=supabase), \
+         patch("src.memory.rag.EmbeddingService") as service_cls:
+        service_cls.return_value.generate_embedding = AsyncMock(return_value=[0.1, 0.2])
+        yield RAGSystem(settings)
+
+
+@pytest.mark.asyncio
+async def test_identical_queries_hit_the_cache(rag, supabase):
+    """Repeated queries differing only in case and spacing reuse the result."""
+    first = await rag.get_context("What is Synapse?")
+    second = await rag.get_context("  what   is synapse?")
+
+    assert first == second == "Synapse uses Supabase"
+    assert rag.embedding_service.generate_embedding.await_count == 1
+    assert supabase.rpc.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_key_includes_threshold_and_count(rag, supabase):
+    """Different thresholds or counts run a new search but reuse the embedding."""
+    await rag.get_context("synapse")
+    await rag.get_context("synapse", limit=10)
+    await rag.get_context("synapse", threshold=0.5)
+
+    assert supabase.rpc.call_count == 3
+    assert rag.embedding_service.generate_embedding.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_indexing_invalidates_results(rag, supabase):
+    """A new document bumps the corpus version so the next query searches again."""
+    await rag.get_context("synapse")
+    await rag.index_document("new fact", {})
+    await rag.get_context("synapse")
+
+    assert rag.corpus_version == 1
+    assert supabase.rpc.call_count == 2
+    assert rag.embedding_service.generate_embedding.await_count == 2  # query + document
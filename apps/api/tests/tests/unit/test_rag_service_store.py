@@ -0,0 +1,93 @@
+"""Tests for the persistent, incremental RAGService store."""
+
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+
+pytest.importorskip("chromadb")
+
+from src.config.llm_config import LLMConfig
+from src.rag.chroma_index import ChromaIndex
+from src.services.rag_service import RAGService
+
+
+def _embeddings():
+    def vector(text):
+        return [float(text.count(letter)) + 0.1 for letter in "aeiou"]
+
+    model = MagicMock()
+    model.embed_documents.side_effect = lambda texts: [vector(text) for text in texts]
+    model.embed_query.side_effect = vector
+    return model
+
+
+def _service(path, embeddings):
+    config = LLMConfig(chunk_size=60, chunk_overlap=0, similarity_threshold=0.0, vector_store_path=str(path))
+    return RAGService(config, embeddings=embeddings, embed_batch_size=2)
+
+
+@pytest.mark.asyncio
+async def test_store_survives_restart_and_skips_known_chunks(tmp_path):
+    documents = ["Synapse keeps memory of every conversation.", "Chroma persists vectors on disk."]
+    first = _service(tmp_path, _embeddings())
+    assert await first.add_documents(documents, [{"source": "a"}, {"source": "b"}]) == 2
+
+    embeddings = _embeddings()
+    restarted = _service(tmp_path, embeddings)
+    assert await restarted.add_documents(
+        documents + ["A brand new aeiou chunk."],
+        [{"source": "a"}, {"source": "b"}, {"source": "c"}]
+    ) == 1
+    assert embeddings.embed_documents.call_count == 1
+    assert embeddings.embed_documents.call_args[0][0] == ["A brand new aeiou chunk."]
+
+    result = await restarted.process_query("A brand new aeiou chunk.")
+    assert result["type"] == "rag_response"
+    assert result["sources"][0]["content"] == "A brand new aeiou chunk."
+
+
+@pytest.mark.asyncio
+async def test_embeddings_are_batched(tmp_path):
+    embeddings = _embeddings()
+    service = _service(tmp_path, embeddings)
+
+    added = await service.add_documents([f"Document number {i} with text." for i in range(5)])
+
+    assert added == 5
+    assert [len(call[0][0]) for call in embeddings.embed_documents.call_args_list] == [2, 2, 1]
+
+
+@pytest.mark.asyncio
+async def test_warm_up_preloads_model_once(tmp_path):
+    embeddings = _embeddings()
+    service = RAGService(
+        LLMConfig(),
+        index=ChromaIndex("warm", persist_directory=str(tmp_path)),
+        embeddings=embeddings
+    )
+
+    await service.warm_up()
+    await service.warm_up()
+
+    assert embeddings.embed_query.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_identical_chunks_in_different_documents_are_kept(tmp_path):
+    service = _service(tmp_path, _embeddings())
+
+    added = await service.add_documents(["Shared footer text."] * 2, [{"source": "a"}, {"source": "b"}])
+
+    assert added == 2
+    assert await asyncio.to_thread(service.index.collection.count) == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_queries_share_one_warm_up(tmp_path):
+    embeddings = _embeddings()
+    service = _service(tmp_path, embeddings)
+
+    await asyncio.gather(service.warm_up(), service.process_query("aeiou"), service.warm_up())
+
+    assert embeddings.embed_query.call_args_list[0][0][0] == "warm up"
+    assert sum(call[0][0] == "warm up" for call in embeddings.embed_query.call_args_list) == 1
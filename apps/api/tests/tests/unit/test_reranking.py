@@ -0,0 +1,167 @@
+"""Tests for MMR and local re-ranking of retrieval candidates."""
+
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+from unittest.mock import MagicMock, AsyncMock, patch
+
+from src.rag.reranking import Reranker, mmr
+from src.rag.storage import VectorStore
+from src.memory.rag import RAGSystem
+
+
+def test_mmr_skips_near_duplicates():
+    """A near-duplicate of the best match loses to a diverse candidate."""
+    query = [1.0, 0.0]
+    candidates = [[1.0, 0.0], [0.99, 0.01], [0.7, 0.7]]
+
+    assert mmr(query, candidates, 2, lambda_mult=0.3) == [0, 2]
+    assert mmr(query, candidates, 2, lambda_mult=1.0) == [0, 1]
+
+
+def test_mmr_handles_small_inputs():
+    assert mmr([1.0, 0.0], [], 3) == []
+    assert mmr([1.0, 0.0], [[0.0, 1.0]], 3) == [0]
+
+
+@pytest.mark.asyncio
+async def test_local_scorer_reorders_in_batches():
+    """The local scorer is called in batches and decides the final order."""
+    batches = []
+
+    def score(pairs):
+        batches.append(len(pairs))
+        return [len(passage) for _, passage in pairs]
+
+    reranker = Reranker(lambda_mult=1.0, score_fn=score, batch_size=2)
+    candidates = [{"content": "a"}, {"content": "ccc"}, {"content": "bb"}]
+    embeddings = [[1.0, 0.0], [0.0, 1.0], [0.7, 0.7]]
+
+    ranked = await reranker.rerank("q", [1.0, 0.0], candidates, embeddings, 3)
+
+    assert [c["content"] for c in ranked] == ["ccc", "bb", "a"]
+    assert batches == [2, 1]
+
+
+@pytest.mark.asyncio
+async def test_latency_budget_falls_back_to_mmr_order():
+    def slow(pairs):
+        time.sleep(0.2)
+        return [0.0] * len(pairs)
+
+    reranker = Reranker(lambda_mult=1.0, score_fn=slow, latency_budget=0.01)
+    candidates = [{"content": "best"}, {"content": "other"}]
+
+    ranked = await reranker.rerank("q", [1.0, 0.0], candidates, [[1.0, 0.0], [0.0, 1.0]], 2)
+
+    assert [c["content"] for c in ranked] == ["best", "other"]
+
+
+@pytest.mark.asyncio
+async def test_vector_store_over_fetches_and_diversifies():
+    vectors = {
+        "query": np.array([1.0, 0.0]),
+        "page": np.array([1.0, 0.0]),
+        "page copy": np.array([0.99, 0.14]),
+        "other": np.array([0.8, -0.6]),
+    }
+    generator = MagicMock()
+    generator.generate = AsyncMock(side_effect=lambda text: vectors[text])
+    store = VectorStore(generator, reranker=Reranker(lambda_mult=0.3))
+    for content in ("page", "page copy", "other"):
+        await store.add_document(content)
+
+    results = await store.search("query", limit=2)
+
+    assert [r.content for r in results] == ["page", "other"]
+
+
+@pytest.mark.asyncio
+async def test_rag_search_fetches_candidate_embeddings_once():
+    """Over-fetched rows are re-ranked with embeddings loaded by id and cached."""
+    supabase = MagicMock()
+    supabase.rpc.return_value.execute.return_value = MagicMock(data=[
+        {"id": 1, "content": "page"},
+        {"id": 2, "content": "page copy"},
+        {"id": 3, "content": "other"},
+    ])
+    embeddings_query = supabase.table.return_value.select.return_value.in_
+    embeddings_query.return_value.execute.return_value = MagicMock(data=[
+        {"id": 1, "embedding": "[1.0,0.0]"},
+        {"id": 2, "embedding": "[0.99,0.14]"},
+        {"id": 3, "embedding": "[0.8,-0.6]"},
+    ])
+    settings = MagicMock(SUPABASE_URL="http://localhost", SUPABASE_KEY="key")
+    with patch("src.memory.rag.create_client", return_value=supabase), \
+         patch("src.memory.rag.EmbeddingService") as service_cls:
+        service_cls.return_value.generate_embedding = AsyncMock(return_value=[1.0, 0.0])
+        rag = RAGSystem(settings, reranker=Reranker(lambda_mult=0.3, fetch_multiplier=3))
+
+    results = await rag.search_similar("query", limit=2)
+    await rag.search_similar("query", limit=1)
+
+    assert [r["content"] for r in results] == ["page", "other"]
+    assert supabase.rpc.call_args_list[0][0][1]["match_count"] == 6
+    embeddings_query.assert_called_once_with("id", [1, 2, 3])
+
+
+@pytest.mark.asyncio
+async def test_timed_out_scoring_is_stopped_and_skipped():
+    """After a timeout, scoring stops between batches and is skipped until it returns."""
+    batches = []
+
+    def slow(pairs):
+        batches.append(len(pairs))
+        time.sleep(0.1)
+        return [0.0] * len(pairs)
+
+    reranker = Reranker(lambda_mult=1.0, score_fn=slow, batch_size=1, latency_budget=0.01)
+    candidates = [{"content": "best"}, {"content": "next"}, {"content": "other"}]
+    embeddings = [[1.0, 0.0], [0.9, 0.1], [0.0, 1.0]]
+
+    await reranker.rerank("q", [1.0, 0.0], candidates, embeddings, 3)
+    await reranker.rerank("q", [1.0, 0.0], candidates, embeddings, 3)
+    await asyncio.sleep(0.15)
+
+    assert batches == [1]
+
+
+@pytest.mark.asyncio
+async def test_cross_encoder_loads_off_the_event_loop():
+    """The cross-encoder is built on the executor and used once ready."""
+    loaded_on = []
+
+    class FakeEncoder:
+        def __init__(self, name):
+            loaded_on.append(threading.current_thread())
+
+        def predict(self, pairs):
+            return [len(passage) for _, passage in pairs]
+
+    module = MagicMock(CrossEncoder=FakeEncoder)
+    reranker = Reranker(lambda_mult=1.0, cross_encoder_model="model")
+    with patch.dict("sys.modules", {"sentence_transformers": module}):
+        await reranker.warm_up()
+
+    candidates = [{"content": "a"}, {"content": "ccc"}]
+    ranked = await reranker.rerank("q", [1.0, 0.0], candidates, [[1.0, 0.0], [0.0, 1.0]], 2)
+
+    assert loaded_on and loaded_on[0] is not threading.main_thread()
+    assert [c["content"] for c in ranked] == ["ccc", "a"]
+
+
+def test_document_embedding_cache_is_bounded_in_bytes():
+    """Cached chunk embeddings are float32 and evicted by total size."""
+    settings = MagicMock(SUPABASE_URL="http://localhost", SUPABASE_KEY="key")
+    with patch("src.memory.rag.create_client"), patch("src.memory.rag.EmbeddingService"):
+        rag = RAGSystem(settings, embedding_cache_bytes=2 * 1536 * 4)
+
+    for doc_id in range(3):
+        rag._document_embeddings.set(doc_id, np.ones(1536, dtype=np.float32))
+
+    assert rag._document_embeddings.nbytes == 2 * 1536 * 4
+    assert rag._document_embeddings.get(0) is None
+    assert rag._document_embeddings.get(2).dtype == np.float32
@@ -0,0 +1,147 @@
+"""Conformance tests for the VectorIndex backends and the benchmark harness."""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.db.async_client import AsyncSupabase
+from src.rag.benchmark import benchmark_index, synthetic_corpus
+from src.rag.index import InMemoryIndex, VectorIndex, matches_filters
+from src.rag.reranking import Reranker
+from src.rag.storage import VectorStore
+from src.rag.supabase_index import SupabaseIndex
+
+
+def _documents():
+    return [
+        {"id": 1, "embedding": [1.0, 0.0, 0.0], "content": "alpha", "metadata": {"source": "docs", "rank": 1}},
+        {"id": 2, "embedding": [0.9, 0.1, 0.0], "content": "beta", "metadata": {"source": "blog", "rank": 2}},
+        {"id": 3, "embedding": [0.0, 1.0, 0.0], "content": "gamma", "metadata": {"source": "docs", "rank": 3}},
+    ]
+
+
+@pytest.fixture(params=["in-memory", "chroma", "qdrant"])
+async def index(request):
+    if request.param == "in-memory":
+        yield InMemoryIndex()
+    elif request.param == "chroma":
+        chromadb = pytest.importorskip("chromadb")
+        from src.rag.chroma_index import ChromaIndex
+        client = chromadb.EphemeralClient()
+        yield ChromaIndex(f"test-{id(request)}", client=client)
+    else:
+        qdrant_client = pytest.importorskip("qdrant_client")
+        from src.services.qdrant_service import QdrantService
+        service = QdrantService(
+            client=qdrant_client.AsyncQdrantClient(location=":memory:"),
+            collection_name="test",
+            payload_indexes={}
+        )
+        await service.create_collection(vector_size=3)
+        yield service
+        await service.close()
+
+
+@pytest.mark.asyncio
+async def test_backend_conforms(index):
+    assert isinstance(index, VectorIndex)
+    assert await index.upsert_batch(_documents()) == 3
+
+    results = await index.search([1.0, 0.0, 0.0], limit=2)
+    assert [str(r["id"]) for r in results] == ["1", "2"]
+    assert results[0]["content"] == "alpha"
+    assert results[0]["score"] == pytest.approx(1.0, abs=1e-5)
+
+    filtered = await index.search([1.0, 0.0, 0.0], limit=2, filters={"source": "docs"})
+    assert [str(r["id"]) for r in filtered] == ["1", "3"]
+
+    batches = await index.search_batch([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], limit=1)
+    assert [str(batch[0]["id"]) for batch in batches] == ["1", "3"]
+
+    ranked = await index.filter({"rank": {"gte": 2}})
+    assert sorted(str(r["id"]) for r in ranked) == ["2", "3"]
+
+    await index.delete([1])
+    results = await index.search([1.0, 0.0, 0.0], limit=1)
+    assert [str(r["id"]) for r in results] == ["2"]
+
+
+@pytest.mark.asyncio
+async def test_in_memory_upsert_replaces_and_grows():
+    index = InMemoryIndex(initial_capacity=1)
+    await index.upsert_batch(_documents())
+    await index.upsert_batch([{"id": 3, "embedding": [1.0, 0.0, 0.0], "content": "gamma v2"}])
+
+    assert len(index) == 3
+    results = await index.search([1.0, 0.0, 0.0], limit=3, score_threshold=0.999)
+    assert sorted(r["content"] for r in results) == ["alpha", "gamma v2"]
+
+
+def test_matches_filters():
+    metadata = {"source": "docs", "rank": 2}
+    assert matches_filters(metadata, {"metadata.source": ["docs", "blog"], "rank": {"gt": 1, "lte": 2}})
+    assert not matches_filters(metadata, {"source": "blog"})
+    assert not matches_filters(metadata, {"missing": {"gte": 0}})
+
+
+@pytest.mark.asyncio
+async def test_supabase_index_overfetches_filtered_search():
+    client = MagicMock()
+    client.rpc.return_value.execute.return_value = MagicMock(data=[
+        {"id": 1, "content": "alpha", "metadata": {"source": "blog"}, "similarity": 0.9},
+        {"id": 2, "content": "beta", "metadata": {"source": "docs"}, "similarity": 0.8},
+    ])
+    index = SupabaseIndex(AsyncSupabase(client), filter_overfetch=3)
+
+    results = await index.search([1.0, 0.0], limit=1, filters={"source": "docs"})
+
+    assert results == [{"id": 2, "content": "beta", "metadata": {"source": "docs"}, "score": 0.8}]
+    assert client.rpc.call_args[0][1]["match_count"] == 3
+
+
+@pytest.mark.asyncio
+async def test_benchmark_reports_exact_recall_for_in_memory():
+    corpus = synthetic_corpus(size=300, dimension=16, queries=10, clusters=5, k=5)
+
+    result = await benchmark_index("in-memory", InMemoryIndex(), corpus)
+
+    assert result.recall == pytest.approx(1.0)
+    assert result.documents == 300
+    assert len(result.latencies) == 10
+
+
+@pytest.mark.asyncio
+async def test_vector_store_writes_through_the_index():
+    """VectorStore keeps no vectors of its own; the index holds them."""
+
+    vectors = {"alpha": [1.0, 0.0], "beta": [0.0, 1.0], "query": [0.9, 0.1]}
+    generator = MagicMock()
+    generator.generate = AsyncMock(side_effect=lambda text: vectors[text])
+    index = InMemoryIndex()
+    store = VectorStore(generator, index=index)
+
+    await store.add_document("alpha", {"source": "docs"})
+    await store.add_document("beta")
+    results = await store.search("query", limit=1)
+
+    assert len(index) == 2
+    assert [(r.content, r.metadata) for r in results] == [("alpha", {"source": "docs"})]
+
+
+@pytest.mark.asyncio
+async def test_vector_store_ids_are_stable_across_processes():
+    """A second store on the same index upserts documents instead of overwriting others."""
+    vectors = {"alpha": [1.0, 0.0], "beta": [0.0, 1.0], "alpha copy": [0.99, 0.14], "query": [1.0, 0.0]}
+    generator = MagicMock()
+    generator.generate = AsyncMock(side_effect=lambda text: vectors[text])
+    index = InMemoryIndex()
+
+    first = VectorStore(generator, index=index)
+    await first.add_document("alpha", {"source": "docs"})
+    await first.add_document("beta")
+    restarted = VectorStore(generator, reranker=Reranker(lambda_mult=0.3), index=index)
+    await restarted.add_document("alpha", {"source": "docs"})
+    await restarted.add_document("alpha copy")
+    results = await restarted.search("query", limit=2)
+
+    assert len(index) == 3
+    assert [r.content for r in results] == ["alpha", "beta"]
@@ -27,10 +27,18 @@ class EmbeddingService:
             console.print(f"[error]Erro ao gerar embedding: {e}[/error]")
             raise
     
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
     async def generate_batch_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Gera embeddings para uma lista de textos"""
-        embeddings = []
-        for text in texts:
-            embedding = await self.generate_embedding(text)
-            embeddings.append(embedding)
-        return embeddings 
\ No newline at end of file
+        """Gera embeddings para uma lista de textos num único pedido"""
+        if not texts:
+            return []
+        try:
+            response = await self.client.embeddings.create(
+                input=texts,
+                model=self.model
+            )
+            # A API devolve os embeddings com o índice do texto de entrada
+            return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+        except Exception as e:
+            console.print(f"[error]Erro ao gerar embeddings em lote: {e}[/error]")
+            raise 
\ No newline at end of file
@@ -0,0 +1,151 @@
+"""Indexed episodic memory module."""
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from .journal import MemoryJournal
+
+Timestamp = Union[str, datetime]
+
+
+def _as_timestamp(value: Timestamp) -> str:
+    """Normalize a datetime or ISO string to the stored timestamp format."""
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class _TimeIndex:
+    """Sorted timestamps with the journal offset of each entry."""
+
+    def __init__(self, timestamps: Optional[List[str]] = None, offsets: Optional[List[int]] = None):
+        self.timestamps: List[str] = timestamps or []
+        self.offsets: List[int] = offsets or []
+
+    def add(self, timestamp: str, offset: int):
+        # Entries normally arrive in time order, so this is an append
+        if not self.timestamps or timestamp >= self.timestamps[-1]:
+            self.timestamps.append(timestamp)
+            self.offsets.append(offset)
+            return
+        position = bisect_right(self.timestamps, timestamp)
+        self.timestamps.insert(position, timestamp)
+        self.offsets.insert(position, offset)
+
+    def range(self, since: Optional[str], until: Optional[str], limit: Optional[int]) -> List[int]:
+        start = 0 if since is None else bisect_left(self.timestamps, since)
+        end = len(self.timestamps) if until is None else bisect_right(self.timestamps, until)
+        if limit is not None:
+            start = max(start, end - limit)
+        return self.offsets[start:end]
+
+
+class EpisodicStore:
+    """Episodic memory kept on disk and indexed by type and time.
+
+    Entry bodies live only in an append-only log; RAM holds per-type sorted
+    timestamp arrays with the byte offset of each entry plus a small LRU of
+    recently read bodies.
+    """
+
+    def __init__(self, log_file: Path, cache_size: int = 256, **journal_options):
+        """Initialize episodic storage.
+
+        Args:
+            log_file: Append-only log holding one entry per line
+            cache_size: Entry bodies kept in the LRU cache
+            **journal_options: fsync batching options for the log
+        """
+        self.log = MemoryJournal(log_file, journal_file=log_file, **journal_options)
+        self.cache_size = cache_size
+        self._all = _TimeIndex()
+        self._by_type: Dict[str, _TimeIndex] = {}
+        self._cache: "OrderedDict[int, Dict]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._all.offsets)
+
+    def load(self, state: Optional[Dict] = None):
+        """Restore the index from a snapshot and index entries logged after it."""
+        state = state or {}
+        self._by_type = {
+            event_type: _TimeIndex(list(index[0]), list(index[1]))
+            for event_type, index in state.get("index", {}).items()
+        }
+        merged = sorted(
+            pair
+            for index in self._by_type.values()
+            for pair in zip(index.timestamps, index.offsets)
+        )
+        self._all = _TimeIndex([pair[0] for pair in merged], [pair[1] for pair in merged])
+
+        for offset, entry in self.log.replay(start=state.get("end", 0)):
+            self._index(entry, offset)
+
+    def state(self) -> Dict:
+        """Index snapshot; the log itself is never rewritten."""
+        self.log.sync()
+        return {
+            "end": self.log.size(),
+            "index": {
+                event_type: [list(index.timestamps), list(index.offsets)]
+                for event_type, index in self._by_type.items()
+            }
+        }
+
+    def _index(self, entry: Dict, offset: int):
+        self._all.add(entry["timestamp"], offset)
+        self._by_type.setdefault(entry["type"], _TimeIndex()).add(entry["timestamp"], offset)
+
+    def append(self, entry: Dict):
+        """Log an entry and index it."""
+        offset = self.log.append(entry)
+        self._index(entry, offset)
+        self._remember(offset, entry)
+
+    def query(
+        self,
+        event_type: Optional[str] = None,
+        since: Optional[Timestamp] = None,
+        until: Optional[Timestamp] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """Return entries in time order within [since, until], O(log n + k).
+
+        When ``limit`` is given the most recent ``limit`` matches are returned.
+        """
+        index = self._all if event_type is None else self._by_type.get(event_type)
+        if index is None:
+            return []
+
+        offsets = index.range(
+            None if since is None else _as_timestamp(since),
+            None if until is None else _as_timestamp(until),
+            limit
+        )
+        return self._load(offsets)
+
+    def _load(self, offsets: List[int]) -> List[Dict]:
+        entries = {}
+        for offset in offsets:
+            if offset in self._cache:
+                self._cache.move_to_end(offset)
+                entries[offset] = self._cache[offset]
+
+        missing = [offset for offset in offsets if offset not in entries]
+        if missing:
+            for offset, entry in zip(missing, self.log.read_many(missing)):
+                entries[offset] = entry
+                self._remember(offset, entry)
+
+        return [entries[offset] for offset in offsets]
+
+    def _remember(self, offset: int, entry: Dict):
+        self._cache[offset] = entry
+        self._cache.move_to_end(offset)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def close(self):
+        """Sync and close the log."""
+        self.log.close()
@@ -0,0 +1,170 @@
+"""Append-only journal storage module."""
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class MemoryJournal:
+    """Append-only JSON Lines journal with snapshot and compaction.
+
+    Every change is appended as one JSON record to the journal. Records are
+    fsynced in batches, and once the journal grows past ``compact_after``
+    records the caller writes a fresh snapshot and the journal is truncated.
+    Records carry a log sequence number so a crash between writing the
+    snapshot and truncating the journal never replays a record twice.
+    """
+
+    def __init__(
+        self,
+        snapshot_file: Path,
+        journal_file: Optional[Path] = None,
+        fsync_every: int = 32,
+        fsync_interval: float = 1.0,
+        compact_after: int = 1000
+    ):
+        """Initialize journal storage.
+
+        Args:
+            snapshot_file: Compact JSON snapshot of the full state
+            journal_file: Journal path, defaults to the snapshot with a .journal suffix
+            fsync_every: Records buffered before forcing an fsync
+            fsync_interval: Seconds after which pending records are fsynced
+            compact_after: Journal records that trigger compaction
+        """
+        self.snapshot_file = Path(snapshot_file)
+        self.journal_file = Path(journal_file or self.snapshot_file.with_suffix(".journal"))
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_after = compact_after
+
+        self.records = 0
+        self.lsn = 0
+        self._snapshot_lsn = 0
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._handle = None
+
+    def load_snapshot(self) -> Dict:
+        """Load the last snapshot, or an empty state if there is none."""
+        if not self.snapshot_file.exists():
+            return {}
+        state = json.loads(self.snapshot_file.read_text())
+        self._snapshot_lsn = self.lsn = state.pop("lsn", 0)
+        return state
+
+    def replay(self, start: int = 0) -> Iterator[Tuple[int, Dict]]:
+        """Yield (offset, record) for every complete record in the journal.
+
+        A torn final line left by a crash is ignored and truncated away so
+        later appends start on a clean record boundary.
+
+        Args:
+            start: Byte offset to resume from, e.g. the end recorded in a snapshot
+        """
+        self.records = 0
+        if not self.journal_file.exists():
+            return
+
+        valid_end = start
+        with open(self.journal_file, "rb") as f:
+            f.seek(start)
+            for line in f:
+                offset = valid_end
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                valid_end += len(line)
+                self.records += 1
+                lsn = record.pop("lsn", 0)
+                if lsn and lsn <= self._snapshot_lsn:
+                    continue
+                self.lsn = max(self.lsn, lsn)
+                yield offset, record
+
+        if valid_end < self.journal_file.stat().st_size:
+            with open(self.journal_file, "r+b") as f:
+                f.truncate(valid_end)
+
+    def read_at(self, offset: int) -> Dict:
+        """Read the record stored at a byte offset."""
+        return self.read_many([offset])[0]
+
+    def read_many(self, offsets: Iterable[int]) -> List[Dict]:
+        """Read the records stored at several byte offsets with one open."""
+        self._flush_buffer()
+        records = []
+        with open(self.journal_file, "rb") as f:
+            for offset in offsets:
+                f.seek(offset)
+                record = json.loads(f.readline())
+                record.pop("lsn", None)
+                records.append(record)
+        return records
+
+    def size(self) -> int:
+        """Byte length of the journal including buffered records."""
+        if self._handle is not None:
+            return self._handle.tell()
+        return self.journal_file.stat().st_size if self.journal_file.exists() else 0
+
+    def append(self, record: Dict) -> int:
+        """Append a record and return its byte offset in the journal."""
+        if self._handle is None:
+            self._handle = open(self.journal_file, "ab")
+
+        self.lsn += 1
+        offset = self._handle.tell()
+        line = json.dumps({**record, "lsn": self.lsn}, separators=(",", ":"))
+        self._handle.write(line.encode() + b"\n")
+        self.records += 1
+        self._pending += 1
+
+        if (
+            self._pending >= self.fsync_every
+            or time.monotonic() - self._last_sync >= self.fsync_interval
+        ):
+            self.sync()
+        return offset
+
+    def needs_compaction(self) -> bool:
+        """Whether the journal has grown enough to be folded into a snapshot."""
+        return self.records >= self.compact_after
+
+    def _flush_buffer(self):
+        if self._handle is not None:
+            self._handle.flush()
+
+    def sync(self):
+        """Flush and fsync pending records."""
+        if self._handle is not None and self._pending:
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def compact(self, state: Dict):
+        """Atomically write a snapshot of ``state`` and truncate the journal."""
+        tmp_file = self.snapshot_file.with_suffix(".tmp")
+        with open(tmp_file, "w") as f:
+            json.dump({**state, "lsn": self.lsn}, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.snapshot_file)
+        self._snapshot_lsn = self.lsn
+
+        self.close()
+        with open(self.journal_file, "wb") as f:
+            os.fsync(f.fileno())
+        self.records = 0
+
+    def close(self):
+        """Sync and close the journal handle."""
+        self.sync()
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
@@ -1,9 +1,12 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from pathlib import Path
+import atexit
 import json
 from rich.console import Console
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
+from .episodic import EpisodicStore, Timestamp
+from .journal import MemoryJournal
 from .rag import RAGSystem
 
 console = Console()
@@ -17,41 +20,110 @@ class Memory(BaseModel):
         "values": "Privacidade, transparência e crescimento contínuo são minhas prioridades"
     }
     
-    episodic_memory: List[Dict] = []
     semantic_memory: Dict[str, Dict] = {}
     memory_file: Path = Path.home() / ".synapse_memory.json"
     
+    # Snapshot em memory_file mais um journal append-only ao lado
+    _journal: MemoryJournal = PrivateAttr()
+    # Memória episódica em log próprio, indexada por tipo e tempo
+    _episodes: EpisodicStore = PrivateAttr()
+    # Acessos pendentes (categoria, conceito) -> timestamp, escritos de forma preguiçosa
+    _pending_access: Dict[Tuple[str, str], str] = PrivateAttr(default_factory=dict)
+    
     def __init__(self):
         """Inicializa ou carrega memória existente"""
         super().__init__()
         self.rag = RAGSystem()
+        self._journal = MemoryJournal(self.memory_file)
+        self._episodes = EpisodicStore(self.memory_file.with_suffix(".episodes"))
         self.load_memory()
+        atexit.register(self.close)
     
     def load_memory(self):
-        """Carrega memória do arquivo"""
+        """Carrega o snapshot e reaplica o journal"""
         try:
-            if self.memory_file.exists():
-                data = json.loads(self.memory_file.read_text())
-                self.episodic_memory = data.get("episodic", [])
-                self.semantic_memory = data.get("semantic", {})
+            existed = self.memory_file.exists() or self._journal.journal_file.exists()
+            data = self._journal.load_snapshot()
+            self.semantic_memory = data.get("semantic", {})
+            self._episodes.load(data.get("episodes"))
+            
+            # Experiências no formato antigo migram para o log episódico
+            legacy = data.get("episodic", [])
+            for _, record in self._journal.replay():
+                if record["op"] == "experience":
+                    legacy.append(record["entry"])
+                else:
+                    self._apply_record(record)
+            
+            if legacy:
+                for entry in legacy:
+                    self._episodes.append(entry)
+                self.compact_memory()
+            
+            if existed:
                 console.print("[info]Memória carregada com sucesso[/info]")
             else:
-                self.save_memory()
                 console.print("[info]Nova memória inicializada[/info]")
         except Exception as e:
             console.print(f"[error]Erro ao carregar memória: {e}[/error]")
     
+    def _apply_record(self, record: Dict):
+        """Aplica um registo do journal ao estado em memória"""
+        op = record["op"]
+        if op == "concept":
+            self.semantic_memory.setdefault(record["category"], {})[record["concept"]] = record["info"]
+        elif op == "access":
+            info = self.semantic_memory.get(record["category"], {}).get(record["concept"])
+            if info:
+                info["last_accessed"] = record["at"]
+    
+    def _append(self, record: Dict):
+        """Escreve um registo no journal, compactando quando necessário"""
+        try:
+            self._flush_access()
+            self._journal.append(record)
+            if self._journal.needs_compaction():
+                self.compact_memory()
+        except Exception as e:
+            console.print(f"[error]Erro ao salvar memória: {e}[/error]")
+    
+    def _flush_access(self):
+        """Escreve os acessos pendentes como registos coalescidos"""
+        pending, self._pending_access = self._pending_access, {}
+        for (category, concept), accessed_at in pending.items():
+            self._journal.append({
+                "op": "access",
+                "category": category,
+                "concept": concept,
+                "at": accessed_at
+            })
+    
     def save_memory(self):
-        """Salva memória no arquivo"""
+        """Garante que todas as alterações pendentes estão em disco"""
         try:
-            data = {
-                "episodic": self.episodic_memory,
-                "semantic": self.semantic_memory
-            }
-            self.memory_file.write_text(json.dumps(data, indent=2))
+            self._flush_access()
+            self._journal.sync()
+            self._episodes.log.sync()
         except Exception as e:
             console.print(f"[error]Erro ao salvar memória: {e}[/error]")
     
+    def compact_memory(self):
+        """Grava um snapshot compacto e trunca o journal"""
+        try:
+            self._pending_access.clear()
+            self._journal.compact({
+                "semantic": self.semantic_memory,
+                "episodes": self._episodes.state()
+            })
+        except Exception as e:
+            console.print(f"[error]Erro ao compactar memória: {e}[/error]")
+    
+    def close(self):
+        """Escreve acessos pendentes e fecha o journal"""
+        self.save_memory()
+        self._journal.close()
+        self._episodes.close()
+    
     async def add_experience(self, event_type: str, details: Dict):
         """Adiciona nova experiência à memória episódica e RAG"""
         # Adicionar à memória episódica
@@ -60,38 +132,49 @@ class Memory(BaseModel):
             "type": event_type,
             "details": details
         }
-        self.episodic_memory.append(experience)
+        try:
+            self._episodes.append(experience)
+        except Exception as e:
+            console.print(f"[error]Erro ao salvar memória: {e}[/error]")
         
         # Indexar no RAG
         text = json.dumps(details)  # Converter detalhes em texto
         await self.rag.index_document(text, {"type": event_type})
-        
-        self.save_memory()
     
     def learn_concept(self, category: str, concept: str, details: Dict):
         """Adiciona novo conhecimento à memória semântica"""
         if category not in self.semantic_memory:
             self.semantic_memory[category] = {}
         
-        self.semantic_memory[category][concept] = {
+        info = {
             "details": details,
             "learned_at": datetime.now().isoformat(),
             "last_accessed": datetime.now().isoformat()
         }
-        self.save_memory()
+        self.semantic_memory[category][concept] = info
+        self._pending_access.pop((category, concept), None)
+        self._append({"op": "concept", "category": category, "concept": concept, "info": info})
     
-    def recall_experiences(self, event_type: Optional[str] = None) -> List[Dict]:
-        """Recupera experiências da memória episódica"""
-        if event_type:
-            return [e for e in self.episodic_memory if e["type"] == event_type]
-        return self.episodic_memory
+    def recall_experiences(
+        self,
+        event_type: Optional[str] = None,
+        since: Optional[Timestamp] = None,
+        until: Optional[Timestamp] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """Recupera experiências da memória episódica por tipo e intervalo de tempo
+        
+        Devolve por ordem cronológica; com limit, as mais recentes do intervalo.
+        """
+        return self._episodes.query(event_type, since, until, limit)
     
     def recall_concept(self, category: str, concept: str) -> Optional[Dict]:
         """Recupera conhecimento da memória semântica"""
         if category in self.semantic_memory and concept in self.semantic_memory[category]:
             info = self.semantic_memory[category][concept]
             info["last_accessed"] = datetime.now().isoformat()
-            self.save_memory()
+            # Coalescido: só o último acesso é escrito no próximo save_memory
+            self._pending_access[(category, concept)] = info["last_accessed"]
             return info
         return None 
     
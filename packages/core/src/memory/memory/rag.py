@@ -1,25 +1,164 @@
 """RAG system module."""
 import os
-from typing import List, Dict, Optional
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Dict, Hashable, Iterable, Optional
 from supabase import create_client, Client
 from datetime import datetime
 import numpy as np
 from rich.console import Console
 from .embeddings import EmbeddingService
 from src.config.settings import Settings
+from src.db.async_client import AsyncSupabase
+from src.rag.chunking import TextChunker
+from src.rag.reranking import Reranker
 
 console = Console()
 
+_DONE = object()
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for cache lookups."""
+    return " ".join(query.lower().split())
+
+
+def _parse_vector(value: Any) -> np.ndarray:
+    """pgvector columns come back from PostgREST as "[0.1,0.2,...]" strings."""
+    if isinstance(value, str):
+        value = json.loads(value)
+    return np.asarray(value, dtype=np.float32)
+
+
+class _LRUCache:
+    """Small LRU cache with per-entry expiry."""
+    
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+    
+    def set(self, key: Hashable, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def clear(self):
+        self._entries.clear()
+
+
+class _VectorCache:
+    """LRU cache of float32 vectors bounded by their total size in bytes."""
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries: "OrderedDict[Hashable, np.ndarray]" = OrderedDict()
+    
+    def get(self, key: Hashable) -> Optional[np.ndarray]:
+        vector = self._entries.get(key)
+        if vector is not None:
+            self._entries.move_to_end(key)
+        return vector
+    
+    def set(self, key: Hashable, vector: np.ndarray):
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.nbytes -= previous.nbytes
+        self._entries[key] = vector
+        self.nbytes += vector.nbytes
+        while self.nbytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+    
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+
+
+@dataclass
+class BulkIndexReport:
+    """Progress and outcome of a bulk indexing run."""
+    documents: int = 0
+    chunks: int = 0
+    embedded: int = 0
+    inserted: int = 0
+    embed_batches: int = 0
+    insert_batches: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+    failures: Dict[Any, str] = field(default_factory=dict)
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the run started."""
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        """Inserted chunks per second."""
+        return self.inserted / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def succeeded(self) -> int:
+        """Documents with every chunk inserted."""
+        return self.documents - len(self.failures)
+
 class RAGSystem:
     """Retrieval Augmented Generation System"""
     
-    def __init__(self, settings: Settings):
-        """Initialize RAG system with settings."""
+    def __init__(
+        self,
+        settings: Settings,
+        cache_size: int = 1024,
+        cache_ttl: float = 300.0,
+        reranker: Optional[Reranker] = None,
+        embedding_cache_bytes: int = 64 * 1024 * 1024
+    ):
+        """Initialize RAG system with settings.
+        
+        Args:
+            settings: Application settings
+            cache_size: Query embeddings and result sets kept in memory
+            cache_ttl: Seconds a cached entry stays valid, bounding staleness
+                from documents indexed by other processes
+            reranker: Optional second stage; search then over-fetches
+                candidates and re-ranks them down to the requested limit
+            embedding_cache_bytes: Memory budget for cached chunk embeddings,
+                stored as float32 (6 KB each at 1536 dimensions)
+        """
         self.supabase: Client = create_client(
             supabase_url=settings.SUPABASE_URL,
             supabase_key=settings.SUPABASE_KEY
         )
+        self.db = AsyncSupabase(self.supabase)
         self.embedding_service = EmbeddingService()
+        self.chunker = TextChunker()
+        
+        # Query embeddings do not depend on the corpus; result sets are tagged
+        # with the corpus version and ignored once it moves on
+        self.corpus_version = 0
+        self._embedding_cache = _LRUCache(cache_size, cache_ttl)
+        self._result_cache = _LRUCache(cache_size, cache_ttl)
+        
+        # Stored chunk embeddings never change, so they are cached by id
+        self.reranker = reranker
+        self._document_embeddings = _VectorCache(embedding_cache_bytes)
         
     async def index_document(self, text: str, metadata: Dict) -> bool:
         """Index a document in the vector store.
@@ -43,43 +182,236 @@ class RAGSystem:
                 "created_at": datetime.now().isoformat()
             }
             
-            result = self.supabase.table("documents").insert(data).execute()
+            result = await self.db.execute(self.supabase.table("documents").insert(data))
+            self.corpus_version += 1
             return True if result.data else False
             
         except Exception as e:
             console.print(f"[error]Error indexing document: {e}[/error]")
             return False
     
-    async def search_similar(self, query: str, limit: int = 5) -> List[Dict]:
+    async def index_documents_bulk(
+        self,
+        documents: Iterable[Dict],
+        embed_batch_size: int = 64,
+        insert_batch_size: int = 500,
+        queue_size: int = 1024,
+        insert_workers: int = 2,
+        on_progress: Optional[Callable[[BulkIndexReport], None]] = None
+    ) -> BulkIndexReport:
+        """Index many documents through an overlapped chunk/embed/insert pipeline.
+        
+        Chunking, embedding and inserting run as concurrent stages connected
+        by bounded queues, so memory stays flat for any input size. Inserts
+        go to Supabase in batches through the shared async access layer.
+        
+        Args:
+            documents: Dicts with ``content``, optional ``metadata`` and ``id``
+            embed_batch_size: Chunks per embedding request
+            insert_batch_size: Rows per Supabase insert
+            queue_size: Capacity of each inter-stage queue
+            insert_workers: Concurrent insert batches
+            on_progress: Called with the report after every insert batch
+            
+        Returns:
+            Report with counts, throughput and per-document failures,
+            keyed by document ``id`` or position
+        """
+        report = BulkIndexReport()
+        chunk_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        row_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        
+        def fail(keys: Iterable[Any], error: Exception):
+            for key in keys:
+                report.failures.setdefault(key, str(error))
+        
+        async def drain(queue: asyncio.Queue, size: int) -> List:
+            # Wait for one item, then take whatever else is ready up to size
+            batch = [await queue.get()]
+            while len(batch) < size and batch[-1] is not _DONE and not queue.empty():
+                batch.append(queue.get_nowait())
+            return batch
+        
+        async def chunk_stage():
+            try:
+                for position, document in enumerate(documents):
+                    key = document.get("id", position)
+                    report.documents += 1
+                    try:
+                        chunks = self.chunker.split_text(document["content"])
+                    except Exception as e:
+                        fail([key], e)
+                        continue
+                    metadata = document.get("metadata", {})
+                    for chunk in chunks:
+                        report.chunks += 1
+                        await chunk_queue.put((key, chunk.text, {**metadata, **chunk.metadata}))
+            finally:
+                await chunk_queue.put(_DONE)
+        
+        async def embed_stage():
+            try:
+                await embed_batches()
+            finally:
+                for _ in range(insert_workers):
+                    await row_queue.put(_DONE)
+        
+        async def embed_batches():
+            done = False
+            while not done:
+                batch = await drain(chunk_queue, embed_batch_size)
+                if batch[-1] is _DONE:
+                    batch.pop()
+                    done = True
+                batch = [item for item in batch if item[0] not in report.failures]
+                if not batch:
+                    continue
+                try:
+                    embeddings = await self.embedding_service.generate_batch_embeddings(
+                        [chunk for _, chunk, _ in batch]
+                    )
+                except Exception as e:
+                    fail({key for key, _, _ in batch}, e)
+                    continue
+                report.embedded += len(batch)
+                report.embed_batches += 1
+                created_at = datetime.now().isoformat()
+                for (key, chunk, metadata), embedding in zip(batch, embeddings):
+                    await row_queue.put((key, {
+                        "content": chunk,
+                        "embedding": embedding,
+                        "metadata": metadata,
+                        "created_at": created_at
+                    }))
+        
+        async def insert_stage():
+            done = False
+            while not done:
+                batch = await drain(row_queue, insert_batch_size)
+                if batch[-1] is _DONE:
+                    batch.pop()
+                    done = True
+                if not batch:
+                    continue
+                rows = [row for _, row in batch]
+                try:
+                    await self.db.execute(self.supabase.table("documents").insert(rows))
+                except Exception as e:
+                    fail({key for key, _ in batch}, e)
+                    continue
+                self.corpus_version += 1
+                report.inserted += len(rows)
+                report.insert_batches += 1
+                if on_progress:
+                    on_progress(report)
+        
+        try:
+            await asyncio.gather(
+                chunk_stage(),
+                embed_stage(),
+                *(insert_stage() for _ in range(insert_workers))
+            )
+        finally:
+            report.finished_at = time.monotonic()
+        
+        console.print(
+            f"[info]Indexed {report.inserted}/{report.chunks} chunks from "
+            f"{report.succeeded}/{report.documents} documents "
+            f"({report.throughput:.1f} chunks/s)[/info]"
+        )
+        return report
+    
+    async def embed_query(self, query: str) -> List[float]:
+        """Embed a query, reusing the embedding of an identical normalized query."""
+        key = normalize_query(query)
+        embedding = self._embedding_cache.get(key)
+        if embedding is None:
+            embedding = await self.embedding_service.generate_embedding(query)
+            self._embedding_cache.set(key, embedding)
+        return embedding
+    
+    async def search_similar(
+        self,
+        query: str,
+        limit: int = 5,
+        threshold: float = 0.7
+    ) -> List[Dict]:
         """Search for similar documents based on query.
         
+        Results are cached per (normalized query, threshold, limit) until the
+        corpus version changes or the entry expires. With a re-ranker the
+        search over-fetches candidates and re-ranks them with MMR on their
+        stored embeddings.
+        
         Args:
             query: Search query
             limit: Maximum number of results
+            threshold: Minimum similarity
             
         Returns:
             List of similar documents
         """
         try:
-            # Generate query embedding
-            query_embedding = await self.embedding_service.generate_embedding(query)
+            key = (normalize_query(query), threshold, limit)
+            cached = self._result_cache.get(key)
+            if cached is not None and cached[0] == self.corpus_version:
+                return list(cached[1])
+            
+            version = self.corpus_version
+            query_embedding = await self.embed_query(query)
             
             # Perform similarity search
-            result = self.supabase.rpc(
+            result = await self.db.execute(self.supabase.rpc(
                 'match_documents',
                 {
                     'query_embedding': query_embedding,
-                    'match_threshold': 0.7,
-                    'match_count': limit
+                    'match_threshold': threshold,
+                    'match_count': self.reranker.fetch_k(limit) if self.reranker else limit
                 }
-            ).execute()
+            ))
+            documents = result.data
+            
+            if self.reranker and documents:
+                embeddings = await self._candidate_embeddings(documents)
+                # Rows deleted since the match have no embedding left
+                kept = [i for i, embedding in enumerate(embeddings) if embedding is not None]
+                documents = await self.reranker.rerank(
+                    query,
+                    query_embedding,
+                    [documents[i] for i in kept],
+                    [embeddings[i] for i in kept],
+                    limit
+                )
             
-            return result.data
+            self._result_cache.set(key, (version, documents))
+            return documents
             
         except Exception as e:
             console.print(f"[error]Search error: {e}[/error]")
             return []
     
+    async def _candidate_embeddings(self, documents: List[Dict]) -> List[Optional[np.ndarray]]:
+        """Embeddings of matched documents, fetching the uncached ones in one query."""
+        embeddings: Dict[Any, Optional[np.ndarray]] = {}
+        for document in documents:
+            if "embedding" in document:
+                embeddings[document["id"]] = _parse_vector(document["embedding"])
+                self._document_embeddings.set(document["id"], embeddings[document["id"]])
+            else:
+                embeddings[document["id"]] = self._document_embeddings.get(document["id"])
+        
+        missing = [doc_id for doc_id, embedding in embeddings.items() if embedding is None]
+        if missing:
+            result = await self.db.execute(
+                self.supabase.table("documents").select("id, embedding").in_("id", missing)
+            )
+            for row in result.data or []:
+                embeddings[row["id"]] = _parse_vector(row["embedding"])
+                self._document_embeddings.set(row["id"], embeddings[row["id"]])
+        
+        # Read from the local map: a small budget may already have evicted some
+        return [embeddings[document["id"]] for document in documents]
+    
     async def query(self, query: str) -> Dict[str, str]:
         """Query the RAG system.
         
@@ -95,16 +427,23 @@ class RAGSystem:
             "context": context
         }
     
-    async def get_context(self, query: str) -> str:
+    async def get_context(
+        self,
+        query: str,
+        limit: int = 5,
+        threshold: float = 0.7
+    ) -> str:
         """Get relevant context for a query.
         
         Args:
             query: Search query
+            limit: Maximum number of documents
+            threshold: Minimum similarity
             
         Returns:
             Concatenated relevant documents
         """
-        documents = await self.search_similar(query)
+        documents = await self.search_similar(query, limit, threshold)
         
         if not documents:
             return ""
@@ -0,0 +1,211 @@
+"""Benchmark harness comparing vector index backends on one synthetic corpus.
+
+Run with ``python -m src.rag.benchmark``; backends whose client library is
+not installed are skipped. ``SupabaseIndex`` needs a live database, so it is
+benchmarked by passing its own factory to ``run_benchmarks``.
+"""
+import argparse
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Sequence
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+from .index import Document, InMemoryIndex, VectorIndex
+
+console = Console()
+
+
+@dataclass
+class SyntheticCorpus:
+    """Clustered random documents plus noisy queries and exact neighbours."""
+    documents: List[Document]
+    queries: np.ndarray
+    ground_truth: List[List[int]]
+    k: int
+
+
+@dataclass
+class BenchmarkResult:
+    """Measurements for one backend."""
+    backend: str
+    documents: int
+    ingest_seconds: float
+    latencies: List[float]
+    batch_seconds: float
+    recall: float
+
+    @property
+    def ingest_throughput(self) -> float:
+        """Documents indexed per second."""
+        return self.documents / self.ingest_seconds if self.ingest_seconds > 0 else 0.0
+
+    def latency_ms(self, percentile: float) -> float:
+        """Single-query latency percentile in milliseconds."""
+        return float(np.percentile(self.latencies, percentile)) * 1000 if self.latencies else 0.0
+
+
+def synthetic_corpus(
+    size: int = 5000,
+    dimension: int = 128,
+    queries: int = 100,
+    clusters: int = 50,
+    k: int = 10,
+    seed: int = 0
+) -> SyntheticCorpus:
+    """Build a reproducible corpus with exact top-k answers for every query.
+
+    Documents are drawn around cluster centres so neighbourhoods look like
+    real embeddings rather than uniform noise; queries are perturbed copies
+    of random documents.
+    """
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dimension))
+    labels = rng.integers(0, clusters, size=size)
+    vectors = centres[labels] + 0.5 * rng.normal(size=(size, dimension))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    query_vectors = vectors[rng.integers(0, size, size=queries)] + 0.1 * rng.normal(size=(queries, dimension))
+    query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True)
+
+    exact = np.argsort(-(query_vectors @ vectors.T), axis=1)[:, :k]
+    documents = [
+        {
+            "id": i,
+            "embedding": vectors[i].astype(np.float32).tolist(),
+            "content": f"document {i}",
+            "metadata": {"cluster": int(labels[i]), "source": f"source-{i % 5}"}
+        }
+        for i in range(size)
+    ]
+    return SyntheticCorpus(documents, query_vectors, exact.tolist(), k)
+
+
+def _ids(results: Sequence[Document]) -> List[int]:
+    # Some backends return ids as strings
+    return [int(result["id"]) for result in results]
+
+
+async def benchmark_index(
+    name: str,
+    index: VectorIndex,
+    corpus: SyntheticCorpus,
+    batch_size: int = 500
+) -> BenchmarkResult:
+    """Ingest the corpus into an empty index and measure queries against it."""
+    started = time.perf_counter()
+    for start in range(0, len(corpus.documents), batch_size):
+        await index.upsert_batch(corpus.documents[start:start + batch_size])
+    ingest_seconds = time.perf_counter() - started
+
+    latencies = []
+    hits = 0
+    for query, expected in zip(corpus.queries, corpus.ground_truth):
+        started = time.perf_counter()
+        results = await index.search(query.tolist(), limit=corpus.k)
+        latencies.append(time.perf_counter() - started)
+        hits += len(set(_ids(results)) & set(expected))
+
+    started = time.perf_counter()
+    await index.search_batch(corpus.queries.tolist(), limit=corpus.k)
+    batch_seconds = time.perf_counter() - started
+
+    return BenchmarkResult(
+        backend=name,
+        documents=len(corpus.documents),
+        ingest_seconds=ingest_seconds,
+        latencies=latencies,
+        batch_seconds=batch_seconds,
+        recall=hits / (len(corpus.ground_truth) * corpus.k)
+    )
+
+
+async def run_benchmarks(
+    factories: Dict[str, Callable[[int], Awaitable[VectorIndex]]],
+    corpus: SyntheticCorpus
+) -> List[BenchmarkResult]:
+    """Run every backend in turn on the same corpus.
+
+    Args:
+        factories: Backend name to an async factory taking the embedding size
+        corpus: Shared synthetic corpus
+    """
+    dimension = len(corpus.documents[0]["embedding"])
+    results = []
+    for name, factory in factories.items():
+        index = await factory(dimension)
+        results.append(await benchmark_index(name, index, corpus))
+    return results
+
+
+def print_report(results: List[BenchmarkResult]):
+    """Print results as a table."""
+    table = Table(title="Vector index benchmark")
+    for column in ("Backend", "Ingest docs/s", "p50 ms", "p95 ms", "Batch ms", "Recall@k"):
+        table.add_column(column, justify="right" if column != "Backend" else "left")
+    for result in results:
+        table.add_row(
+            result.backend,
+            f"{result.ingest_throughput:,.0f}",
+            f"{result.latency_ms(50):.2f}",
+            f"{result.latency_ms(95):.2f}",
+            f"{result.batch_seconds * 1000:.1f}",
+            f"{result.recall:.3f}"
+        )
+    console.print(table)
+
+
+def _default_factories() -> Dict[str, Callable[[int], Awaitable[VectorIndex]]]:
+    async def in_memory(dimension: int):
+        return InMemoryIndex(dimension)
+
+    factories = {"in-memory": in_memory}
+
+    try:
+        import chromadb
+        from .chroma_index import ChromaIndex
+
+        async def chroma(dimension: int):
+            return ChromaIndex("benchmark", client=chromadb.EphemeralClient())
+
+        factories["chroma"] = chroma
+    except ImportError:
+        console.print("[yellow]chromadb not installed, skipping Chroma[/yellow]")
+
+    try:
+        from qdrant_client import AsyncQdrantClient
+        from src.services.qdrant_service import QdrantService
+
+        async def qdrant(dimension: int):
+            service = QdrantService(
+                client=AsyncQdrantClient(location=":memory:"),
+                collection_name="benchmark",
+                payload_indexes={}
+            )
+            await service.create_collection(vector_size=dimension)
+            return service
+
+        factories["qdrant (local)"] = qdrant
+    except ImportError:
+        console.print("[yellow]qdrant-client not installed, skipping Qdrant[/yellow]")
+
+    return factories
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=5000)
+    parser.add_argument("--dimension", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.size, args.dimension, args.queries, k=args.k)
+    print_report(asyncio.run(run_benchmarks(_default_factories(), corpus)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Chroma adapter for the vector index interface."""
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+import chromadb
+
+from .index import Document, Filters
+
+_RANGE_OPS = {"gt": "$gt", "gte": "$gte", "lt": "$lt", "lte": "$lte"}
+
+
+def build_where(filters: Filters) -> Optional[Dict[str, Any]]:
+    """Translate index filters into a Chroma ``where`` clause."""
+    if not filters:
+        return None
+
+    conditions = []
+    for field, expected in filters.items():
+        field = field[len("metadata."):] if field.startswith("metadata.") else field
+        if isinstance(expected, dict):
+            conditions.extend({field: {_RANGE_OPS[op]: bound}} for op, bound in expected.items())
+        elif isinstance(expected, (list, tuple, set)):
+            conditions.append({field: {"$in": list(expected)}})
+        else:
+            conditions.append({field: expected})
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+
+class ChromaIndex:
+    """Vector index backed by a Chroma collection.
+
+    Chroma's client is synchronous, so calls run in a worker thread. Ids are
+    stored as strings and metadata values must be scalars.
+    """
+
+    def __init__(
+        self,
+        collection_name: str = "documents",
+        client: Optional[Any] = None,
+        persist_directory: Optional[str] = None,
+        batch_size: int = 1000
+    ):
+        """Initialize the index.
+
+        Args:
+            collection_name: Chroma collection, created with cosine distance
+            client: Chroma client; defaults to a persistent client when
+                ``persist_directory`` is given, otherwise an ephemeral one
+            persist_directory: Directory for a persistent client
+            batch_size: Documents per upsert call
+        """
+        if client is None:
+            client = (
+                chromadb.PersistentClient(path=persist_directory)
+                if persist_directory else chromadb.EphemeralClient()
+            )
+        self.client = client
+        self.collection = client.get_or_create_collection(
+            collection_name, metadata={"hnsw:space": "cosine"}
+        )
+        self.batch_size = batch_size
+
+    async def upsert_batch(self, documents: Iterable[Document]) -> int:
+        """Insert or replace documents in batches."""
+        written = 0
+        batch: List[Document] = []
+        for document in documents:
+            batch.append(document)
+            if len(batch) >= self.batch_size:
+                written += await self._upsert(batch)
+                batch = []
+        if batch:
+            written += await self._upsert(batch)
+        return written
+
+    async def _upsert(self, batch: List[Document]) -> int:
+        await asyncio.to_thread(
+            self.collection.upsert,
+            ids=[str(document["id"]) for document in batch],
+            embeddings=[list(document["embedding"]) for document in batch],
+            documents=[document.get("content", "") for document in batch],
+            metadatas=[document.get("metadata") or None for document in batch]
+        )
+        return len(batch)
+
+    async def existing(self, ids: Iterable[Any]) -> Set[str]:
+        """Subset of ``ids`` already stored in the collection."""
+        ids = [str(doc_id) for doc_id in ids]
+        if not ids:
+            return set()
+        response = await asyncio.to_thread(self.collection.get, ids=ids, include=[])
+        return set(response["ids"])
+
+    async def delete(self, ids: Iterable[Any]) -> None:
+        """Remove documents by id."""
+        ids = [str(doc_id) for doc_id in ids]
+        if ids:
+            await asyncio.to_thread(self.collection.delete, ids=ids)
+
+    async def search(
+        self,
+        embedding: Sequence[float],
+        limit: int = 5,
+        filters: Filters = None,
+        score_threshold: Optional[float] = None
+    ) -> List[Document]:
+        """Nearest documents by cosine similarity."""
+        return (await self.search_batch([embedding], limit, filters, score_threshold))[0]
+
+    async def search_batch(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        limit: int = 5,
+        filters: Filters = None,
+        score_threshold: Optional[float] = None
+    ) -> List[List[Document]]:
+        """Run several searches in one Chroma query."""
+        response = await asyncio.to_thread(
+            self.collection.query,
+            query_embeddings=[list(embedding) for embedding in embeddings],
+            n_results=limit,
+            where=build_where(filters),
+            include=["documents", "metadatas", "distances"]
+        )
+
+        batches = []
+        for ids, contents, metadatas, distances in zip(
+            response["ids"], response["documents"], response["metadatas"], response["distances"]
+        ):
+            results = []
+            for doc_id, content, metadata, distance in zip(ids, contents, metadatas, distances):
+                # Chroma returns cosine distance
+                score = 1.0 - distance
+                if score_threshold is not None and score < score_threshold:
+                    break
+                results.append({"id": doc_id, "content": content, "metadata": metadata or {}, "score": score})
+            batches.append(results)
+        return batches
+
+    async def filter(self, filters: Filters, limit: int = 100) -> List[Document]:
+        """Documents whose metadata matches the filters."""
+        response = await asyncio.to_thread(
+            self.collection.get,
+            where=build_where(filters),
+            limit=limit,
+            include=["documents", "metadatas"]
+        )
+        return [
+            {"id": doc_id, "content": content, "metadata": metadata or {}}
+            for doc_id, content, metadata in zip(response["ids"], response["documents"], response["metadatas"])
+        ]
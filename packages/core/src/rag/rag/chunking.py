@@ -1,20 +1,61 @@
 """
 Text chunking utilities for RAG system.
 """
-from typing import List
+import hashlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+def document_key(content: str, metadata: Optional[Dict[str, Any]] = None) -> str:
+    """Stable document identity: its ``id``, ``source``, ``url`` or ``path``, else a content hash."""
+    for field_name in ("id", "source", "url", "path"):
+        if metadata and metadata.get(field_name):
+            return str(metadata[field_name])
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def chunk_id(content: str, document: str) -> str:
+    """Chunk id derived from its document and content.
+
+    Re-indexing a document reproduces the ids of unchanged chunks, while
+    identical text in two documents gets two ids.
+    """
+    return hashlib.sha256(f"{document}\0{content}".encode("utf-8")).hexdigest()
+
+
+@dataclass
+class TextChunk:
+    """A slice of a text with its position and the caller's metadata."""
+    text: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
 
 class TextChunker:
     """Text chunker for RAG system."""
     
     def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
         """Initialize text chunker."""
+        if not 0 <= chunk_overlap < chunk_size:
+            raise ValueError("chunk_overlap must be smaller than chunk_size")
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         
-    def split_text(self, text: str) -> List[str]:
-        """Split text into overlapping chunks."""
+    def split_text(self, text: str, metadata: Optional[Dict[str, Any]] = None) -> List[TextChunk]:
+        """Split text into fixed-size windows overlapping by ``chunk_overlap`` characters."""
         if not text:
             return []
             
-        # For testing, just return the text as a single chunk
-        return [text] 
\ No newline at end of file
+        step = self.chunk_size - self.chunk_overlap
+        chunks = []
+        start = 0
+        while True:
+            end = min(start + self.chunk_size, len(text))
+            chunks.append(TextChunk(text[start:end], {
+                **(metadata or {}),
+                "chunk_index": len(chunks),
+                "start_char": start,
+                "end_char": end
+            }))
+            if end == len(text):
+                return chunks
+            start += step
@@ -0,0 +1,211 @@
+"""Backend-agnostic vector index interface."""
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Sequence, runtime_checkable
+
+import numpy as np
+
+# Documents carry ``id``, ``embedding``, ``content`` and ``metadata``; results
+# carry ``id``, ``content``, ``metadata`` and, for similarity queries, ``score``.
+Document = Dict[str, Any]
+Filters = Optional[Dict[str, Any]]
+
+_RANGE_OPS = {
+    "gt": lambda value, bound: value > bound,
+    "gte": lambda value, bound: value >= bound,
+    "lt": lambda value, bound: value < bound,
+    "lte": lambda value, bound: value <= bound,
+}
+
+
+@runtime_checkable
+class VectorIndex(Protocol):
+    """Async vector index implemented by every retrieval backend.
+
+    Filters map metadata fields to a value (exact match), a list (any of)
+    or a dict of ``gt``/``gte``/``lt``/``lte`` bounds (range).
+    """
+
+    async def upsert_batch(self, documents: Iterable[Document]) -> int:
+        """Insert or replace documents, returning how many were written."""
+        ...
+
+    async def delete(self, ids: Iterable[Any]) -> None:
+        """Remove documents by id."""
+        ...
+
+    async def search(
+        self,
+        embedding: Sequence[float],
+        limit: int = 5,
+        filters: Filters = None,
+        score_threshold: Optional[float] = None
+    ) -> List[Document]:
+        """Nearest documents by cosine similarity, best first."""
+        ...
+
+    async def search_batch(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        limit: int = 5,
+        filters: Filters = None,
+        score_threshold: Optional[float] = None
+    ) -> List[List[Document]]:
+        """Run several searches at once, one result list per embedding."""
+        ...
+
+    async def filter(self, filters: Filters, limit: int = 100) -> List[Document]:
+        """Documents whose metadata matches, without a similarity query."""
+        ...
+
+
+def matches_filters(metadata: Dict[str, Any], filters: Filters) -> bool:
+    """Evaluate index filters against a metadata dict."""
+    if not filters:
+        return True
+    for field, expected in filters.items():
+        value = metadata.get(field[len("metadata."):] if field.startswith("metadata.") else field)
+        if isinstance(expected, dict):
+            if value is None or not all(_RANGE_OPS[op](value, bound) for op, bound in expected.items()):
+                return False
+        elif isinstance(expected, (list, tuple, set)):
+            if value not in expected:
+                return False
+        elif value != expected:
+            return False
+    return True
+
+
+class InMemoryIndex:
+    """NumPy vector index kept in process memory.
+
+    Vectors are normalized on insert into one preallocated matrix, so a
+    search is a single matrix product followed by a partial sort.
+    """
+
+    def __init__(self, dimension: Optional[int] = None, initial_capacity: int = 1024):
+        """Initialize the index.
+
+        Args:
+            dimension: Embedding size, inferred from the first upsert if omitted
+            initial_capacity: Rows allocated up front; the matrix doubles when full
+        """
+        self.dimension = dimension
+        self._capacity = initial_capacity
+        self._vectors: Optional[np.ndarray] = None
+        self._ids: List[Any] = []
+        self._rows: Dict[Any, int] = {}
+        self._documents: List[Document] = []
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _ensure_capacity(self, rows: int):
+        if self._vectors is None:
+            self._capacity = max(self._capacity, rows)
+            self._vectors = np.zeros((self._capacity, self.dimension), dtype=np.float32)
+        elif rows > len(self._vectors):
+            grown = np.zeros((max(rows, 2 * len(self._vectors)), self.dimension), dtype=np.float32)
+            grown[:len(self._ids)] = self._vectors[:len(self._ids)]
+            self._vectors = grown
+
+    async def upsert_batch(self, documents: Iterable[Document]) -> int:
+        """Insert or replace documents."""
+        written = 0
+        for document in documents:
+            vector = np.asarray(document["embedding"], dtype=np.float32)
+            if self.dimension is None:
+                self.dimension = len(vector)
+            vector = vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+            row = self._rows.get(document["id"])
+            if row is None:
+                row = len(self._ids)
+                self._ensure_capacity(row + 1)
+                self._ids.append(document["id"])
+                self._documents.append({})
+                self._rows[document["id"]] = row
+            self._vectors[row] = vector
+            self._documents[row] = {
+                "id": document["id"],
+                "content": document.get("content", ""),
+                "metadata": document.get("metadata", {})
+            }
+            written += 1
+        return written
+
+    async def delete(self, ids: Iterable[Any]) -> None:
+        """Remove documents, moving the last row into each freed slot."""
+        for doc_id in ids:
+            row = self._rows.pop(doc_id, None)
+            if row is None:
+                continue
+            last = len(self._ids) - 1
+            if row != last:
+                self._vectors[row] = self._vectors[last]
+                self._ids[row] = self._ids[last]
+                self._documents[row] = self._documents[last]
+                self._rows[self._ids[row]] = row
+            self._ids.pop()
+            self._documents.pop()
+
+    def _top(self, scores: np.ndarray, limit: int, mask: Optional[np.ndarray], score_threshold: Optional[float]) -> List[Document]:
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+        limit = min(limit, len(scores))
+        if limit <= 0:
+            return []
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        for row in top:
+            score = float(scores[row])
+            if score == -np.inf or (score_threshold is not None and score < score_threshold):
+                break
+            results.append({**self._documents[row], "score": score})
+        return results
+
+    def _mask(self, filters: Filters) -> Optional[np.ndarray]:
+        if not filters:
+            return None
+        return np.fromiter(
+            (matches_filters(document["metadata"], filters) for document in self._documents),
+            dtype=bool,
+            count=len(self._documents)
+        )
+
+    async def search(
+        self,
+        embedding: Sequence[float],
+        limit: int = 5,
+        filters: Filters = None,
+        score_threshold: Optional[float] = None
+    ) -> List[Document]:
+        """Nearest documents by cosine similarity."""
+        return (await self.search_batch([embedding], limit, filters, score_threshold))[0]
+
+    async def search_batch(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        limit: int = 5,
+        filters: Filters = None,
+        score_threshold: Optional[float] = None
+    ) -> List[List[Document]]:
+        """Score every query against the index with one matrix product."""
+        if not self._ids:
+            return [[] for _ in embeddings]
+
+        queries = np.asarray(embeddings, dtype=np.float32)
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        scores = queries @ self._vectors[:len(self._ids)].T
+        mask = self._mask(filters)
+        return [self._top(row, limit, mask, score_threshold) for row in scores]
+
+    async def filter(self, filters: Filters, limit: int = 100) -> List[Document]:
+        """Documents whose metadata matches the filters."""
+        results = []
+        for document in self._documents:
+            if matches_filters(document["metadata"], filters):
+                results.append(dict(document))
+                if len(results) >= limit:
+                    break
+        return results
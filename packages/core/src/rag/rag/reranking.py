@@ -0,0 +1,195 @@
+"""Second-stage re-ranking for retrieval results."""
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Scores (query, passage) pairs, e.g. sentence-transformers' CrossEncoder.predict
+ScoreFn = Callable[[List[tuple]], Sequence[float]]
+
+
+def mmr(
+    query_embedding: Sequence[float],
+    candidate_embeddings: Sequence[Sequence[float]],
+    k: int,
+    lambda_mult: float = 0.5
+) -> List[int]:
+    """
+    Select k candidates with Maximal Marginal Relevance.
+
+    Each step picks the candidate maximising
+    ``lambda * sim(query, c) - (1 - lambda) * max sim(c, selected)``,
+    so near-duplicates of already selected chunks are pushed down.
+
+    Args:
+        query_embedding: Query vector
+        candidate_embeddings: Candidate vectors, one per row
+        k: Number of candidates to select
+        lambda_mult: 1.0 is pure relevance, 0.0 is pure diversity
+
+    Returns:
+        Indices of the selected candidates in selection order
+    """
+    if len(candidate_embeddings) == 0 or k <= 0:
+        return []
+
+    candidates = np.asarray(candidate_embeddings, dtype=np.float32)
+    query = np.asarray(query_embedding, dtype=np.float32)
+
+    # Cosine similarity on normalized vectors
+    candidates = candidates / np.maximum(np.linalg.norm(candidates, axis=1, keepdims=True), 1e-12)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+    relevance = candidates @ query
+    k = min(k, len(candidates))
+
+    selected = [int(np.argmax(relevance))]
+    # Highest similarity of every candidate to anything selected so far
+    redundancy = candidates @ candidates[selected[0]]
+
+    while len(selected) < k:
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        redundancy = np.maximum(redundancy, candidates @ candidates[best])
+
+    return selected
+
+
+class Reranker:
+    """Over-fetch, then diversify with MMR and optionally re-score locally."""
+
+    def __init__(
+        self,
+        lambda_mult: float = 0.5,
+        fetch_multiplier: int = 4,
+        score_fn: Optional[ScoreFn] = None,
+        cross_encoder_model: Optional[str] = None,
+        batch_size: int = 32,
+        latency_budget: float = 0.25,
+        max_workers: int = 2
+    ):
+        """
+        Initialize the re-ranker.
+
+        Args:
+            lambda_mult: MMR trade-off between relevance and diversity
+            fetch_multiplier: Candidates fetched per requested result
+            score_fn: Local scorer for (query, passage) pairs
+            cross_encoder_model: sentence-transformers CrossEncoder to load
+                when no score_fn is given; skipped if the package is missing.
+                It loads on the executor, from ``warm_up`` or the first
+                ``rerank``, and results keep the MMR order until it is ready
+            batch_size: Pairs scored per batch
+            latency_budget: Seconds allowed for local scoring before falling
+                back to the MMR order; scoring is skipped while a timed-out
+                run is still finishing
+            max_workers: Threads used for MMR and scoring
+        """
+        self.lambda_mult = lambda_mult
+        self.fetch_multiplier = fetch_multiplier
+        self.score_fn = score_fn
+        self.cross_encoder_model = cross_encoder_model
+        self.batch_size = batch_size
+        self.latency_budget = latency_budget
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rerank")
+        self._encoder_loading: Optional[asyncio.Future] = None
+        self._straggler: Optional[asyncio.Future] = None
+
+    def fetch_k(self, k: int) -> int:
+        """Number of candidates to over-fetch for k final results."""
+        return k * self.fetch_multiplier
+
+    async def warm_up(self) -> None:
+        """Load the cross-encoder on the executor, off the event loop."""
+        self._start_encoder_load()
+        if self._encoder_loading is not None:
+            await self._encoder_loading
+
+    def _start_encoder_load(self) -> None:
+        if self.score_fn is None and self.cross_encoder_model and self._encoder_loading is None:
+            loop = asyncio.get_running_loop()
+            self._encoder_loading = loop.run_in_executor(self._executor, self._load_encoder)
+
+    def _load_encoder(self) -> None:
+        try:
+            from sentence_transformers import CrossEncoder
+            self.score_fn = CrossEncoder(self.cross_encoder_model).predict
+        except ImportError:
+            logger.warning("sentence-transformers not installed, using MMR order only")
+
+    def _score(self, score_fn: ScoreFn, pairs: List[tuple], cancelled: threading.Event) -> List[float]:
+        scores: List[float] = []
+        for start in range(0, len(pairs), self.batch_size):
+            if cancelled.is_set():
+                break
+            scores.extend(float(s) for s in score_fn(pairs[start:start + self.batch_size]))
+        return scores
+
+    @staticmethod
+    def _discard_result(future: asyncio.Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning(f"Abandoned re-ranking failed: {future.exception()}")
+
+    async def rerank(
+        self,
+        query: str,
+        query_embedding: Sequence[float],
+        candidates: List[Any],
+        embeddings: Sequence[Sequence[float]],
+        k: int,
+        text: Callable[[Any], str] = lambda candidate: candidate["content"]
+    ) -> List[Any]:
+        """
+        Re-rank over-fetched candidates down to k results.
+
+        Args:
+            query: Query text, used by the local scorer
+            query_embedding: Query vector
+            candidates: Candidate results in first-stage order
+            embeddings: Embedding of each candidate
+            k: Number of results to return
+            text: Extracts the passage text from a candidate
+
+        Returns:
+            Up to k candidates, most relevant first
+        """
+        if len(candidates) <= 1:
+            return candidates[:k]
+
+        loop = asyncio.get_running_loop()
+        order = await loop.run_in_executor(
+            self._executor, mmr, query_embedding, embeddings, k, self.lambda_mult
+        )
+        selected = [candidates[i] for i in order]
+
+        self._start_encoder_load()
+        score_fn = self.score_fn
+        if score_fn is None:
+            return selected
+
+        # A timed-out run still occupies a worker; don't queue more behind it
+        if self._straggler is not None and not self._straggler.done():
+            return selected
+
+        pairs = [(query, text(candidate)) for candidate in selected]
+        cancelled = threading.Event()
+        future = loop.run_in_executor(self._executor, self._score, score_fn, pairs, cancelled)
+        try:
+            scores = await asyncio.wait_for(asyncio.shield(future), self.latency_budget)
+        except asyncio.TimeoutError:
+            logger.warning(f"Re-ranking exceeded {self.latency_budget}s budget, using MMR order")
+            # Stop after the current batch and skip scoring until it returns
+            cancelled.set()
+            self._straggler = future
+            future.add_done_callback(self._discard_result)
+            return selected
+
+        ranked = sorted(range(len(selected)), key=lambda i: scores[i], reverse=True)
+        return [selected[i] for i in ranked]
@@ -1,7 +1,11 @@
 """Vector store implementation."""
+import asyncio
 import numpy as np
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 from dataclasses import dataclass
+from .chunking import chunk_id, document_key
+from .index import InMemoryIndex, VectorIndex
+from .reranking import Reranker
 
 @dataclass
 class SearchResult:
@@ -11,14 +15,28 @@ class SearchResult:
     score: float
 
 class VectorStore:
-    """Vector store for document embeddings."""
+    """Text-level store that embeds documents and queries into a ``VectorIndex``."""
     
-    def __init__(self, embedding_generator):
-        """Initialize vector store."""
+    def __init__(
+        self,
+        embedding_generator,
+        reranker: Optional[Reranker] = None,
+        index: Optional[VectorIndex] = None
+    ):
+        """
+        Initialize vector store.
+        
+        Args:
+            embedding_generator: Generates document and query embeddings
+            reranker: Optional second stage applied to over-fetched candidates
+            index: Backend holding the vectors; defaults to an ``InMemoryIndex``
+        """
         self.embedding_generator = embedding_generator
-        self.documents: List[str] = []
-        self.metadata: List[Dict[str, str]] = []
-        self.embeddings: List[np.ndarray] = []
+        self.reranker = reranker
+        self.index = index if index is not None else InMemoryIndex()
+        # The index returns no vectors, so the re-ranker caches its own copy;
+        # hits stored by another process are embedded again on first use
+        self._embeddings: Dict[Any, np.ndarray] = {}
         
     async def add_document(self, content: str, metadata: Optional[Dict[str, str]] = None) -> None:
         """
@@ -31,10 +49,16 @@ class VectorStore:
         # Generate embedding
         embedding = await self.embedding_generator.generate(content)
         
-        # Store document
-        self.documents.append(content)
-        self.metadata.append(metadata or {})
-        self.embeddings.append(embedding)
+        # Stable across processes, so persistent indexes are upserted, not overwritten
+        doc_id = chunk_id(content, document_key(content, metadata))
+        await self.index.upsert_batch([{
+            "id": doc_id,
+            "embedding": embedding,
+            "content": content,
+            "metadata": metadata or {}
+        }])
+        if self.reranker is not None:
+            self._embeddings[doc_id] = np.asarray(embedding, dtype=np.float32)
         
     async def search(
         self,
@@ -48,35 +72,38 @@ class VectorStore:
         Args:
             query: Search query
             limit: Maximum number of results
-            score_threshold: Minimum similarity score
+            score_threshold: Minimum cosine similarity
             
         Returns:
-            List of search results
+            List of search results, best first
         """
-        # For test mode, return mock results
-        if len(self.documents) == 0:
-            return []
-            
         # Generate query embedding
         query_embedding = await self.embedding_generator.generate(query)
         
-        # Calculate similarities
-        similarities = []
-        for doc_embedding in self.embeddings:
-            similarity = np.dot(query_embedding, doc_embedding)
-            similarities.append(similarity)
-            
-        # Get top results
-        indices = np.argsort(similarities)[-limit:]
+        # Over-fetch when a re-ranker follows
+        fetch = self.reranker.fetch_k(limit) if self.reranker else limit
+        hits = await self.index.search(query_embedding, limit=fetch, score_threshold=score_threshold)
         
-        # Format results
-        results = []
-        for idx in indices:
-            if similarities[idx] >= score_threshold:
-                results.append(SearchResult(
-                    content=self.documents[idx],
-                    metadata=self.metadata[idx],
-                    score=float(similarities[idx])
-                ))
-                
-        return results 
\ No newline at end of file
+        results = [
+            SearchResult(content=hit["content"], metadata=hit["metadata"], score=hit["score"])
+            for hit in hits
+        ]
+        if self.reranker is None:
+            return results
+        
+        return await self.reranker.rerank(
+            query,
+            query_embedding,
+            results,
+            await self._candidate_embeddings(hits),
+            limit,
+            text=lambda result: result.content
+        )
+    
+    async def _candidate_embeddings(self, hits: List[Dict[str, Any]]) -> List[np.ndarray]:
+        """Embeddings of the hits, generating the ones missing from the cache."""
+        missing = [hit for hit in hits if hit["id"] not in self._embeddings]
+        generated = await asyncio.gather(*(self.embedding_generator.generate(hit["content"]) for hit in missing))
+        for hit, embedding in zip(missing, generated):
+            self._embeddings[hit["id"]] = np.asarray(embedding, dtype=np.float32)
+        return [self._embeddings[hit["id"]] for hit in hits]
@@ -0,0 +1,128 @@
+"""Supabase (pgvector) adapter for the vector index interface."""
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from src.db.async_client import AsyncSupabase
+
+from .index import Document, Filters, matches_filters
+
+
+class SupabaseIndex:
+    """Vector index over the ``documents`` table and ``match_documents`` RPC.
+
+    ``match_documents`` only takes an embedding, a threshold and a count, so
+    filtered searches over-fetch and apply the filters to the returned rows.
+    """
+
+    def __init__(
+        self,
+        db: AsyncSupabase,
+        table: str = "documents",
+        match_function: str = "match_documents",
+        batch_size: int = 500,
+        filter_overfetch: int = 4
+    ):
+        """Initialize the index.
+
+        Args:
+            db: Shared async Supabase access layer
+            table: Table holding ``id``, ``content``, ``embedding`` and ``metadata``
+            match_function: Similarity search RPC
+            batch_size: Rows per upsert request
+            filter_overfetch: Candidates fetched per result when filtering
+        """
+        self.db = db
+        self.table = table
+        self.match_function = match_function
+        self.batch_size = batch_size
+        self.filter_overfetch = filter_overfetch
+
+    async def upsert_batch(self, documents: Iterable[Document]) -> int:
+        """Insert or replace documents in batched requests."""
+        rows = [
+            {
+                "id": document["id"],
+                "content": document.get("content", ""),
+                "embedding": list(document["embedding"]),
+                "metadata": document.get("metadata", {})
+            }
+            for document in documents
+        ]
+        await self.db.execute_many([
+            self.db.table(self.table).upsert(rows[start:start + self.batch_size])
+            for start in range(0, len(rows), self.batch_size)
+        ])
+        return len(rows)
+
+    async def delete(self, ids: Iterable[Any]) -> None:
+        """Remove documents by id."""
+        ids = list(ids)
+        if ids:
+            await self.db.execute(self.db.table(self.table).delete().in_("id", ids))
+
+    def _match(self, embedding: Sequence[float], limit: int, filters: Filters, score_threshold: Optional[float]):
+        return self.db.rpc(self.match_function, {
+            "query_embedding": list(embedding),
+            "match_threshold": -1.0 if score_threshold is None else score_threshold,
+            "match_count": limit * self.filter_overfetch if filters else limit
+        })
+
+    @staticmethod
+    def _results(rows: List[Dict], limit: int, filters: Filters) -> List[Document]:
+        results = []
+        for row in rows or []:
+            metadata = row.get("metadata") or {}
+            if not matches_filters(metadata, filters):
+                continue
+            results.append({
+                "id": row["id"],
+                "content": row.get("content", ""),
+                "metadata": metadata,
+                "score": row.get("similarity")
+            })
+            if len(results) >= limit:
+                break
+        return results
+
+    async def search(
+        self,
+        embedding: Sequence[float],
+        limit: int = 5,
+        filters: Filters = None,
+        score_threshold: Optional[float] = None
+    ) -> List[Document]:
+        """Nearest documents through ``match_documents``."""
+        response = await self.db.execute(self._match(embedding, limit, filters, score_threshold))
+        return self._results(response.data, limit, filters)
+
+    async def search_batch(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        limit: int = 5,
+        filters: Filters = None,
+        score_threshold: Optional[float] = None
+    ) -> List[List[Document]]:
+        """Run the searches concurrently through the shared pool."""
+        responses = await self.db.execute_many([
+            self._match(embedding, limit, filters, score_threshold) for embedding in embeddings
+        ])
+        return [self._results(response.data, limit, filters) for response in responses]
+
+    async def filter(self, filters: Filters, limit: int = 100) -> List[Document]:
+        """Documents whose metadata matches the filters."""
+        query = self.db.table(self.table).select("id, content, metadata")
+        for field, expected in (filters or {}).items():
+            field = field[len("metadata."):] if field.startswith("metadata.") else field
+            if isinstance(expected, dict):
+                continue  # ranges are checked below, jsonb text casts do not compare numbers
+            if isinstance(expected, (list, tuple, set)):
+                query = query.in_(f"metadata->>{field}", [str(value) for value in expected])
+            else:
+                query = query.contains("metadata", {field: expected})
+
+        has_ranges = any(isinstance(expected, dict) for expected in (filters or {}).values())
+        response = await self.db.execute(query.limit(limit * self.filter_overfetch if has_ranges else limit))
+        return [
+            {"id": row["id"], "content": row.get("content", ""), "metadata": row.get("metadata") or {}}
+            for row in response.data or []
+            if matches_filters(row.get("metadata") or {}, filters)
+        ][:limit]
@@ -3,39 +3,98 @@ Web crawler implementation for content extraction.
 """
 import aiohttp
 import asyncio
-from typing import Optional, Dict, List
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Optional, Dict, List
+from urllib.parse import urlsplit
 
-from ..analytics.metrics.crawler_metrics import CrawlerMetrics
-from ..utils.rate_limiter import RateLimiter
+from ..analytics.metrics.crawler_metrics import CRAWL_SOURCE, CrawlerMetrics
+from ..crawlers.body import DEFAULT_ALLOWED_TYPES, DEFAULT_MAX_BYTES, BodyReader
+from ..utils.logger import get_logger
+from .extraction import default_backend, extract_html
+from .frontier import Frontier, normalize_url, url_host
+from .rate_limiter import RateLimiter
+from .robots import RobotsCache
+
+logger = get_logger("crawler")
 
 class Crawler:
     """
     Asynchronous web crawler with rate limiting and metrics tracking.
+    
+    Crawls run ``concurrency`` workers over a host-partitioned frontier. Each
+    host has its own token bucket of ``rate_limit`` requests per ``period``,
+    slowed further by its robots.txt ``Crawl-delay``, so many hosts are
+    fetched in parallel while no single host sees more than its budget.
+    
+    Bodies are streamed with a size cap and a content-type check, so
+    oversized or binary responses are dropped without being buffered.
     """
     
-    def __init__(self, rate_limit: int = 10, period: int = 60):
+    def __init__(
+        self,
+        rate_limit: int = 10,
+        period: int = 60,
+        user_agent: str = "SynapseCrawler",
+        respect_robots: bool = True,
+        concurrency: int = 8,
+        burst: int = 1,
+        parser: Optional[str] = None,
+        parse_workers: Optional[int] = None,
+        process_threshold: int = 100_000,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        allowed_types: Iterable[str] = DEFAULT_ALLOWED_TYPES,
+        chunk_size: int = 64 * 1024
+    ):
         """
         Initialize the crawler.
         
         Args:
-            rate_limit: Maximum requests per period
+            rate_limit: Maximum requests per period to one host
             period: Time period in seconds
+            user_agent: Agent name sent with requests and matched against robots.txt
+            respect_robots: Skip URLs disallowed by robots.txt
+            concurrency: Pages fetched at the same time across all hosts
+            burst: Requests a rested host may receive back to back
+            parser: HTML backend ("selectolax", "lxml" or "html.parser");
+                the fastest installed one by default
+            parse_workers: Processes for parsing large pages
+            process_threshold: Page size in characters from which parsing
+                moves to the process pool instead of the event loop
+            max_bytes: Largest decoded body downloaded
+            allowed_types: Media types kept; other bodies are abandoned
+            chunk_size: Bytes read from the connection at a time
         """
-        self.rate_limiter = RateLimiter(rate_limit, period)
+        self.rate_limiter = RateLimiter(rate_limit, period, burst=burst)
         self.metrics = CrawlerMetrics()
         self.session: Optional[aiohttp.ClientSession] = None
+        self.user_agent = user_agent
+        self.concurrency = concurrency
+        self.parser = default_backend(parser)
+        self.parse_workers = parse_workers
+        self.process_threshold = process_threshold
+        self._parse_pool: Optional[ProcessPoolExecutor] = None
+        self.max_bytes = max_bytes
+        self.allowed_types = tuple(allowed_types)
+        self.chunk_size = chunk_size
+        # robots.txt itself is not counted against the host's budget
+        self.robots = RobotsCache(self._get, user_agent) if respect_robots else None
+        
+    def _new_session(self) -> aiohttp.ClientSession:
+        return aiohttp.ClientSession(headers={"User-Agent": self.user_agent})
         
     async def __aenter__(self):
         """Context manager entry."""
-        self.session = aiohttp.ClientSession()
+        self.session = self._new_session()
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit."""
         if self.session:
             await self.session.close()
+        if self._parse_pool:
+            self._parse_pool.shutdown(wait=False, cancel_futures=True)
+            self._parse_pool = None
             
     async def fetch_page(self, url: str) -> Optional[str]:
         """
@@ -47,20 +106,37 @@ class Crawler:
         Returns:
             Page content if successful, None otherwise
         """
+        await self.rate_limiter.acquire(urlsplit(url).netloc)
+        return await self._get(url)
+        
+    async def _get(self, url: str) -> Optional[str]:
         if not self.session:
-            self.session = aiohttp.ClientSession()
+            self.session = self._new_session()
             
         try:
-            await self.rate_limiter.acquire()
-            
-            async with self.metrics.track_request(url=url):
-                async with self.session.get(url) as response:
-                    if response.status == 200:
-                        return await response.text()
-                    return None
+            started = time.perf_counter()
+            content, size = None, None
+            async with self.session.get(url) as response:
+                if response.status == 200:
+                    reader = BodyReader(
+                        response.headers.get("Content-Type"),
+                        response.content_length,
+                        self.max_bytes,
+                        self.allowed_types
+                    )
+                    content = await reader.read(response.content.iter_chunked(self.chunk_size))
+                    size = reader.size
+            await self.metrics.track_request(
+                source=CRAWL_SOURCE,
+                endpoint="crawl",
+                status=str(response.status),
+                duration=time.perf_counter() - started,
+                response_size=size
+            )
+            return content
                     
         except Exception as e:
-            self.metrics.track_error(url=url, error=str(e))
+            await self.metrics.track_error(source=CRAWL_SOURCE, endpoint="crawl", error_type=type(e).__name__)
             return None
             
     async def extract_content(self, html: str) -> Dict[str, str]:
@@ -70,54 +146,95 @@ class Crawler:
         Args:
             html: Raw HTML content
             
+        Small pages are parsed inline; large ones in a process pool so
+        parsing uses every core and does not stall concurrent fetches.
+        
         Returns:
-            Dictionary with extracted content
+            Dictionary with title, full text, links and the main content
         """
-        soup = BeautifulSoup(html, 'html.parser')
+        if len(html) < self.process_threshold:
+            return extract_html(html, self.parser)
         
-        # Remove unwanted elements
-        for element in soup(['script', 'style']):
-            element.decompose()
-            
-        return {
-            'title': soup.title.string if soup.title else '',
-            'text': soup.get_text(separator=' ', strip=True),
-            'links': [a.get('href', '') for a in soup.find_all('a', href=True)]
-        }
+        if self._parse_pool is None:
+            self._parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._parse_pool, extract_html, html, self.parser)
         
-    async def crawl(self, start_url: str, max_pages: int = 10) -> List[Dict[str, str]]:
+    async def crawl(
+        self,
+        start_url: str,
+        max_pages: int = 10,
+        max_depth: Optional[int] = None,
+        same_domain: bool = True,
+        frontier: Optional[Frontier] = None
+    ) -> List[Dict[str, str]]:
         """
-        Crawl pages starting from a URL.
+        Crawl pages concurrently starting from a URL.
         
         Args:
             start_url: Starting URL
             max_pages: Maximum pages to crawl
+            max_depth: Maximum link depth from the start URL
+            same_domain: Only follow links on the start URL's host
+            frontier: Frontier to use instead of a fresh one, e.g. one seeded
+                with many hosts or sharing a visited set across crawls
             
         Returns:
-            List of extracted content from pages
+            List of extracted content from pages, in completion order
         """
         results = []
-        visited = set()
-        queue = [start_url]
+        frontier = frontier or Frontier(
+            allowed_hosts=[url_host(normalize_url(start_url) or start_url)] if same_domain else None,
+            max_depth=max_depth,
+            robots=self.robots,
+            limiter=self.rate_limiter
+        )
+        frontier.push(start_url)
+        state = {"started": 0, "in_flight": 0}
+        wakeup = asyncio.Event()
         
-        async with self:
-            while queue and len(visited) < max_pages:
-                url = queue.pop(0)
-                if url in visited:
-                    continue
-                    
-                content = await self.fetch_page(url)
-                if content:
+        async def process(url: str, depth: int):
+            if not await frontier.allowed(url):
+                state["started"] -= 1  # disallowed URLs do not count as pages
+                return
+            content = await self._get(url)
+            if content:
+                try:
                     extracted = await self.extract_content(content)
-                    extracted['url'] = url
-                    results.append(extracted)
-                    
-                    # Add new URLs to queue
-                    for link in extracted['links']:
-                        full_url = urljoin(url, link)
-                        if full_url not in visited:
-                            queue.append(full_url)
-                            
-                visited.add(url)
+                except Exception as e:
+                    # One unparsable page must not stop the other workers
+                    logger.warning(f"Could not extract {url}: {e}")
+                    await self.metrics.track_error(source=CRAWL_SOURCE, endpoint="extract", error_type=type(e).__name__)
+                    return
+                extracted['url'] = url
+                results.append(extracted)
+                frontier.extend(extracted['links'], depth + 1, base=url)
+        
+        async def worker():
+            while state["started"] < max_pages:
+                item, wait = frontier.next_ready()
+                if item is None:
+                    if wait is None and not state["in_flight"]:
+                        # Nothing queued and nothing in flight that could add links
+                        wakeup.set()
+                        return
+                    # Sleep until a host's budget frees up or new links arrive
+                    wakeup.clear()
+                    try:
+                        await asyncio.wait_for(wakeup.wait(), wait)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                
+                state["started"] += 1
+                state["in_flight"] += 1
+                try:
+                    await process(*item)
+                finally:
+                    state["in_flight"] -= 1
+                    wakeup.set()
+        
+        async with self:
+            await asyncio.gather(*(worker() for _ in range(self.concurrency)))
                 
-        return results 
\ No newline at end of file
+        return results
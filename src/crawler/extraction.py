@@ -0,0 +1,274 @@
+"""
+HTML parsing backends and readability-style main content extraction.
+
+``selectolax`` (lexbor) and ``lxml`` are optional; when neither is installed
+the pure-Python ``html.parser`` from BeautifulSoup is used. Every backend
+exposes the same small node interface so the content scorer is shared.
+"""
+import re
+from typing import Any, Dict, Hashable, Iterable, List, Optional
+
+_REMOVED_TAGS = ["script", "style", "noscript", "template", "svg", "iframe"]
+_PARAGRAPH_TAGS = ["p", "pre", "td", "blockquote"]
+# lxml refuses str input that declares its own encoding, e.g. XHTML pages
+_XML_DECLARATION = re.compile(r"^\s*<\?xml[^>]*\?>")
+_POSITIVE = re.compile(r"article|body|content|entry|main|page|post|story|text", re.I)
+_NEGATIVE = re.compile(
+    r"comment|footer|footnote|header|menu|meta|nav|promo|related|share|sidebar|social|sponsor|widget|banner|ad-",
+    re.I
+)
+_TAG_WEIGHTS = {
+    "article": 10, "main": 10, "div": 5, "section": 3, "pre": 3, "td": 3, "blockquote": 3,
+    "form": -3, "ol": -3, "ul": -3, "li": -3, "dl": -3, "aside": -10, "nav": -10,
+    "footer": -10, "header": -5, "h1": -5, "h2": -5, "h3": -5, "th": -5,
+}
+_MIN_PARAGRAPH = 25
+
+
+class _SoupBackend:
+    name = "html.parser"
+
+    @staticmethod
+    def parse(html: str):
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(html, "html.parser")
+        for element in soup(_REMOVED_TAGS):
+            element.decompose()
+        return soup
+
+    @staticmethod
+    def title(root) -> str:
+        return root.title.string if root.title and root.title.string else ""
+
+    @staticmethod
+    def links(root) -> List[str]:
+        return [a.get("href", "") for a in root.find_all("a", href=True)]
+
+    @staticmethod
+    def text(node) -> str:
+        return node.get_text(separator=" ", strip=True)
+
+    @staticmethod
+    def paragraphs(root) -> Iterable:
+        return root.find_all(_PARAGRAPH_TAGS)
+
+    @staticmethod
+    def parent(node):
+        return node.parent
+
+    @staticmethod
+    def key(node) -> Hashable:
+        return id(node)
+
+    @staticmethod
+    def tag(node) -> str:
+        return node.name or ""
+
+    @staticmethod
+    def hint(node) -> str:
+        return " ".join(node.get("class") or []) + " " + (node.get("id") or "")
+
+    @staticmethod
+    def link_text_length(node) -> int:
+        return sum(len(a.get_text(strip=True)) for a in node.find_all("a"))
+
+
+class _LxmlBackend:
+    name = "lxml"
+
+    @staticmethod
+    def parse(html: str):
+        import lxml.etree
+        import lxml.html
+        html = _XML_DECLARATION.sub("", html, count=1)
+        try:
+            root = lxml.html.document_fromstring(html)
+        except lxml.etree.ParserError:
+            # Blank or comment-only documents parse as an empty page
+            root = lxml.html.document_fromstring("<html></html>")
+        for element in root.xpath("//comment()|" + "|".join(f"//{tag}" for tag in _REMOVED_TAGS)):
+            element.drop_tree()
+        return root
+
+    @staticmethod
+    def title(root) -> str:
+        return (root.findtext(".//title") or "").strip()
+
+    @staticmethod
+    def links(root) -> List[str]:
+        return [str(href) for href in root.xpath("//a/@href")]
+
+    @staticmethod
+    def text(node) -> str:
+        return " ".join(part.strip() for part in node.itertext() if part.strip())
+
+    @staticmethod
+    def paragraphs(root) -> Iterable:
+        return root.iter(*_PARAGRAPH_TAGS)
+
+    @staticmethod
+    def parent(node):
+        return node.getparent()
+
+    @staticmethod
+    def key(node) -> Hashable:
+        return node
+
+    @staticmethod
+    def tag(node) -> str:
+        return node.tag if isinstance(node.tag, str) else ""
+
+    @staticmethod
+    def hint(node) -> str:
+        return (node.get("class") or "") + " " + (node.get("id") or "")
+
+    @staticmethod
+    def link_text_length(node) -> int:
+        return sum(len(a.text_content().strip()) for a in node.iter("a"))
+
+
+class _SelectolaxBackend:
+    name = "selectolax"
+
+    @staticmethod
+    def parse(html: str):
+        from selectolax.lexbor import LexborHTMLParser
+        tree = LexborHTMLParser(html)
+        tree.strip_tags(_REMOVED_TAGS)
+        return tree
+
+    @staticmethod
+    def title(root) -> str:
+        node = root.css_first("title")
+        return node.text(strip=True) if node else ""
+
+    @staticmethod
+    def links(root) -> List[str]:
+        return [a.attributes.get("href") or "" for a in root.css("a[href]")]
+
+    @staticmethod
+    def text(node) -> str:
+        # The parser object stands for the document; nodes carry the text
+        node = getattr(node, "root", node)
+        return node.text(separator=" ", strip=True) if node is not None else ""
+
+    @staticmethod
+    def paragraphs(root) -> Iterable:
+        return root.css(", ".join(_PARAGRAPH_TAGS))
+
+    @staticmethod
+    def parent(node):
+        return node.parent
+
+    @staticmethod
+    def key(node) -> Hashable:
+        # Wrappers are recreated on every access; the underlying node id is stable
+        return node.mem_id
+
+    @staticmethod
+    def tag(node) -> str:
+        return node.tag or ""
+
+    @staticmethod
+    def hint(node) -> str:
+        return (node.attributes.get("class") or "") + " " + (node.attributes.get("id") or "")
+
+    @staticmethod
+    def link_text_length(node) -> int:
+        return sum(len(a.text(strip=True)) for a in node.css("a"))
+
+
+BACKENDS = {backend.name: backend for backend in (_SelectolaxBackend, _LxmlBackend, _SoupBackend)}
+
+
+def _installed(name: str) -> bool:
+    try:
+        if name == "selectolax":
+            import selectolax.lexbor  # noqa: F401
+        elif name == "lxml":
+            import lxml.html  # noqa: F401
+        else:
+            import bs4  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def default_backend(preferred: Optional[str] = None) -> str:
+    """The preferred backend if installed, else the fastest one available."""
+    if preferred is not None:
+        if preferred not in BACKENDS:
+            raise ValueError(f"Unknown parser backend: {preferred}")
+        if _installed(preferred):
+            return preferred
+    return next(name for name in BACKENDS if _installed(name))
+
+
+def _class_weight(backend, node) -> float:
+    hint = backend.hint(node)
+    weight = _TAG_WEIGHTS.get(backend.tag(node), 0)
+    if _NEGATIVE.search(hint):
+        weight -= 25
+    if _POSITIVE.search(hint):
+        weight += 25
+    return weight
+
+
+def main_content(backend, root) -> str:
+    """
+    Readability-style main text of a parsed page.
+
+    Paragraphs score by length and comma count; the score flows to their
+    parent and, halved, to their grandparent, which start from a weight
+    given by tag and class/id hints. The best container, discounted by its
+    link density, wins and its paragraphs are returned.
+    """
+    candidates: Dict[Hashable, List[Any]] = {}
+    paragraphs = []
+
+    def candidate(node) -> Optional[List[Any]]:
+        if node is None or not backend.tag(node) or backend.tag(node) in ("html", "[document]", "-document"):
+            return None
+        key = backend.key(node)
+        if key not in candidates:
+            candidates[key] = [node, _class_weight(backend, node)]
+        return candidates[key]
+
+    for node in backend.paragraphs(root):
+        text = backend.text(node)
+        if len(text) < _MIN_PARAGRAPH:
+            continue
+        score = 1 + text.count(",") + min(len(text) / 100, 3)
+        parent = candidate(backend.parent(node))
+        grandparent = candidate(backend.parent(parent[0])) if parent else None
+        if parent:
+            parent[1] += score
+        if grandparent:
+            grandparent[1] += score / 2
+        paragraphs.append((text, parent, grandparent))
+
+    if not candidates:
+        return backend.text(root)
+
+    def final_score(entry) -> float:
+        text_length = len(backend.text(entry[0])) or 1
+        return entry[1] * (1 - min(1.0, backend.link_text_length(entry[0]) / text_length))
+
+    best = max(candidates.values(), key=final_score)
+    return "\n\n".join(text for text, parent, grandparent in paragraphs if best is parent or best is grandparent)
+
+
+def extract_html(html: str, backend: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Parse a page into title, full text, links and main content.
+
+    Module-level so it can run in a process pool.
+    """
+    parser = BACKENDS[default_backend(backend)]
+    root = parser.parse(html)
+    return {
+        "title": parser.title(root),
+        "text": parser.text(root),
+        "links": parser.links(root),
+        "content": main_content(parser, root)
+    }
@@ -0,0 +1,293 @@
+"""
+Crawl frontier: URL normalization, filtering and a bounded-memory visited set.
+"""
+import asyncio
+import hashlib
+import heapq
+import itertools
+import math
+import posixpath
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from .rate_limiter import RateLimiter
+from .robots import RobotsCache
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "mc_cid", "mc_eid"}
+
+
+def normalize_url(url: str, base: Optional[str] = None) -> Optional[str]:
+    """
+    Canonical form of a URL, resolved against ``base``.
+
+    Lowercases scheme and host, drops default ports, fragments and tracking
+    parameters, resolves dot segments and sorts the query. Returns ``None``
+    for anything that is not an http(s) URL.
+    """
+    try:
+        parts = urlsplit(urljoin(base, url.strip()) if base else url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in _DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower().rstrip(".")
+    if port and port != _DEFAULT_PORTS[scheme]:
+        host = f"{host}:{port}"
+
+    path = parts.path or "/"
+    if "." in path:
+        trailing = path.endswith("/")
+        path = posixpath.normpath(path)
+        path = path.lstrip("/")
+        path = "/" + path if path != "." else "/"
+        if trailing and not path.endswith("/"):
+            path += "/"
+
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.startswith("utm_") and key not in _TRACKING_PARAMS
+    ))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def url_host(url: str) -> str:
+    """Host of a URL without a leading ``www.``."""
+    host = urlsplit(url).netloc
+    return host[4:] if host.startswith("www.") else host
+
+
+class BloomFilter:
+    """Fixed-capacity Bloom filter over a bytearray."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        """
+        Initialize the filter.
+
+        Args:
+            capacity: Items the filter holds before the error rate degrades
+            error_rate: Target false positive probability at capacity
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, item: str) -> List[int]:
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def add(self, item: str) -> bool:
+        """Add an item, returning ``False`` if it was (probably) present."""
+        added = False
+        for p in self._positions(item):
+            mask = 1 << (p & 7)
+            if not self._bits[p >> 3] & mask:
+                self._bits[p >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+
+class ScalableBloomFilter:
+    """
+    Bloom filter that grows by stacking filters.
+
+    Each new filter is ``growth`` times larger with a ``tightening`` times
+    smaller error rate, so the overall false positive rate stays below
+    ``error_rate`` however many items are added, at roughly
+    ``1.44 * log2(1 / error_rate)`` bits per item.
+    """
+
+    def __init__(
+        self,
+        initial_capacity: int = 100_000,
+        error_rate: float = 0.001,
+        growth: int = 2,
+        tightening: float = 0.5
+    ):
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+        self.filters = [BloomFilter(initial_capacity, error_rate * (1 - tightening))]
+
+    def __contains__(self, item: str) -> bool:
+        return any(item in bloom for bloom in self.filters)
+
+    def __len__(self) -> int:
+        return sum(bloom.count for bloom in self.filters)
+
+    def add(self, item: str) -> bool:
+        """Add an item, returning ``False`` if it was (probably) present."""
+        if item in self:
+            return False
+        current = self.filters[-1]
+        if current.count >= current.capacity:
+            current = BloomFilter(current.capacity * self.growth, current.error_rate * self.tightening)
+            self.filters.append(current)
+        return current.add(item)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(bloom.nbytes for bloom in self.filters)
+
+
+class Frontier:
+    """
+    Crawl frontier partitioned by host.
+
+    URLs are normalized and filtered when pushed, and remembered in a
+    scalable Bloom filter so each canonical URL is queued at most once. The
+    Bloom filter may very rarely reject a new URL as seen; it never lets a
+    duplicate through.
+
+    Each host keeps its own FIFO queue, and hosts wait in a heap ordered by
+    the time their rate limiter next allows a request. Taking work from the
+    frontier therefore always picks a host that may be fetched right away,
+    so one slow or strict host never holds up the others.
+    """
+
+    def __init__(
+        self,
+        allowed_hosts: Optional[Iterable[str]] = None,
+        max_depth: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        robots: Optional[RobotsCache] = None,
+        seen: Optional[ScalableBloomFilter] = None,
+        limiter: Optional[RateLimiter] = None
+    ):
+        """
+        Initialize the frontier.
+
+        Args:
+            allowed_hosts: Hosts that may be queued; any host when ``None``
+            max_depth: Link depth below the seeds that is still queued
+            max_pending: Queue length above which new URLs are dropped
+            robots: Robots.txt rules checked before a URL is handed out
+            seen: Visited set, e.g. one restored from an earlier crawl
+            limiter: Per-host politeness budget; hosts are not rate limited
+                when ``None``
+        """
+        self.allowed_hosts: Optional[Set[str]] = (
+            {url_host(f"//{host}") for host in allowed_hosts} if allowed_hosts is not None else None
+        )
+        self.max_depth = max_depth
+        self.max_pending = max_pending
+        self.robots = robots
+        self.seen = seen or ScalableBloomFilter()
+        self.limiter = limiter
+        self.dropped = 0
+        self._hosts: Dict[str, Deque[Tuple[str, int]]] = {}
+        self._ready: List[Tuple[float, int, str]] = []
+        self._pending = 0
+        self._order = itertools.count()
+
+    def __len__(self) -> int:
+        return self._pending
+
+    def _schedule(self, host: str):
+        delay = self.limiter.delay(host) if self.limiter else 0.0
+        heapq.heappush(self._ready, (time.monotonic() + delay, next(self._order), host))
+
+    def push(self, url: str, depth: int = 0, base: Optional[str] = None) -> bool:
+        """Queue a URL if it passes the filters and was not seen before."""
+        url = normalize_url(url, base)
+        if url is None:
+            return False
+        if self.max_depth is not None and depth > self.max_depth:
+            return False
+        if self.allowed_hosts is not None and url_host(url) not in self.allowed_hosts:
+            return False
+        if self.max_pending is not None and self._pending >= self.max_pending:
+            self.dropped += 1
+            return False
+        if not self.seen.add(url):
+            return False
+
+        host = urlsplit(url).netloc
+        queue = self._hosts.get(host)
+        if queue is None:
+            queue = self._hosts[host] = deque()
+            self._schedule(host)
+        queue.append((url, depth))
+        self._pending += 1
+        return True
+
+    def extend(self, links: Iterable[str], depth: int, base: Optional[str] = None) -> int:
+        """Queue the links found on a page at ``depth - 1``."""
+        return sum(self.push(link, depth, base) for link in links)
+
+    def next_ready(self) -> Tuple[Optional[Tuple[str, int]], Optional[float]]:
+        """
+        Take a URL whose host may be fetched now, without waiting.
+
+        The host's rate limit slot is reserved when a URL is returned.
+
+        Returns:
+            ``((url, depth), None)`` when a host is ready, ``(None, seconds)``
+            until the next host is ready, or ``(None, None)`` when empty
+        """
+        while self._ready:
+            ready_at, _, host = self._ready[0]
+            now = time.monotonic()
+            if ready_at > now:
+                return None, ready_at - now
+            heapq.heappop(self._ready)
+
+            # The budget may have changed since scheduling, e.g. a Crawl-delay
+            if self.limiter and self.limiter.delay(host) > 0:
+                self._schedule(host)
+                continue
+
+            queue = self._hosts[host]
+            item = queue.popleft()
+            self._pending -= 1
+            if self.limiter:
+                self.limiter.take(host)
+            if queue:
+                self._schedule(host)
+            else:
+                del self._hosts[host]
+            return item, None
+        return None, None
+
+    async def allowed(self, url: str) -> bool:
+        """Check robots.txt, applying its ``Crawl-delay`` to the host's budget."""
+        if self.robots is None:
+            return True
+        if not await self.robots.allowed(url):
+            return False
+        if self.limiter:
+            delay = await self.robots.crawl_delay(url)
+            if delay:
+                self.limiter.set_crawl_delay(urlsplit(url).netloc, delay)
+        return True
+
+    async def pop(self) -> Optional[Tuple[str, int]]:
+        """Next allowed ``(url, depth)``, waiting for its host's budget; ``None`` when empty."""
+        while True:
+            item, wait = self.next_ready()
+            if item is None:
+                if wait is None:
+                    return None
+                await asyncio.sleep(wait)
+            elif await self.allowed(item[0]):
+                return item
@@ -2,50 +2,112 @@
 Rate limiter implementation for the crawler.
 """
 import asyncio
-from datetime import datetime, timedelta
-from typing import Dict, Optional
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at ``rate`` tokens per second.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: Optional[float] = None) -> float:
+        """Seconds until a token is available, without taking it."""
+        self._refill(now if now is not None else time.monotonic())
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    def take(self, now: Optional[float] = None) -> float:
+        """
+        Reserve a token and return how long to wait before using it.
+
+        Tokens may go negative, so concurrent callers queue up behind each
+        other without a lock.
+        """
+        wait = self.delay(now)
+        self.tokens -= 1
+        return wait
+
 
 class RateLimiter:
     """
-    Rate limiter for controlling request frequency.
+    Per-domain rate limiter for controlling request frequency.
+
+    Each domain gets its own token bucket of ``rate_limit`` requests per
+    ``period`` with bursts of up to ``burst`` requests. A robots.txt
+    ``Crawl-delay`` slows a domain's bucket down further.
     """
-    
-    def __init__(self, rate_limit: int = 10, period: int = 60):
+
+    def __init__(
+        self,
+        rate_limit: int = 10,
+        period: int = 60,
+        burst: int = 1,
+        max_domains: int = 10_000
+    ):
         """
         Initialize rate limiter.
-        
+
         Args:
             rate_limit: Maximum requests per period
             period: Time period in seconds
+            burst: Requests a rested domain may make back to back
+            max_domains: Buckets kept; the least recently used are dropped
         """
         self.rate_limit = rate_limit
         self.period = period
-        self.requests: Dict[str, datetime] = {}
-        self.lock = asyncio.Lock()
-        
+        self.burst = burst
+        self.max_domains = max_domains
+        self.buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def bucket(self, domain: Optional[str] = None) -> TokenBucket:
+        """Bucket for a domain, created on first use."""
+        key = domain or "*"
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(self.rate_limit / self.period, self.burst)
+            # A bucket idle long enough to be evicted is full anyway
+            while len(self.buckets) > self.max_domains:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(key)
+        return bucket
+
+    def set_crawl_delay(self, domain: str, delay: float):
+        """Space requests to a domain at least ``delay`` seconds apart."""
+        bucket = self.bucket(domain)
+        rate = 1 / delay if delay > 0 else bucket.rate
+        if rate < bucket.rate:
+            bucket.delay()  # settle tokens earned at the old rate
+            bucket.rate = rate
+            bucket.capacity = 1
+            bucket.tokens = min(bucket.tokens, 0)
+
+    def delay(self, domain: Optional[str] = None) -> float:
+        """Seconds until the domain may be requested again."""
+        return self.bucket(domain).delay()
+
+    def take(self, domain: Optional[str] = None) -> float:
+        """Reserve a request slot, returning the wait before it may be used."""
+        return self.bucket(domain).take()
+
     async def acquire(self, domain: Optional[str] = None) -> None:
         """
         Acquire a rate limit slot.
-        
+
         Args:
             domain: Optional domain for domain-specific rate limiting
         """
-        async with self.lock:
-            now = datetime.now()
-            cutoff = now - timedelta(seconds=self.period)
-            
-            # Clean old requests
-            self.requests = {
-                ts: dt for ts, dt in self.requests.items()
-                if dt > cutoff
-            }
-            
-            # Check rate limit
-            if len(self.requests) >= self.rate_limit:
-                oldest = min(self.requests.values())
-                sleep_time = (oldest + timedelta(seconds=self.period) - now).total_seconds()
-                if sleep_time > 0:
-                    await asyncio.sleep(sleep_time)
-                    
-            # Add new request
-            self.requests[str(now.timestamp())] = now 
\ No newline at end of file
+        wait = self.take(domain)
+        if wait > 0:
+            await asyncio.sleep(wait)
@@ -0,0 +1,111 @@
+"""
+Per-host robots.txt cache.
+"""
+import asyncio
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+
+def parse_crawl_delays(lines: Iterable[str]) -> Dict[str, float]:
+    """``Crawl-delay`` per user agent; unlike ``RobotFileParser`` this keeps fractional delays."""
+    delays: Dict[str, float] = {}
+    agents: List[str] = []
+    in_rules = False
+    for line in lines:
+        key, _, value = line.split("#", 1)[0].partition(":")
+        key, value = key.strip().lower(), value.strip()
+        if key == "user-agent":
+            if in_rules:
+                agents, in_rules = [], False
+            agents.append(value.lower())
+        elif key in ("allow", "disallow", "crawl-delay", "request-rate"):
+            in_rules = True
+            if key == "crawl-delay":
+                try:
+                    delay = float(value)
+                except ValueError:
+                    continue
+                for agent in agents:
+                    delays[agent] = delay
+    return delays
+
+
+class RobotsCache:
+    """
+    Fetches and caches robots.txt rules per origin.
+
+    A missing or unreadable robots.txt allows everything. Concurrent lookups
+    for the same origin share one fetch, and the least recently used origins
+    are evicted beyond ``max_hosts``.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str], Awaitable[Optional[str]]],
+        user_agent: str = "*",
+        max_hosts: int = 10_000
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            fetch: Coroutine returning the body of a URL, or ``None``
+            user_agent: Agent name matched against robots.txt groups
+            max_hosts: Origins kept in memory
+        """
+        self.fetch = fetch
+        self.user_agent = user_agent
+        self.max_hosts = max_hosts
+        self._rules: "OrderedDict[str, Tuple[RobotFileParser, Dict[str, float]]]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    async def _rules_for(self, url: str) -> Tuple[RobotFileParser, Dict[str, float]]:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        rules = self._rules.get(origin)
+        if rules is not None:
+            self._rules.move_to_end(origin)
+            return rules
+
+        pending = self._pending.get(origin)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[origin] = future
+        try:
+            try:
+                body = await self.fetch(f"{origin}/robots.txt")
+            except Exception:
+                body = None
+            lines = (body or "").splitlines()
+            parser = RobotFileParser(f"{origin}/robots.txt")
+            parser.parse(lines)
+            rules = self._rules[origin] = (parser, parse_crawl_delays(lines))
+            while len(self._rules) > self.max_hosts:
+                self._rules.popitem(last=False)
+            future.set_result(rules)
+            return rules
+        finally:
+            del self._pending[origin]
+            if not future.done():
+                future.cancel()
+
+    async def get(self, url: str) -> RobotFileParser:
+        """Rules for the origin of ``url``."""
+        return (await self._rules_for(url))[0]
+
+    async def allowed(self, url: str) -> bool:
+        """Whether robots.txt lets the crawler fetch ``url``."""
+        return (await self.get(url)).can_fetch(self.user_agent, url)
+
+    async def crawl_delay(self, url: str) -> Optional[float]:
+        """``Crawl-delay`` for the crawler on the origin of ``url``, if any."""
+        delays = (await self._rules_for(url))[1]
+        agent = self.user_agent.split("/")[0].lower()
+        for name, delay in delays.items():
+            if name != "*" and name in agent:
+                return delay
+        return delays.get("*")
@@ -0,0 +1,152 @@
+"""End-to-end benchmark of crawling and RAG ingestion against a local site.
+
+Run with ``python -m src.crawlers.benchmark``. A fixture HTTP server on
+localhost serves synthetic pages; ``ParallelCrawler`` streams them into
+``RAGProcessor`` so fetching, chunking, embedding and upserts overlap. By
+default embeddings come from the random stub and vectors stay in memory, so
+the numbers measure the pipeline rather than a model or a database.
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator
+
+from rich.console import Console
+from rich.table import Table
+
+from src.crawlers.parallel_crawler import ParallelCrawler
+from src.crawlers.rag_integration import RAGProcessor, documents_from_pages
+from src.rag.embeddings import EmbeddingGenerator
+from src.rag.index import InMemoryIndex
+
+console = Console()
+
+_WORDS = (
+    "crawler queue index vector chunk embedding latency batch worker page "
+    "host limit stream memory throughput search query token cache store"
+).split()
+
+
+def fixture_page(number: int, words: int = 400) -> str:
+    """Deterministic text of one synthetic page."""
+    rng = random.Random(number)
+    return f"Page {number}. " + " ".join(rng.choice(_WORDS) for _ in range(words))
+
+
+@contextmanager
+def serve_fixture_site(words: int = 400, latency: float = 0.0, links: int = 0) -> Iterator[str]:
+    """
+    Serve ``/page/<n>`` on a free localhost port and yield the base URL.
+
+    With ``links``, pages are HTML linking to ``links`` child pages each, an
+    unbounded tree for crawls to explore; otherwise they are plain text.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            try:
+                number = int(self.path.rsplit("/", 1)[-1])
+            except ValueError:
+                self.send_error(404)
+                return
+            if latency:
+                time.sleep(latency)
+            body = fixture_page(number, words)
+            content_type = "text/plain"
+            if links:
+                anchors = "".join(
+                    f'<a href="/page/{number * links + child}">page {number * links + child}</a>'
+                    for child in range(1, links + 1)
+                )
+                body = f"<html><body><p>{body}</p>{anchors}</body></html>"
+                content_type = "text/html"
+            body = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@dataclass
+class PipelineBenchmark:
+    """Measurements for one crawl-and-ingest run."""
+    pages: int
+    seconds: float
+    result: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages / self.seconds if self.seconds > 0 else 0.0
+
+
+async def run_pipeline_benchmark(
+    pages: int = 500,
+    concurrency: int = 16,
+    words: int = 400,
+    latency: float = 0.0,
+    processor: RAGProcessor = None
+) -> PipelineBenchmark:
+    """Crawl ``pages`` fixture pages and ingest them, timing the whole run."""
+    processor = processor or RAGProcessor(EmbeddingGenerator(), InMemoryIndex())
+    with serve_fixture_site(words, latency) as base_url:
+        crawler = ParallelCrawler(concurrency=concurrency, per_host_limit=concurrency)
+        try:
+            urls = (f"{base_url}/page/{i}" for i in range(pages))
+            started = time.perf_counter()
+            result = await processor.process_documents(documents_from_pages(crawler.crawl_stream(urls)))
+            seconds = time.perf_counter() - started
+        finally:
+            await crawler.close()
+    return PipelineBenchmark(pages=result.get("documents", 0), seconds=seconds, result=result)
+
+
+def print_report(benchmark: PipelineBenchmark):
+    """Print per-stage throughput as a table."""
+    table = Table(title=f"{benchmark.pages} pages in {benchmark.seconds:.2f}s ({benchmark.pages_per_second:.1f} pages/s)")
+    table.add_column("Stage")
+    table.add_column("Items", justify="right")
+    table.add_column("Batches", justify="right")
+    table.add_column("Busy (s)", justify="right")
+    table.add_column("Items/s", justify="right")
+    for stage, stats in benchmark.result.get("stages", {}).items():
+        table.add_row(
+            stage,
+            str(stats["items"]),
+            str(stats["batches"]),
+            f"{stats['seconds']:.2f}",
+            f"{stats['throughput']:.0f}"
+        )
+    console.print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark crawling and RAG ingestion end to end")
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--words", type=int, default=400, help="Words per fixture page")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated server latency in seconds")
+    args = parser.parse_args()
+    print_report(asyncio.run(run_pipeline_benchmark(args.pages, args.concurrency, args.words, args.latency)))
+
+
+if __name__ == "__main__":
+    main()
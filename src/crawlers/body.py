@@ -0,0 +1,126 @@
+"""Bounded, incremental reading of response bodies."""
+
+import codecs
+import re
+from typing import AsyncIterable, Iterable, Optional, Union
+
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_ALLOWED_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+
+# Magic numbers of common binaries served without (or with a wrong) content type
+_BINARY_SIGNATURES = (b"%PDF", b"PK\x03\x04", b"\x89PNG", b"GIF8", b"\xff\xd8\xff", b"\x1f\x8b", b"RIFF")
+_HTML_MARKERS = re.compile(rb"^\s*(?:<!doctype\s+html|<html|<head|<body|<!--|<meta|<title|<p\b|<div)", re.I)
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?([\w.:-]+)""", re.I)
+_SNIFF_BYTES = 1024
+
+
+class BodyRejected(Exception):
+    """The body was not (fully) downloaded."""
+
+
+class BodyTooLarge(BodyRejected):
+    """The body is larger than the configured cap."""
+
+
+class UnsupportedContentType(BodyRejected):
+    """The body is not a document the crawler can use."""
+
+
+def media_type(content_type: Optional[str]) -> str:
+    """``text/html`` from ``text/html; charset=utf-8``."""
+    return (content_type or "").split(";", 1)[0].strip().lower()
+
+
+def header_charset(content_type: Optional[str]) -> Optional[str]:
+    """Charset parameter of a Content-Type header, if any."""
+    match = re.search(r"charset\s*=\s*[\"']?([\w.:-]+)", content_type or "", re.I)
+    return match.group(1) if match else None
+
+
+def sniff(prefix: bytes) -> Optional[str]:
+    """Guess the media type of a body from its first bytes; ``None`` for binaries."""
+    if prefix.startswith(_BINARY_SIGNATURES) or b"\x00" in prefix[:_SNIFF_BYTES]:
+        return None
+    if _HTML_MARKERS.match(prefix.lstrip(codecs.BOM_UTF8)):
+        return "text/html"
+    return "text/plain"
+
+
+def _codec(name: Optional[str]) -> Optional[str]:
+    try:
+        return codecs.lookup(name).name if name else None
+    except LookupError:
+        return None
+
+
+class BodyReader:
+    """
+    Decodes a body chunk by chunk while enforcing a size cap.
+
+    A declared Content-Length above ``max_bytes`` or a declared media type
+    outside ``allowed_types`` is rejected before any byte is read. Bodies
+    without a usable type are sniffed from their first chunk. The charset
+    comes from the header, a ``<meta charset>`` in the first chunk, or UTF-8,
+    and decoding is incremental so only the decoded text is kept.
+    """
+
+    def __init__(
+        self,
+        content_type: Optional[str] = None,
+        content_length: Optional[Union[int, str]] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        allowed_types: Iterable[str] = DEFAULT_ALLOWED_TYPES
+    ):
+        self.max_bytes = max_bytes
+        self.allowed_types = tuple(allowed_types)
+        self.media_type = media_type(content_type)
+        self.charset = _codec(header_charset(content_type))
+        self.size = 0
+        self._decoder = None
+        self._parts = []
+
+        try:
+            declared = int(content_length) if content_length is not None else None
+        except ValueError:
+            declared = None
+        if declared is not None and declared > max_bytes:
+            raise BodyTooLarge(f"Content-Length {content_length} exceeds {max_bytes} bytes")
+        if self.media_type and self.media_type != "application/octet-stream":
+            self._check_type(self.media_type)
+
+    def _check_type(self, kind: Optional[str]):
+        if kind not in self.allowed_types:
+            raise UnsupportedContentType(f"Unsupported content type: {kind or 'binary'}")
+
+    def _start(self, chunk: bytes):
+        if not self.media_type or self.media_type == "application/octet-stream":
+            self.media_type = sniff(chunk)
+            self._check_type(self.media_type)
+        if self.charset is None:
+            match = _META_CHARSET.search(chunk[:_SNIFF_BYTES])
+            self.charset = _codec(match.group(1).decode("ascii")) if match else None
+        self._decoder = codecs.getincrementaldecoder(self.charset or "utf-8")(errors="replace")
+
+    def feed(self, chunk: bytes):
+        """Decode the next chunk; raises ``BodyRejected`` to abort the download."""
+        if not chunk:
+            return
+        if self._decoder is None:
+            self._start(chunk)
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise BodyTooLarge(f"Body exceeds {self.max_bytes} bytes")
+        self._parts.append(self._decoder.decode(chunk))
+
+    def text(self) -> str:
+        """The decoded body."""
+        if self._decoder is not None:
+            self._parts.append(self._decoder.decode(b"", final=True))
+            self._decoder = None
+        return "".join(self._parts)
+
+    async def read(self, chunks: AsyncIterable[bytes]) -> str:
+        """Consume a chunk stream and return the decoded body."""
+        async for chunk in chunks:
+            self.feed(chunk)
+        return self.text()
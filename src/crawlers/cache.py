@@ -1,29 +1,257 @@
-from typing import Optional, Any
+from typing import Optional, Any, Dict, List, Literal, Mapping
+import asyncio
+import gzip
 import json
 import hashlib
+import os
+import re
+import shutil
+import time
+import uuid
+from pathlib import Path
 from redis.asyncio import Redis
 from pydantic import BaseModel
+from src.crawlers.dedup import content_hash
+
+_SIZE_UNITS = {"B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3, "TB": 1024 ** 4}
+
+# Primeiro byte de cada valor armazenado: codec do corpo ou ponteiro para disco
+_ZSTD, _GZIP, _RAW, _FILE = b"z", b"g", b"n", b"f"
+
+# Remoção de uma página dentro de um script: apaga o valor, tira do índice e
+# do hash de tamanhos, desconta o total e decrementa a referência do arquivo
+# em disco. KEYS são página, índice, tamanhos, total e referências. Retorna o
+# tamanho descontado e o digest do arquivo que ficou sem referências (ou '').
+_REMOVE_FUNCTION = """
+local function remove(key)
+    local stored = redis.call('GET', key)
+    local size = tonumber(redis.call('HGET', KEYS[3], key) or '0')
+    redis.call('DEL', key)
+    redis.call('ZREM', KEYS[2], key)
+    redis.call('HDEL', KEYS[3], key)
+    if size > 0 then
+        redis.call('DECRBY', KEYS[4], size)
+    end
+    local orphan = ''
+    if stored and string.sub(stored, 1, 1) == 'f' then
+        local digest = string.sub(stored, 2)
+        if redis.call('HINCRBY', KEYS[5], digest, -1) <= 0 then
+            redis.call('HDEL', KEYS[5], digest)
+            orphan = digest
+        end
+    end
+    return {size, orphan}
+end
+"""
+
+# Remove a página atomicamente; com ARGV[1] == '1' só remove se o valor já
+# expirou, para não apagar uma página regravada por outro processo.
+REMOVE_SCRIPT = _REMOVE_FUNCTION + """
+if ARGV[1] == '1' and redis.call('EXISTS', KEYS[1]) == 1 then
+    return {0, ''}
+end
+return remove(KEYS[1])
+"""
+
+# Substitui a página atomicamente. ARGV traz o valor, o tamanho comprimido, o
+# TTL, a pontuação de despejo e o digest do arquivo em disco (ou ''). A nova
+# referência é contada antes de remover a antiga, para que uma página
+# regravada com o mesmo corpo não libere o próprio arquivo.
+SET_SCRIPT = _REMOVE_FUNCTION + """
+if ARGV[5] ~= '' then
+    redis.call('HINCRBY', KEYS[5], ARGV[5], 1)
+end
+local removed = remove(KEYS[1])
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[3])
+redis.call('ZADD', KEYS[2], ARGV[4], KEYS[1])
+redis.call('HSET', KEYS[3], KEYS[1], ARGV[2])
+redis.call('INCRBY', KEYS[4], ARGV[2])
+return removed
+"""
+
+def parse_size(size: str) -> int:
+    """Converte tamanhos como "1GB" ou "512MB" em bytes"""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?B)?\s*", size.upper())
+    if not match:
+        raise ValueError(f"Tamanho inválido: {size}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2) or "B"])
+
+def _zstd_available() -> bool:
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def compress(data: bytes, codec: str) -> bytes:
+    """Comprime e prefixa o codec, para que valores antigos continuem legíveis"""
+    if codec == "zstd":
+        import zstandard
+        return _ZSTD + zstandard.ZstdCompressor(level=3).compress(data)
+    if codec == "gzip":
+        return _GZIP + gzip.compress(data, compresslevel=6)
+    return _RAW + data
+
+def decompress(blob: bytes) -> bytes:
+    """Inverte ``compress`` a partir do prefixo do codec"""
+    tag, data = blob[:1], blob[1:]
+    if tag == _ZSTD:
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data)
+    if tag == _GZIP:
+        return gzip.decompress(data)
+    return data
 
 class CacheConfig(BaseModel):
     """Configuração do cache"""
     enabled: bool = True
     ttl: int = 3600  # 1 hora
     max_size: str = "1GB"
+    validators_ttl: int = 30 * 24 * 3600  # 30 dias
+    namespace: str = "crawlcache"
+    compression: Literal["zstd", "gzip", "none"] = "zstd"
+    eviction: Literal["lru", "lfu"] = "lru"
+    disk_path: Optional[str] = None
+    disk_threshold: int = 256 * 1024  # corpos comprimidos a partir disso vão para o disco
+
+class Validators(BaseModel):
+    """Validadores HTTP e hash do conteúdo da última versão de uma URL"""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
 
 class DistributedCache:
-    """Cache distribuído baseado em Redis"""
+    """
+    Cache distribuído baseado em Redis
+
+    As páginas são guardadas comprimidas (zstd, ou gzip quando o
+    ``zstandard`` não está instalado) sob o prefixo ``namespace``, e o
+    total em bytes é contabilizado contra ``max_size``: ao ultrapassá-lo as
+    entradas menos usadas (LRU) ou menos frequentes (LFU) são removidas.
+    Com ``disk_path``, corpos grandes ficam em arquivos endereçados pelo
+    conteúdo e o Redis guarda apenas o ponteiro. Cada gravação ou remoção é
+    um único script Lua, então o total, os tamanhos, o índice e as
+    referências dos arquivos não divergem entre processos concorrentes.
+
+    Além das páginas, guarda por URL o ETag, o Last-Modified e o hash do
+    conteúdo, para que um re-crawl possa enviar requisições condicionais e
+    pular páginas que não mudaram. Os validadores só são enviados enquanto o
+    corpo está no cache; depois disso o hash ainda detecta um corpo igual.
+    """
     
     def __init__(
         self,
         redis_url: str = "redis://localhost",
-        config: Optional[CacheConfig] = None
+        config: Optional[CacheConfig] = None,
+        evict_batch: int = 64
     ):
         self.redis = Redis.from_url(redis_url)
         self.config = config or CacheConfig()
+        self.max_bytes = parse_size(self.config.max_size)
+        self.evict_batch = evict_batch
+        self.codec = self.config.compression
+        if self.codec == "zstd" and not _zstd_available():
+            self.codec = "gzip"
+        self.disk_root = Path(self.config.disk_path) / self.config.namespace if self.config.disk_path else None
+        self._remove_script = self.redis.register_script(REMOVE_SCRIPT)
+        self._set_script = self.redis.register_script(SET_SCRIPT)
     
     def _get_key(self, url: str) -> str:
         """Gera chave única para URL"""
-        return f"cache:{hashlib.sha256(url.encode()).hexdigest()}"
+        return f"{self.config.namespace}:page:{hashlib.sha256(url.encode()).hexdigest()}"
+    
+    def _get_validators_key(self, url: str) -> str:
+        """Gera chave dos validadores da URL"""
+        return f"{self.config.namespace}:validators:{hashlib.sha256(url.encode()).hexdigest()}"
+    
+    @property
+    def _index_key(self) -> str:
+        """Sorted set das páginas, pontuadas por último acesso (LRU) ou frequência (LFU)"""
+        return f"{self.config.namespace}:index"
+    
+    @property
+    def _sizes_key(self) -> str:
+        return f"{self.config.namespace}:sizes"
+    
+    @property
+    def _bytes_key(self) -> str:
+        return f"{self.config.namespace}:bytes"
+    
+    @property
+    def _refs_key(self) -> str:
+        """Referências por arquivo em disco, já que páginas iguais compartilham o arquivo"""
+        return f"{self.config.namespace}:refs"
+    
+    def _file_path(self, digest: str) -> Path:
+        return self.disk_root / digest[:2] / digest
+    
+    def _write_file(self, digest: str, blob: bytes) -> None:
+        path = self._file_path(digest)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        tmp.write_bytes(blob)
+        os.replace(tmp, path)
+    
+    def _read_file(self, digest: str) -> Optional[bytes]:
+        try:
+            return self._file_path(digest).read_bytes()
+        except FileNotFoundError:
+            return None
+    
+    async def _touch(self, key: str) -> None:
+        """Atualiza a pontuação de despejo de uma página lida"""
+        if self.config.eviction == "lfu":
+            await self.redis.zincrby(self._index_key, 1, key)
+        else:
+            await self.redis.zadd(self._index_key, {key: time.time()}, xx=True)
+    
+    def _script_keys(self, key: str) -> List[str]:
+        return [key, self._index_key, self._sizes_key, self._bytes_key, self._refs_key]
+    
+    async def _unlink_orphan(self, digest: bytes) -> None:
+        """Apaga o arquivo que ficou sem referências"""
+        if not digest:
+            return
+        digest = digest.decode()
+        path = self._file_path(digest)
+        # Tira o arquivo do lugar antes de conferir as referências: quem grava o
+        # mesmo corpo conta a referência antes de gravar, então ou a contagem
+        # já aparece aqui e o arquivo volta, ou o arquivo será gravado de novo.
+        trash = path.with_suffix(f".{uuid.uuid4().hex}.del")
+        try:
+            await asyncio.to_thread(os.replace, path, trash)
+        except FileNotFoundError:
+            return
+        if await self.redis.hexists(self._refs_key, digest):
+            await asyncio.to_thread(os.replace, trash, path)
+        else:
+            await asyncio.to_thread(trash.unlink, True)
+    
+    async def _remove(self, key: str, expired_only: bool = False) -> int:
+        """Remove uma página e desconta seu tamanho, mesmo que já tenha expirado"""
+        size, orphan = await self._remove_script(
+            keys=self._script_keys(key),
+            args=[int(expired_only)]
+        )
+        await self._unlink_orphan(orphan)
+        return int(size)
+    
+    async def _evict(self) -> List[str]:
+        """Remove as páginas de menor pontuação até caber em ``max_size``"""
+        evicted = []
+        excess = int(await self.redis.get(self._bytes_key) or 0) - self.max_bytes
+        while excess > 0:
+            victims = await self.redis.zrange(self._index_key, 0, self.evict_batch - 1)
+            if not victims:
+                break
+            for key in victims:
+                excess -= await self._remove(key.decode())
+                evicted.append(key.decode())
+                if excess <= 0:
+                    break
+        return evicted
     
     async def get(self, url: str) -> Optional[dict]:
         """Recupera conteúdo do cache"""
@@ -31,11 +259,23 @@ class DistributedCache:
             return None
             
         key = self._get_key(url)
-        data = await self.redis.get(key)
+        stored = await self.redis.get(key)
         
-        if data:
-            return json.loads(data)
-        return None
+        if stored is None:
+            # Expirada pelo TTL: libera o espaço contabilizado
+            if await self.redis.zscore(self._index_key, key) is not None:
+                await self._remove(key, expired_only=True)
+            return None
+        
+        blob = stored
+        if stored[:1] == _FILE:
+            blob = await asyncio.to_thread(self._read_file, stored[1:].decode())
+            if blob is None:
+                # Arquivo ainda sendo gravado por outro processo: conta como falta
+                return None
+        
+        await self._touch(key)
+        return json.loads(decompress(blob))
     
     async def set(self, url: str, content: dict) -> None:
         """Armazena conteúdo no cache"""
@@ -43,12 +283,126 @@ class DistributedCache:
             return
             
         key = self._get_key(url)
-        data = json.dumps(content)
+        blob = compress(json.dumps(content).encode(), self.codec)
+        stored, digest = blob, ""
+        if self.disk_root is not None and len(blob) >= self.config.disk_threshold:
+            digest = hashlib.sha256(blob).hexdigest()
+            stored = _FILE + digest.encode()
+        
+        score = 1 if self.config.eviction == "lfu" else time.time()
+        _, orphan = await self._set_script(
+            keys=self._script_keys(key),
+            args=[stored, len(blob), self.config.ttl, score, digest]
+        )
+        if digest:
+            # Só depois de contar a referência; veja ``_unlink_orphan``
+            await asyncio.to_thread(self._write_file, digest, blob)
+        await self._unlink_orphan(orphan)
+        await self._evict()
+    
+    async def refresh(self, url: str) -> bool:
+        """
+        Renova o TTL de uma página guardada sem reescrever o corpo
         
+        Retorna False se a página não está no cache.
+        """
+        if not self.config.enabled:
+            return False
+            
+        key = self._get_key(url)
+        if not await self.redis.expire(key, self.config.ttl):
+            return False
+        await self._touch(key)
+        return True
+    
+    async def usage(self) -> Dict[str, Any]:
+        """Bytes comprimidos e páginas contabilizados no namespace"""
+        used, entries = await asyncio.gather(
+            self.redis.get(self._bytes_key),
+            self.redis.zcard(self._index_key)
+        )
+        return {
+            "bytes": int(used or 0),
+            "entries": entries,
+            "max_bytes": self.max_bytes,
+            "codec": self.codec
+        }
+    
+    async def get_validators(self, url: str) -> Optional[Validators]:
+        """Recupera os validadores da última resposta da URL"""
+        if not self.config.enabled:
+            return None
+            
+        data = await self.redis.get(self._get_validators_key(url))
+        if data:
+            return Validators.model_validate_json(data)
+        return None
+    
+    async def conditional_headers(self, url: str) -> Dict[str, str]:
+        """
+        Cabeçalhos If-None-Match/If-Modified-Since para revalidar a URL
+        
+        Vazio quando o corpo já saiu do cache, pois um 304 não teria o que
+        devolver.
+        """
+        if not await self.redis.exists(self._get_key(url)):
+            return {}
+        validators = await self.get_validators(url)
+        headers = {}
+        if validators and validators.etag:
+            headers["If-None-Match"] = validators.etag
+        if validators and validators.last_modified:
+            headers["If-Modified-Since"] = validators.last_modified
+        return headers
+    
+    async def revalidate(
+        self,
+        url: str,
+        status_code: int,
+        headers: Mapping[str, str],
+        content: str
+    ) -> Optional[Validators]:
+        """
+        Compara a resposta de um re-crawl com a última versão registrada
+        
+        Uma resposta 304 ou um corpo com o mesmo hash contam como inalterados:
+        os validadores são atualizados na hora e o retorno é None. Se o
+        conteúdo mudou, retorna os novos validadores sem gravá-los; chame
+        ``commit_validators`` depois de processar o conteúdo, para que uma
+        falha na ingestão não faça a página parecer já vista.
+        """
+        if not self.config.enabled:
+            return None
+            
+        previous = await self.get_validators(url)
+        if status_code == 304:
+            changed = previous is None
+            digest = previous.content_hash if previous else None
+        else:
+            digest = content_hash(content)
+            changed = previous is None or previous.content_hash != digest
+        
+        validators = Validators(
+            etag=headers.get("etag") or (previous.etag if previous and status_code == 304 else None),
+            last_modified=headers.get("last-modified") or (
+                previous.last_modified if previous and status_code == 304 else None
+            ),
+            content_hash=digest
+        )
+        if changed:
+            return validators
+        await self.commit_validators(url, validators)
+        return None
+    
+    async def commit_validators(self, url: str, validators: Validators) -> None:
+        """Grava os validadores de uma versão já processada da URL"""
+        if not self.config.enabled:
+            return
+            
         await self.redis.set(
-            key,
-            data,
-            ex=self.config.ttl
+            self._get_validators_key(url),
+            validators.model_dump_json(),
+            ex=self.config.validators_ttl
         )
     
     async def invalidate(self, url: str) -> None:
@@ -56,16 +410,26 @@ class DistributedCache:
         if not self.config.enabled:
             return
             
-        key = self._get_key(url)
-        await self.redis.delete(key)
+        await self._remove(self._get_key(url))
+        await self.redis.delete(self._get_validators_key(url))
     
     async def clear(self) -> None:
-        """Limpa todo o cache"""
+        """Limpa o namespace do cache, sem tocar nas demais chaves do Redis"""
         if not self.config.enabled:
             return
             
-        await self.redis.flushdb()
+        batch = []
+        async for key in self.redis.scan_iter(match=f"{self.config.namespace}:*", count=1000):
+            batch.append(key)
+            if len(batch) >= 500:
+                await self.redis.unlink(*batch)
+                batch = []
+        if batch:
+            await self.redis.unlink(*batch)
+        
+        if self.disk_root is not None:
+            await asyncio.to_thread(shutil.rmtree, self.disk_root, True)
     
     async def close(self):
         """Fecha conexão com Redis"""
-        await self.redis.close() 
\ No newline at end of file
+        await self.redis.close() 
@@ -0,0 +1,205 @@
+"""Exact and near-duplicate detection for crawled content."""
+
+import hashlib
+import zlib
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+# Smallest prime above 2**32 for the universal hash family. Shingle hashes and
+# coefficients are 32-bit, so a * x + b never overflows uint64 and the modulus
+# wraps often enough to mix well.
+_PRIME = np.uint64(4294967311)
+
+
+def normalize(text: str) -> str:
+    """Collapse whitespace so formatting-only differences hash the same."""
+    return " ".join(text.split())
+
+
+def content_hash(text: str) -> str:
+    """Hash of the normalized text, used for exact dedup."""
+    return hashlib.sha256(normalize(text).encode("utf-8")).hexdigest()
+
+
+def shingles(text: str, size: int = 5) -> Set[int]:
+    """32-bit hashes of the word n-grams of a text."""
+    words = normalize(text).lower().split()
+    if len(words) <= size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+    return {
+        zlib.crc32(" ".join(words[i:i + size]).encode("utf-8"))
+        for i in range(len(words) - size + 1)
+    }
+
+
+class MinHasher:
+    """MinHash signatures over shingle sets."""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes: Set[int]) -> np.ndarray:
+        """Minimum of every permutation over the shingle hashes."""
+        if not hashes:
+            return np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+        permuted = (np.outer(values, self._a) + self._b) % _PRIME
+        return permuted.min(axis=0)
+
+
+@dataclass
+class DedupStats:
+    """Counts of chunks seen by a deduplicator."""
+    unique: int = 0
+    exact: int = 0
+    near: int = 0
+
+    @property
+    def skipped(self) -> int:
+        """Chunks dropped as duplicates."""
+        return self.exact + self.near
+
+
+class Deduplicator:
+    """Drops exact and near-duplicate chunks before they are embedded.
+
+    Exact duplicates are caught by a content hash. Near duplicates are found
+    with MinHash and LSH banding: signatures are split into bands, chunks
+    sharing any band bucket become candidates, and a candidate counts as a
+    duplicate when the estimated Jaccard similarity reaches ``threshold``.
+
+    ``reserve`` holds a new chunk as pending so later chunks are compared to
+    it, and ``commit`` or ``release`` settles it once the chunk is stored or
+    its batch fails. At most ``capacity`` committed chunks are remembered;
+    the oldest are forgotten first, so a chunk seen long ago may be embedded
+    again and simply overwrite its vector.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        num_perm: int = 128,
+        bands: int = 32,
+        shingle_size: int = 5,
+        seed: int = 1,
+        capacity: Optional[int] = 100_000
+    ):
+        """
+        Initialize the deduplicator.
+
+        Args:
+            threshold: Estimated Jaccard similarity treated as a duplicate
+            num_perm: MinHash permutations per signature
+            bands: LSH bands; more bands find lower-similarity candidates
+            shingle_size: Words per shingle
+            seed: Seed for the hash family
+            capacity: Committed chunks remembered, oldest evicted first;
+                None keeps every chunk
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.hasher = MinHasher(num_perm, seed)
+        self.capacity = capacity
+        self.stats = DedupStats()
+
+        self._next_key = 0
+        # key -> (digest, signature, band keys), oldest first
+        self._entries: "OrderedDict[int, Tuple[str, np.ndarray, List[bytes]]]" = OrderedDict()
+        self._hashes: Dict[str, int] = {}
+        self._buckets: List[Dict[bytes, Set[int]]] = [defaultdict(set) for _ in range(bands)]
+        self._pending: Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [
+            signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+
+    def reserve(self, text: str) -> Tuple[Optional[str], Optional[int]]:
+        """
+        Classify a chunk and hold it as pending when it is new.
+
+        Returns:
+            ``("exact" | "near", None)`` for duplicates, or ``(None, key)``
+            for new content; pass the key to ``commit`` or ``release``
+        """
+        digest = content_hash(text)
+        if digest in self._hashes:
+            self.stats.exact += 1
+            return "exact", None
+
+        signature = self.hasher.signature(shingles(text, self.shingle_size))
+        keys = self._band_keys(signature)
+
+        candidates = set()
+        for band, band_key in enumerate(keys):
+            candidates.update(self._buckets[band].get(band_key, ()))
+        for candidate in candidates:
+            if np.mean(self._entries[candidate][1] == signature) >= self.threshold:
+                self.stats.near += 1
+                return "near", None
+
+        key = self._next_key
+        self._next_key += 1
+        self._entries[key] = (digest, signature, keys)
+        self._hashes[digest] = key
+        for band, band_key in enumerate(keys):
+            self._buckets[band][band_key].add(key)
+        self._pending.add(key)
+        self.stats.unique += 1
+        return None, key
+
+    def commit(self, keys: Iterable[int]):
+        """Remember pending chunks for good, evicting the oldest beyond capacity."""
+        self._pending.difference_update(keys)
+        if self.capacity is None:
+            return
+        while len(self._entries) - len(self._pending) > self.capacity:
+            oldest = next(key for key in self._entries if key not in self._pending)
+            self._forget(oldest)
+
+    def release(self, keys: Iterable[int]):
+        """Forget pending chunks whose batch failed, so a retry sees them as new."""
+        for key in keys:
+            if key in self._pending:
+                self._pending.discard(key)
+                self._forget(key)
+                self.stats.unique -= 1
+
+    def _forget(self, key: int):
+        digest, _, band_keys = self._entries.pop(key)
+        del self._hashes[digest]
+        for band, band_key in enumerate(band_keys):
+            bucket = self._buckets[band][band_key]
+            bucket.discard(key)
+            if not bucket:
+                del self._buckets[band][band_key]
+
+    def check(self, text: str) -> Optional[str]:
+        """
+        Classify a chunk and remember it when it is new.
+
+        Returns:
+            ``"exact"`` or ``"near"`` for duplicates, ``None`` for new content
+        """
+        kind, key = self.reserve(text)
+        if key is not None:
+            self.commit([key])
+        return kind
+
+    def filter(self, texts: List[str]) -> List[int]:
+        """Indices of the texts that are not duplicates, in order."""
+        return [i for i, text in enumerate(texts) if self.check(text) is None]
@@ -0,0 +1,582 @@
+"""Distributed crawling: stateless workers sharing a Redis frontier.
+
+Any number of ``CrawlWorker`` processes, on any number of machines, crawl
+the same ``crawl_id`` by claiming URLs from a ``RedisFrontier``. A claimed
+URL is leased, not removed: if its worker dies the lease runs out and the
+URL goes back to its host's queue. Workers keep no crawl state of their
+own, so they can be added or stopped at any time.
+
+Run local workers with ``python -m src.crawlers.distributed``.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from rich.console import Console
+
+from src.crawler.extraction import extract_html
+from src.crawler.frontier import normalize_url, url_host
+from src.crawler.robots import RobotsCache
+from src.crawlers.parallel_crawler import ParallelCrawler, WebContent
+from src.utils.logger import get_logger
+
+logger = get_logger("distributed_crawler")
+console = Console()
+
+_DONE = object()
+
+# Queue new URLs of one host, skipping any already in the shared visited set.
+# The host becomes ready no earlier than its next allowed fetch.
+PUSH_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local pushed = 0
+for i = 2, #ARGV, 2 do
+    if redis.call('SADD', KEYS[1], ARGV[i]) == 1 then
+        redis.call('RPUSH', KEYS[4], ARGV[i + 1])
+        pushed = pushed + 1
+    end
+end
+if pushed > 0 then
+    local at = math.max(now, tonumber(redis.call('HGET', KEYS[3], ARGV[1]) or 0))
+    redis.call('ZADD', KEYS[2], 'NX', at, ARGV[1])
+    redis.call('INCRBY', KEYS[5], pushed)
+end
+return pushed
+"""
+
+# Requeue expired leases, then lease the next URL of the host that has been
+# ready the longest and push that host back by its delay. Returns
+# {item, wait_ms, leases}: item is '' when nothing can be claimed, and
+# wait_ms is -1 when nothing is queued (or max_pages were claimed).
+CLAIM_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local prefix = ARGV[1]
+
+for _, token in ipairs(redis.call('ZRANGEBYSCORE', KEYS[5], '-inf', now, 'LIMIT', 0, 100)) do
+    local raw = redis.call('HGET', KEYS[4], token)
+    redis.call('ZREM', KEYS[5], token)
+    redis.call('HDEL', KEYS[4], token)
+    if raw then
+        local item = cjson.decode(raw)
+        item['attempts'] = item['attempts'] + 1
+        redis.call('DECR', KEYS[7])
+        if item['attempts'] < tonumber(ARGV[6]) then
+            redis.call('LPUSH', prefix .. 'queue:' .. item['host'], cjson.encode(item))
+            local at = math.max(now, tonumber(redis.call('HGET', KEYS[2], item['host']) or 0))
+            redis.call('ZADD', KEYS[1], 'NX', at, item['host'])
+            redis.call('INCR', KEYS[6])
+        end
+    end
+end
+
+local max_pages = tonumber(ARGV[5])
+if max_pages >= 0 and tonumber(redis.call('GET', KEYS[7]) or 0) >= max_pages then
+    return {'', -1, redis.call('ZCARD', KEYS[5])}
+end
+
+while true do
+    local ready = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    if #ready == 0 then
+        return {'', -1, redis.call('ZCARD', KEYS[5])}
+    end
+    local host, at = ready[1], tonumber(ready[2])
+    if at > now then
+        return {'', at - now, redis.call('ZCARD', KEYS[5])}
+    end
+    local queue = prefix .. 'queue:' .. host
+    local raw = redis.call('LPOP', queue)
+    if raw then
+        local delay = tonumber(redis.call('HGET', KEYS[3], host) or ARGV[4])
+        redis.call('HSET', KEYS[2], host, now + delay)
+        if redis.call('LLEN', queue) > 0 then
+            redis.call('ZADD', KEYS[1], now + delay, host)
+        else
+            redis.call('ZREM', KEYS[1], host)
+        end
+        redis.call('HSET', KEYS[4], ARGV[2], raw)
+        redis.call('ZADD', KEYS[5], now + tonumber(ARGV[3]), ARGV[2])
+        redis.call('DECR', KEYS[6])
+        redis.call('INCR', KEYS[7])
+        return {raw, 0, redis.call('ZCARD', KEYS[5])}
+    end
+    redis.call('ZREM', KEYS[1], host)
+end
+"""
+
+# Give back a lease whose fetch failed: its URL goes to the front of its
+# host's queue with one more attempt, or is dropped after max_attempts.
+# Returns 1 when requeued, 0 when dropped or the lease was already lost.
+NACK_SCRIPT = """
+local raw = redis.call('HGET', KEYS[4], ARGV[2])
+if not raw then
+    return 0
+end
+redis.call('HDEL', KEYS[4], ARGV[2])
+redis.call('ZREM', KEYS[5], ARGV[2])
+redis.call('DECR', KEYS[7])
+local item = cjson.decode(raw)
+item['attempts'] = item['attempts'] + 1
+if item['attempts'] >= tonumber(ARGV[3]) then
+    return 0
+end
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+redis.call('LPUSH', ARGV[1] .. 'queue:' .. item['host'], cjson.encode(item))
+local at = math.max(now, tonumber(redis.call('HGET', KEYS[2], item['host']) or 0))
+redis.call('ZADD', KEYS[1], 'NX', at, item['host'])
+redis.call('INCR', KEYS[6])
+return 1
+"""
+
+# Push a lease's deadline out, only while the lease is still held.
+RENEW_SCRIPT = """
+if not redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+    return 0
+end
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+redis.call('ZADD', KEYS[1], now + tonumber(ARGV[2]), ARGV[1])
+return 1
+"""
+
+
+def url_digest(url: str) -> str:
+    """Member of the shared visited set for a canonical URL."""
+    return hashlib.blake2b(url.encode("utf-8"), digest_size=16).hexdigest()
+
+
+@dataclass
+class Lease:
+    """A URL claimed by one worker until it is acked, nacked or its lease runs out."""
+    token: str
+    url: str
+    depth: int
+    host: str
+    attempts: int = 0
+
+
+class RedisFrontier:
+    """
+    Crawl frontier shared by all workers of a crawl through Redis.
+
+    Layout (all keys live under ``<namespace>:{<crawl_id>}:``; the hash tag
+    keeps them in one Redis Cluster slot so the scripts can touch them all):
+        seen          set of digests of every URL ever queued
+        queue:<host>  list of queued items per host
+        ready         sorted set host -> time the host may next be fetched
+        next          hash host -> earliest time of the host's next fetch
+        delay         hash host -> milliseconds between fetches
+        leases        hash lease token -> leased item
+        deadlines     sorted set lease token -> lease expiry
+        queued        number of queued items
+        claimed       number of items leased or done, for ``max_pages``
+
+    URLs are normalized and filtered like in the local ``Frontier``. Every
+    claim, requeue and push is one atomic script using the Redis clock, so
+    workers on different machines agree on host delays and lease expiry.
+    """
+
+    def __init__(
+        self,
+        redis_url: str = "redis://localhost",
+        crawl_id: str = "default",
+        namespace: str = "crawl",
+        allowed_hosts: Optional[Iterable[str]] = None,
+        max_depth: Optional[int] = None,
+        max_pages: Optional[int] = None,
+        host_delay: float = 1.0,
+        lease_timeout: float = 60.0,
+        max_attempts: int = 3,
+        poll_interval: float = 0.5
+    ):
+        """
+        Initialize the frontier.
+
+        Args:
+            redis_url: Redis connection URL
+            crawl_id: Crawl shared by every worker using the same id
+            namespace: Key prefix for all crawl keys
+            allowed_hosts: Hosts that may be queued; any host when ``None``
+            max_depth: Link depth below the seeds that is still queued
+            max_pages: Pages claimed across all workers before the crawl ends
+            host_delay: Seconds between fetches of one host, unless a
+                longer Crawl-delay is set
+            lease_timeout: Seconds a worker has to finish a URL before it is
+                handed to another worker
+            max_attempts: Leases a URL may lose or fail before it is dropped
+            poll_interval: Seconds between claims while the queue is empty
+                but other workers still hold leases
+        """
+        self.redis = Redis.from_url(redis_url)
+        self.crawl_id = crawl_id
+        self.prefix = f"{namespace}:{{{crawl_id}}}:"
+        self.allowed_hosts = (
+            {url_host(f"//{host}") for host in allowed_hosts} if allowed_hosts is not None else None
+        )
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.host_delay = host_delay
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self._push = self.redis.register_script(PUSH_SCRIPT)
+        self._claim = self.redis.register_script(CLAIM_SCRIPT)
+        self._renew = self.redis.register_script(RENEW_SCRIPT)
+        self._nack = self.redis.register_script(NACK_SCRIPT)
+
+    def _key(self, name: str) -> str:
+        return self.prefix + name
+
+    async def extend(self, links: Iterable[str], depth: int, base: Optional[str] = None) -> int:
+        """Queue links found on a page at ``depth``; one round-trip per host."""
+        if self.max_depth is not None and depth > self.max_depth:
+            return 0
+
+        by_host: Dict[str, Dict[str, str]] = defaultdict(dict)
+        for link in links:
+            url = normalize_url(link, base)
+            if url is None:
+                continue
+            if self.allowed_hosts is not None and url_host(url) not in self.allowed_hosts:
+                continue
+            host = urlsplit(url).netloc
+            item = {"url": url, "depth": depth, "host": host, "attempts": 0}
+            by_host[host][url_digest(url)] = json.dumps(item)
+
+        pushed = 0
+        for host, items in by_host.items():
+            args: List[str] = [host]
+            for digest, item in items.items():
+                args.extend((digest, item))
+            pushed += await self._push(
+                keys=[self._key("seen"), self._key("ready"), self._key("next"),
+                      self._key(f"queue:{host}"), self._key("queued")],
+                args=args
+            )
+        return pushed
+
+    async def push(self, url: str, depth: int = 0, base: Optional[str] = None) -> bool:
+        """Queue a URL if it passes the filters and no worker queued it before."""
+        return await self.extend([url], depth, base) > 0
+
+    def _lease_keys(self) -> List[str]:
+        return [self._key(name) for name in ("ready", "next", "delay", "leases", "deadlines", "queued", "claimed")]
+
+    async def claim(self) -> Tuple[Optional[Lease], Optional[float]]:
+        """
+        Lease the next URL whose host may be fetched now.
+
+        Returns:
+            ``(lease, None)`` when a URL was claimed, ``(None, seconds)`` to
+            wait before trying again, or ``(None, None)`` when the crawl is
+            over: nothing is queued and no other worker holds a lease that
+            could still add links
+        """
+        token = uuid.uuid4().hex
+        raw, wait_ms, leases = await self._claim(
+            keys=self._lease_keys(),
+            args=[
+                self.prefix,
+                token,
+                int(self.lease_timeout * 1000),
+                int(self.host_delay * 1000),
+                self.max_pages if self.max_pages is not None else -1,
+                self.max_attempts
+            ]
+        )
+        if raw:
+            return Lease(token=token, **json.loads(raw)), None
+        if wait_ms >= 0:
+            return None, wait_ms / 1000
+        if leases:
+            # Others may still add links or lose their leases
+            return None, self.poll_interval
+        return None, None
+
+    async def ack(self, lease: Lease) -> bool:
+        """Mark a leased URL done; ``False`` if the lease had already expired."""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hdel(self._key("leases"), lease.token)
+            pipe.zrem(self._key("deadlines"), lease.token)
+            _, removed = await pipe.execute()
+        return bool(removed)
+
+    async def nack(self, lease: Lease) -> bool:
+        """
+        Give a failed URL back to its host's queue with one more attempt.
+
+        Returns:
+            ``True`` if the URL was requeued, ``False`` if it used up
+            ``max_attempts`` and was dropped or the lease had already expired
+        """
+        return bool(await self._nack(
+            keys=self._lease_keys(),
+            args=[self.prefix, lease.token, self.max_attempts]
+        ))
+
+    async def renew(self, lease: Lease) -> bool:
+        """Extend a lease by ``lease_timeout``; ``False`` if it was lost."""
+        return bool(await self._renew(
+            keys=[self._key("deadlines")],
+            args=[lease.token, int(self.lease_timeout * 1000)]
+        ))
+
+    async def set_host_delay(self, host: str, seconds: float):
+        """Space fetches of a host at least ``seconds`` apart, e.g. its Crawl-delay."""
+        if seconds > self.host_delay:
+            await self.redis.hset(self._key("delay"), host, int(seconds * 1000))
+
+    async def stats(self) -> Dict[str, int]:
+        """Queued, leased and claimed URLs and the size of the visited set."""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.get(self._key("queued"))
+            pipe.zcard(self._key("deadlines"))
+            pipe.get(self._key("claimed"))
+            pipe.scard(self._key("seen"))
+            queued, leased, claimed, seen = await pipe.execute()
+        return {
+            "queued": int(queued or 0),
+            "leased": leased,
+            "claimed": int(claimed or 0),
+            "seen": seen
+        }
+
+    async def clear(self):
+        """Delete every key of the crawl."""
+        async for key in self.redis.scan_iter(match=f"{self.prefix}*", count=1000):
+            await self.redis.unlink(key)
+
+    async def close(self):
+        await self.redis.close()
+
+
+class FetchFailed(Exception):
+    """A leased URL could not be fetched and should be tried again later."""
+
+
+class CrawlWorker:
+    """
+    Stateless crawl worker.
+
+    ``concurrency`` tasks claim URLs from the shared frontier, fetch them
+    with a ``ParallelCrawler``, queue the links they find and ack the lease.
+    Leases are renewed while a page is being processed, so slow pages are
+    not handed out twice; a crashed worker's leases expire and its URLs are
+    retried by the others.
+
+    Failed fetches, 429 and 5xx answers are nacked instead, so the URL is
+    retried up to the frontier's ``max_attempts``; other 4xx answers are
+    final and acked. Frontier calls that fail with a Redis error are retried
+    ``retries`` times with exponential backoff, after which the error is
+    raised from ``run``.
+    """
+
+    def __init__(
+        self,
+        frontier: RedisFrontier,
+        crawler: Optional[ParallelCrawler] = None,
+        concurrency: int = 8,
+        respect_robots: bool = True,
+        user_agent: str = "SynapseCrawler",
+        retries: int = 5,
+        retry_backoff: float = 0.5
+    ):
+        self.frontier = frontier
+        self.crawler = crawler or ParallelCrawler(concurrency=concurrency, per_host_limit=concurrency)
+        self.concurrency = concurrency
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.robots = RobotsCache(self._fetch_text, user_agent) if respect_robots else None
+
+    async def _fetch_text(self, url: str) -> Optional[str]:
+        page = await self.crawler.crawl_url(url)
+        return page.content if page and page.status_code == 200 else None
+
+    async def _retrying(self, call, *args):
+        """Await a frontier call, retrying Redis errors with exponential backoff."""
+        for attempt in range(self.retries):
+            try:
+                return await call(*args)
+            except RedisError as e:
+                if attempt == self.retries - 1:
+                    raise
+                delay = self.retry_backoff * 2 ** attempt
+                logger.warning(f"Frontier unavailable ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def _heartbeat(self, lease: Lease):
+        while True:
+            await asyncio.sleep(self.frontier.lease_timeout / 3)
+            if not await self.frontier.renew(lease):
+                logger.warning(f"Lost lease on {lease.url}")
+                return
+
+    async def process(self, lease: Lease) -> Optional[WebContent]:
+        """
+        Fetch a leased URL and queue its links; the lease is settled by the caller.
+
+        Raises:
+            FetchFailed: The fetch failed or the server answered 429 or 5xx
+        """
+        if self.robots is not None:
+            if not await self.robots.allowed(lease.url):
+                return None
+            delay = await self.robots.crawl_delay(lease.url)
+            if delay:
+                await self.frontier.set_host_delay(lease.host, delay)
+
+        page = await self.crawler.crawl_url(lease.url)
+        if page is None:
+            raise FetchFailed(f"Could not fetch {lease.url}")
+        if page.status_code == 429 or page.status_code >= 500:
+            raise FetchFailed(f"HTTP {page.status_code} from {lease.url}")
+        if page.status_code == 200 and page.content:
+            links = (await asyncio.to_thread(extract_html, page.content))["links"]
+            # Links are queued before the ack so the crawl cannot look finished in between
+            await self.frontier.extend(links, lease.depth + 1, base=lease.url)
+        page.metadata.update({"depth": lease.depth, "attempts": lease.attempts})
+        return page
+
+    async def _worker(self, results: asyncio.Queue):
+        try:
+            while True:
+                lease, wait = await self._retrying(self.frontier.claim)
+                if lease is None:
+                    if wait is None:
+                        await results.put(_DONE)
+                        return
+                    await asyncio.sleep(wait)
+                    continue
+
+                heartbeat = asyncio.create_task(self._heartbeat(lease))
+                failed = False
+                try:
+                    page = await self.process(lease)
+                except Exception as e:
+                    logger.error(f"Error processing {lease.url}: {e}")
+                    page, failed = None, True
+                finally:
+                    heartbeat.cancel()
+                if failed:
+                    await self._retrying(self.frontier.nack, lease)
+                    continue
+                await self._retrying(self.frontier.ack, lease)
+                if page is not None:
+                    await results.put(page)
+        except Exception as e:
+            # Handed to run() so the crawl fails instead of waiting forever
+            await results.put(e)
+
+    async def run(self) -> AsyncIterator[WebContent]:
+        """
+        Crawl until the shared frontier is exhausted, yielding pages as they complete.
+
+        Raises:
+            RedisError: The frontier stayed unreachable after ``retries`` attempts
+        """
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        tasks = [asyncio.create_task(self._worker(results)) for _ in range(self.concurrency)]
+        try:
+            running = self.concurrency
+            while running:
+                result = await results.get()
+                if result is _DONE:
+                    running -= 1
+                elif isinstance(result, Exception):
+                    raise result
+                else:
+                    yield result
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def close(self):
+        await self.crawler.close()
+
+
+async def _run_worker(
+    redis_url: str,
+    crawl_id: str,
+    seeds: List[str],
+    concurrency: int,
+    max_pages: Optional[int],
+    host_delay: float
+) -> List[str]:
+    frontier = RedisFrontier(redis_url, crawl_id, max_pages=max_pages, host_delay=host_delay)
+    worker = CrawlWorker(frontier, concurrency=concurrency)
+    try:
+        for seed in seeds:
+            await frontier.push(seed)
+        return [page.url async for page in worker.run()]
+    finally:
+        await worker.close()
+        await frontier.close()
+
+
+def run_worker(
+    redis_url: str,
+    crawl_id: str,
+    seeds: List[str],
+    concurrency: int = 8,
+    max_pages: Optional[int] = None,
+    host_delay: float = 1.0
+) -> List[str]:
+    """Run one worker to the end of the crawl and return the URLs it fetched; usable as a process target."""
+    return asyncio.run(_run_worker(redis_url, crawl_id, seeds, concurrency, max_pages, host_delay))
+
+
+async def _clear_crawl(redis_url: str, crawl_id: str):
+    frontier = RedisFrontier(redis_url, crawl_id)
+    try:
+        await frontier.clear()
+    finally:
+        await frontier.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run distributed crawl workers against a shared Redis frontier")
+    parser.add_argument("seeds", nargs="*", help="Seed URLs; a local fixture site is crawled when omitted")
+    parser.add_argument("--redis", default="redis://localhost")
+    parser.add_argument("--crawl-id", default=None, help="Join an existing crawl instead of starting one")
+    parser.add_argument("--workers", type=int, default=4, help="Local worker processes")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent fetches per worker")
+    parser.add_argument("--max-pages", type=int, default=500)
+    parser.add_argument("--host-delay", type=float, default=0.0, help="Seconds between fetches of one host")
+    args = parser.parse_args()
+
+    from src.crawlers.benchmark import serve_fixture_site
+
+    crawl_id = args.crawl_id or uuid.uuid4().hex
+    with serve_fixture_site(links=5, latency=0.01) as base_url:
+        seeds = args.seeds or [f"{base_url}/page/0"]
+        started = time.perf_counter()
+        with multiprocessing.get_context("spawn").Pool(args.workers) as pool:
+            crawled = pool.starmap(run_worker, [
+                (args.redis, crawl_id, seeds, args.concurrency, args.max_pages, args.host_delay)
+                for _ in range(args.workers)
+            ])
+        seconds = time.perf_counter() - started
+    if args.crawl_id is None:
+        asyncio.run(_clear_crawl(args.redis, crawl_id))
+
+    pages = sum(len(urls) for urls in crawled)
+    for number, urls in enumerate(crawled):
+        console.print(f"worker {number}: {len(urls)} pages")
+    console.print(f"{pages} pages ({len(set().union(*crawled))} unique) in {seconds:.2f}s, {pages / seconds:.1f} pages/s")
+
+
+if __name__ == "__main__":
+    main()
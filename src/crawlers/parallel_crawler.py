@@ -1,13 +1,22 @@
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterable, AsyncIterator, Dict, Any, Iterable, List, Optional, Union, TYPE_CHECKING
 import asyncio
 import httpx
+from collections import defaultdict
+from contextlib import asynccontextmanager
 from datetime import datetime
+from urllib.parse import urlsplit
 from pydantic import BaseModel, Field
 from src.utils.logger import get_logger
-from src.analytics.metrics.crawler_metrics import CrawlerMetrics
+from src.analytics.metrics.crawler_metrics import CRAWL_SOURCE, CrawlerMetrics
+from src.crawlers.body import DEFAULT_ALLOWED_TYPES, DEFAULT_MAX_BYTES, BodyReader, BodyRejected
+
+if TYPE_CHECKING:
+    from src.crawlers.cache import DistributedCache
 
 logger = get_logger("parallel_crawler")
 
+_DONE = object()
+
 class WebContent(BaseModel):
     url: str
     content: str
@@ -16,46 +25,206 @@ class WebContent(BaseModel):
     metadata: Dict[str, Any] = Field(default_factory=dict)
     timestamp: datetime = Field(default_factory=datetime.now)
 
+class HostLimiter:
+    """Caps concurrent requests per host; idle hosts are forgotten so memory tracks active hosts only."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._users: Dict[str, int] = defaultdict(int)
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        host = urlsplit(url).netloc
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.limit))
+        self._users[host] += 1
+        try:
+            async with semaphore:
+                yield
+        finally:
+            self._users[host] -= 1
+            if not self._users[host]:
+                del self._users[host]
+                del self._semaphores[host]
+
 class ParallelCrawler:
-    def __init__(self, concurrency: int = 5, timeout: int = 30):
+    """
+    Worker-pool crawler.
+
+    ``concurrency`` workers pull URLs from a bounded queue, so at most that many
+    requests are in flight, and no more than ``per_host_limit`` of them go to
+    the same host. Results are streamed through a bounded queue; memory stays
+    flat no matter how many URLs are crawled.
+
+    With a ``cache``, re-crawls are conditional: the stored ETag and
+    Last-Modified are sent along, and pages answered with 304 or whose body
+    hashes the same as last time are marked ``unchanged`` in their metadata.
+    A changed page is only remembered once ``commit`` is called for it, so
+    pages whose ingestion failed are fetched and processed again next time.
+
+    Bodies are streamed and decoded incrementally. Anything over
+    ``max_bytes`` or outside ``allowed_types`` is abandoned as soon as that is
+    known, so memory per request stays bounded on untrusted sites.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 5,
+        timeout: int = 30,
+        per_host_limit: int = 2,
+        cache: Optional["DistributedCache"] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        allowed_types: Iterable[str] = DEFAULT_ALLOWED_TYPES
+    ):
         self.concurrency = concurrency
         self.timeout = timeout
-        self.client = httpx.AsyncClient(timeout=timeout)
+        self.per_host_limit = per_host_limit
+        self.cache = cache
+        self.max_bytes = max_bytes
+        self.allowed_types = tuple(allowed_types)
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        )
         self.metrics = CrawlerMetrics()
-        
-    async def crawl_url(self, url: str) -> Optional[WebContent]:
+        self.hosts = HostLimiter(per_host_limit)
+
+    async def crawl_url(self, url: str, conditional: bool = True) -> Optional[WebContent]:
         try:
+            headers = await self.cache.conditional_headers(url) if self.cache and conditional else {}
             start_time = datetime.now()
-            response = await self.client.get(url)
+            async with self.client.stream("GET", url, headers=headers or None) as response:
+                reader = BodyReader(
+                    response.headers.get("content-type"),
+                    response.headers.get("content-length"),
+                    self.max_bytes,
+                    self.allowed_types
+                )
+                content = await reader.read(response.aiter_bytes())
             duration = (datetime.now() - start_time).total_seconds()
-            
+
             await self.metrics.track_crawl(
                 url=url,
                 status=response.status_code,
                 duration=duration,
-                size=len(response.content)
+                size=reader.size
             )
-            
+
+            metadata = {
+                "duration": duration,
+                "size": reader.size
+            }
+            if self.cache:
+                if response.status_code == 304:
+                    cached = await self.cache.get(url)
+                    if cached is None:
+                        # The body was evicted after the validators were sent
+                        return await self.crawl_url(url, conditional=False)
+                    content = cached["content"]
+                pending = await self.cache.revalidate(
+                    url, response.status_code, response.headers, content
+                )
+                metadata["unchanged"] = pending is None
+                if pending is not None:
+                    metadata["validators"] = pending
+                # An unchanged body already in the cache only has its TTL renewed
+                if pending is not None or not await self.cache.refresh(url):
+                    if response.status_code != 304:
+                        await self.cache.set(url, {"content": content, "status_code": response.status_code})
+
             return WebContent(
                 url=url,
-                content=response.text,
+                content=content,
                 status_code=response.status_code,
                 headers=dict(response.headers),
-                metadata={
-                    "duration": duration,
-                    "size": len(response.content)
-                }
+                metadata=metadata
+            )
+        except BodyRejected as e:
+            logger.warning(f"Skipped body of {url}: {e}")
+            await self.metrics.track_error(
+                source=CRAWL_SOURCE,
+                endpoint="crawl",
+                error_type=type(e).__name__
             )
+            return None
         except Exception as e:
             logger.error(f"Error crawling {url}: {e}")
-            await self.metrics.track_error(url=url, error=str(e))
+            await self.metrics.track_error(
+                source=CRAWL_SOURCE,
+                endpoint="crawl",
+                error_type=type(e).__name__
+            )
             return None
-            
+
+    async def _feed(self, urls: Union[Iterable[str], AsyncIterable[str]], queue: asyncio.Queue):
+        try:
+            if isinstance(urls, AsyncIterable):
+                async for url in urls:
+                    await queue.put(url)
+            else:
+                for url in urls:
+                    await queue.put(url)
+        except Exception:
+            # Let the workers drain and stop; the error is re-raised to the consumer
+            await self._stop_workers(queue)
+            raise
+        await self._stop_workers(queue)
+
+    async def _stop_workers(self, queue: asyncio.Queue):
+        for _ in range(self.concurrency):
+            await queue.put(_DONE)
+
+    async def _worker(self, queue: asyncio.Queue, results: asyncio.Queue):
+        while True:
+            url = await queue.get()
+            if url is _DONE:
+                await results.put(_DONE)
+                return
+            async with self.hosts.slot(url):
+                result = await self.crawl_url(url)
+            if result is not None:
+                await results.put(result)
+
+    async def crawl_stream(self, urls: Union[Iterable[str], AsyncIterable[str]]) -> AsyncIterator[WebContent]:
+        """
+        Crawl URLs and yield pages as they complete.
+
+        The input is consumed lazily, so generators of any size can be passed.
+        Failed URLs are logged and skipped. Leaving the loop early cancels the
+        remaining work.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        tasks = [asyncio.create_task(self._feed(urls, queue))]
+        tasks.extend(asyncio.create_task(self._worker(queue, results)) for _ in range(self.concurrency))
+
+        try:
+            running = self.concurrency
+            while running:
+                result = await results.get()
+                if result is _DONE:
+                    running -= 1
+                else:
+                    yield result
+            await tasks[0]
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
     async def crawl_urls(self, urls: List[str]) -> List[WebContent]:
-        await self.metrics.set_active_crawls(len(urls))
-        tasks = [self.crawl_url(url) for url in urls]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        return [r for r in results if r is not None]
-        
+        """Crawl a list of URLs and collect the successful pages in completion order."""
+        await self.metrics.add_active_crawls(len(urls))
+        try:
+            return [result async for result in self.crawl_stream(urls)]
+        finally:
+            await self.metrics.add_active_crawls(-len(urls))
+
+    async def commit(self, page: WebContent):
+        """Record a changed page as seen, once it has been processed downstream."""
+        validators = page.metadata.get("validators")
+        if self.cache and validators is not None:
+            await self.cache.commit_validators(page.url, validators)
+
     async def close(self):
-        await self.client.aclose() 
\ No newline at end of file
+        await self.client.aclose()
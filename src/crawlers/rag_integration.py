@@ -1,92 +1,270 @@
 """RAG integration module for processing crawled documents."""
 
-from typing import Dict, Any, List, Optional
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Union
 from datetime import datetime
+
+import numpy as np
 from pydantic import BaseModel
 
 from src.analytics.metrics.crawler_metrics import CrawlerMetrics
+from src.crawlers.dedup import Deduplicator
+from src.crawlers.parallel_crawler import WebContent
+from src.rag.chunking import TextChunker, chunk_id, document_key
+from src.rag.index import VectorIndex
 from src.utils.logger import get_logger
 
 logger = get_logger("rag_integration")
 
+_DONE = object()
+
 class Document(BaseModel):
     """Model for processed document"""
     content: str
     metadata: Dict[str, Any] = {}
     timestamp: datetime = datetime.now()
 
+@dataclass
+class StageStats:
+    """Work done by one pipeline stage."""
+    items: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Items per second of busy time."""
+        return self.items / self.seconds if self.seconds > 0 else 0.0
+
+async def documents_from_pages(pages: AsyncIterable[WebContent]) -> AsyncIterator[Document]:
+    """
+    Turn crawled pages into documents, e.g. from ``ParallelCrawler.crawl_stream``.
+
+    Pages a conditional re-crawl found unchanged are skipped, so they are not
+    chunked and embedded again.
+    """
+    async for page in pages:
+        if page.metadata.get("unchanged"):
+            continue
+        yield Document(
+            content=page.content,
+            metadata={"url": page.url, "status_code": page.status_code},
+            timestamp=page.timestamp
+        )
+
 class RAGProcessor:
-    """RAG processor for crawled documents"""
-    
-    def __init__(self):
+    """
+    RAG processor for crawled documents.
+
+    Chunking, embedding and vector upserts run as concurrent stages connected
+    by bounded queues, so a stream of crawled pages is indexed while it is
+    still being fetched and memory stays flat for any number of documents.
+    """
+
+    def __init__(
+        self,
+        embedder: Any,
+        index: VectorIndex,
+        deduplicator: Optional[Deduplicator] = None,
+        chunker: Optional[TextChunker] = None,
+        embed_batch_size: int = 32,
+        upsert_batch_size: int = 256,
+        queue_size: int = 512
+    ):
+        """
+        Args:
+            embedder: Anything with an async ``generate_batch(texts)``
+            index: Vector index receiving the chunks
+            deduplicator: Drops repeated chunks before embedding; shared across
+                calls so boilerplate seen on earlier pages is skipped too
+            chunker: Splits documents into chunks
+            embed_batch_size: Chunks per embedding call
+            upsert_batch_size: Chunks per index upsert
+            queue_size: Capacity of each inter-stage queue
+        """
         self.metrics = CrawlerMetrics()
-        
+        self.deduplicator = deduplicator or Deduplicator()
+        self.chunker = chunker or TextChunker()
+        self.embedder = embedder
+        self.index = index
+        self.embed_batch_size = embed_batch_size
+        self.upsert_batch_size = upsert_batch_size
+        self.queue_size = queue_size
+
     async def process_documents(
         self,
-        documents: List[Document]
+        documents: Union[Iterable[Document], AsyncIterable[Document]]
     ) -> Dict[str, Any]:
         """
-        Process a list of documents for RAG
-        
+        Process documents for RAG
+
         Args:
-            documents: List of documents to process
-            
+            documents: Documents to process; an async iterable is consumed
+                as it produces, so crawling and indexing overlap
+
         Returns:
-            Dict with processing results
+            Dict with processing results and per-stage throughput
         """
+        start_time = datetime.now()
+        stages = {name: StageStats() for name in ("chunk", "embed", "store")}
+        counts = {"documents": 0, "chunks": 0}
+        exact_before = self.deduplicator.stats.exact
+        near_before = self.deduplicator.stats.near
+        chunk_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        vector_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        # Chunk id -> dedup key, committed only once the chunk is stored
+        reserved: Dict[str, int] = {}
+
+        async def drain(queue: asyncio.Queue, name: str, size: int) -> List:
+            # Wait for one item, then take whatever else is ready up to size
+            batch = [await queue.get()]
+            while len(batch) < size and batch[-1] is not _DONE and not queue.empty():
+                batch.append(queue.get_nowait())
+            await self.metrics.set_queue_depth(name, queue.qsize())
+            return batch
+
+        async def record(stage: str, items: int, started: float):
+            elapsed = time.perf_counter() - started
+            stats = stages[stage]
+            stats.items += items
+            stats.batches += 1
+            stats.seconds += elapsed
+            await self.metrics.track_stage(stage, items, elapsed)
+
+        async def chunk_document(document: Document):
+            counts["documents"] += 1
+            started = time.perf_counter()
+            chunks = await asyncio.to_thread(self._chunk_documents, [document])
+            counts["chunks"] += len(chunks)
+            unique = self._deduplicate(chunks, reserved)
+            await record("chunk", len(unique), started)
+            for chunk in unique:
+                await chunk_queue.put(chunk)
+
+        async def chunk_stage():
+            if isinstance(documents, AsyncIterable):
+                async for document in documents:
+                    await chunk_document(document)
+            else:
+                for document in documents:
+                    await chunk_document(document)
+            await chunk_queue.put(_DONE)
+
+        async def embed_stage():
+            done = False
+            while not done:
+                batch = await drain(chunk_queue, "chunks", self.embed_batch_size)
+                if batch[-1] is _DONE:
+                    batch.pop()
+                    done = True
+                if not batch:
+                    continue
+                started = time.perf_counter()
+                embeddings = await self._generate_embeddings([chunk["content"] for chunk in batch])
+                await record("embed", len(batch), started)
+                for chunk, embedding in zip(batch, embeddings):
+                    await vector_queue.put({**chunk, "embedding": embedding})
+            await vector_queue.put(_DONE)
+
+        async def store_stage():
+            done = False
+            while not done:
+                batch = await drain(vector_queue, "vectors", self.upsert_batch_size)
+                if batch[-1] is _DONE:
+                    batch.pop()
+                    done = True
+                if not batch:
+                    continue
+                started = time.perf_counter()
+                stored = await self._store_vectors(batch)
+                self.deduplicator.commit([reserved.pop(chunk_id) for chunk_id in stored if chunk_id in reserved])
+                await record("store", len(batch), started)
+
+        tasks = [asyncio.create_task(stage()) for stage in (chunk_stage, embed_stage, store_stage)]
         try:
-            start_time = datetime.now()
-            
-            # Process documents
-            chunks = await self._chunk_documents(documents)
-            embeddings = await self._generate_embeddings(chunks)
-            vectors = await self._store_vectors(embeddings)
-            
-            # Track metrics
-            duration = (datetime.now() - start_time).total_seconds()
-            await self.metrics.observe_duration(duration)
-            await self.metrics.track_page(status='success')
-            
-            return {
-                'success': True,
-                'documents': len(documents),
-                'chunks': len(chunks),
-                'embeddings': len(embeddings),
-                'vectors': len(vectors),
-                'duration': duration
-            }
-            
+            await asyncio.gather(*tasks)
         except Exception as e:
             logger.error(f"Error processing documents: {str(e)}")
-            await self.metrics.track_page(status='error')
+            await self.metrics.track_pipeline(status='error')
             return {
                 'success': False,
                 'error': str(e)
             }
-            
-    async def _chunk_documents(
+        finally:
+            # A failed stage must not leave the others blocked on a full queue
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # Chunks that never reached the index count as new on a retry
+            self.deduplicator.release(reserved.values())
+
+        duration = (datetime.now() - start_time).total_seconds()
+        await self.metrics.track_pipeline(status='success', duration=duration)
+
+        return {
+            'success': True,
+            'documents': counts["documents"],
+            'chunks': counts["chunks"],
+            'duplicates_skipped': {
+                'exact': self.deduplicator.stats.exact - exact_before,
+                'near': self.deduplicator.stats.near - near_before
+            },
+            'embeddings': stages["embed"].items,
+            'vectors': stages["store"].items,
+            'duration': duration,
+            'stages': {
+                name: {
+                    'items': stats.items,
+                    'batches': stats.batches,
+                    'seconds': stats.seconds,
+                    'throughput': stats.throughput
+                }
+                for name, stats in stages.items()
+            }
+        }
+
+    def _chunk_documents(
         self,
         documents: List[Document]
-    ) -> List[str]:
-        """Split documents into chunks"""
+    ) -> List[Dict[str, Any]]:
+        """Split documents into chunks; runs in a worker thread"""
         chunks = []
         for doc in documents:
-            # TODO: Implement real chunking
-            chunks.append(doc.content)
+            document = document_key(doc.content, doc.metadata)
+            for chunk in self.chunker.split_text(doc.content, doc.metadata):
+                chunks.append({
+                    "id": chunk_id(chunk.text, document),
+                    "content": chunk.text,
+                    "metadata": chunk.metadata
+                })
         return chunks
-        
+
+    def _deduplicate(self, chunks: List[Dict[str, Any]], reserved: Dict[str, int]) -> List[Dict[str, Any]]:
+        """Drop exact and near-duplicate chunks, reserving the new ones until stored"""
+        unique = []
+        for chunk in chunks:
+            _, key = self.deduplicator.reserve(chunk["content"])
+            if key is not None:
+                reserved[chunk["id"]] = key
+                unique.append(chunk)
+        if len(unique) < len(chunks):
+            logger.info(f"Skipped {len(chunks) - len(unique)} duplicate chunks")
+        return unique
+
     async def _generate_embeddings(
         self,
         chunks: List[str]
     ) -> List[List[float]]:
-        """Generate embeddings for chunks"""
-        # TODO: Implement real embedding generation
-        return [[0.0] * 768 for _ in chunks]
-        
+        """Generate embeddings for a batch of chunks"""
+        embeddings = await self.embedder.generate_batch(chunks)
+        return [np.asarray(embedding, dtype=np.float32).tolist() for embedding in embeddings]
+
     async def _store_vectors(
         self,
-        embeddings: List[List[float]]
+        chunks: List[Dict[str, Any]]
     ) -> List[str]:
-        """Store vectors in database"""
-        # TODO: Implement real storage
-        return [f"vector_{i}" for i in range(len(embeddings))] 
\ No newline at end of file
+        """Upsert embedded chunks into the vector index"""
+        await self.index.upsert_batch(chunks)
+        return [chunk["id"] for chunk in chunks]
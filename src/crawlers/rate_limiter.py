@@ -1,8 +1,44 @@
-from typing import Optional
-import time
+from typing import Optional, Dict, Iterable
+from collections import Counter
+import uuid
 from redis.asyncio import Redis
 from pydantic import BaseModel
 
+# Log de janela deslizante, atômico e em uma só ida ao Redis. KEYS[1] é a
+# janela global e KEYS[2..] uma janela por domínio; ARGV traz a janela (ms),
+# os limites por domínio e global, um id único da chamada e as vagas pedidas
+# por domínio. Usa o relógio do servidor, comum a todos os crawlers, e só
+# conta requisições concedidas. Retorna as vagas concedidas por domínio.
+ACQUIRE_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local window = tonumber(ARGV[1])
+local domain_limit = tonumber(ARGV[2])
+local global_limit = tonumber(ARGV[3])
+local call_id = ARGV[4]
+
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+local global_free = global_limit - redis.call('ZCARD', KEYS[1])
+local granted = {}
+for d = 2, #KEYS do
+    redis.call('ZREMRANGEBYSCORE', KEYS[d], '-inf', now - window)
+    local free = domain_limit - redis.call('ZCARD', KEYS[d])
+    local n = math.max(0, math.min(tonumber(ARGV[d + 3]), free, global_free))
+    for i = 1, n do
+        local member = call_id .. ':' .. d .. ':' .. i
+        redis.call('ZADD', KEYS[d], now, member)
+        redis.call('ZADD', KEYS[1], now, member)
+    end
+    if n > 0 then
+        redis.call('PEXPIRE', KEYS[d], window)
+    end
+    global_free = global_free - n
+    granted[d - 1] = n
+end
+redis.call('PEXPIRE', KEYS[1], window)
+return granted
+"""
+
 class RateLimitConfig(BaseModel):
     """Configuração de rate limiting"""
     requests_per_second: int = 2
@@ -10,8 +46,16 @@ class RateLimitConfig(BaseModel):
     cooldown_period: int = 60  # segundos
 
 class RateLimiter:
-    """Rate limiter baseado em Redis"""
-    
+    """
+    Rate limiter baseado em Redis
+
+    Janela deslizante de ``cooldown_period`` segundos, com até
+    ``max_requests_per_domain`` requisições por domínio e
+    ``requests_per_second * cooldown_period`` no total. Cada verificação é
+    um único script Lua atômico, então crawlers concorrentes não contam
+    requisições a menos.
+    """
+
     def __init__(
         self,
         redis_url: str = "redis://localhost",
@@ -19,45 +63,42 @@ class RateLimiter:
     ):
         self.redis = Redis.from_url(redis_url)
         self.config = config or RateLimitConfig()
-    
+        self._acquire = self.redis.register_script(ACQUIRE_SCRIPT)
+
+    def _domain_key(self, domain: str) -> str:
+        return f"rate:domain:{domain}"
+
+    async def acquire_many(self, domains: Iterable[str]) -> Dict[str, int]:
+        """
+        Reserva vagas para várias requisições em uma só ida ao Redis
+
+        Args:
+            domains: Domínio de cada requisição; repetições pedem várias vagas
+
+        Returns:
+            Quantas requisições cada domínio pode fazer agora
+        """
+        counts = Counter(domains)
+        if not counts:
+            return {}
+
+        names = list(counts)
+        granted = await self._acquire(
+            keys=["rate:global"] + [self._domain_key(domain) for domain in names],
+            args=[
+                self.config.cooldown_period * 1000,
+                self.config.max_requests_per_domain,
+                self.config.requests_per_second * self.config.cooldown_period,
+                uuid.uuid4().hex
+            ] + [counts[domain] for domain in names]
+        )
+        return {domain: int(n) for domain, n in zip(names, granted)}
+
     async def check_rate_limit(self, domain: str) -> bool:
-        """Verifica se o domínio está dentro do rate limit"""
-        now = int(time.time())
-        pipe = self.redis.pipeline()
-        
-        # Chaves para controle
-        domain_key = f"rate:domain:{domain}"
-        global_key = "rate:global"
-        
-        # Adiciona timestamp atual
-        pipe.zadd(domain_key, {str(now): now})
-        pipe.zadd(global_key, {str(now): now})
-        
-        # Remove timestamps antigos
-        min_time = now - self.config.cooldown_period
-        pipe.zremrangebyscore(domain_key, 0, min_time)
-        pipe.zremrangebyscore(global_key, 0, min_time)
-        
-        # Conta requests
-        pipe.zcard(domain_key)
-        pipe.zcard(global_key)
-        
-        # Executa pipeline
-        results = await pipe.execute()
-        domain_requests = results[-2]
-        global_requests = results[-1]
-        
-        # Define TTL para as chaves
-        await self.redis.expire(domain_key, self.config.cooldown_period)
-        await self.redis.expire(global_key, self.config.cooldown_period)
-        
-        # Verifica limites
-        if (domain_requests > self.config.max_requests_per_domain or
-            global_requests > self.config.requests_per_second * self.config.cooldown_period):
-            return False
-        
-        return True
-    
+        """Verifica se o domínio está dentro do rate limit, reservando a vaga"""
+        granted = await self.acquire_many([domain])
+        return granted[domain] > 0
+
     async def close(self):
         """Fecha conexão com Redis"""
-        await self.redis.close() 
\ No newline at end of file
+        await self.redis.close()
@@ -4,6 +4,7 @@ Database connection and operations.
 from typing import Optional, Dict, Any
 from supabase import create_client, Client
 from src.config.settings import get_settings
+from src.db.async_client import AsyncSupabase
 
 class Database:
     """Database connection and operations."""
@@ -12,6 +13,7 @@ class Database:
         """Initialize database connection."""
         self.settings = get_settings()
         self.client: Optional[Client] = None
+        self.async_client: Optional[AsyncSupabase] = None
         
     def _connect(self) -> Client:
         """Connect to database."""
@@ -62,6 +64,16 @@ class Database:
         if not self.client:
             self.client = self._connect()
         return self.client
+    
+    def get_async_client(self) -> AsyncSupabase:
+        """Get non-blocking access to the database client.
+        
+        Queries built on the returned client's ``table``/``rpc`` are run with
+        ``await async_client.execute(query)`` on the shared bounded pool.
+        """
+        if not self.async_client:
+            self.async_client = AsyncSupabase(self.get_client())
+        return self.async_client
 
 # Create singleton instance
 db = Database() 
\ No newline at end of file
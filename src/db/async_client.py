@@ -0,0 +1,149 @@
+import asyncio
+import inspect
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set
+
+# Pool partilhado por todos os AsyncSupabase do processo
+_executor: Optional[ThreadPoolExecutor] = None
+_max_workers = 16
+_max_pending = 256
+# Semáforos por event loop: limitam os pedidos em espera na fila
+_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def configure_pool(max_workers: int = 16, max_pending: int = 256) -> None:
+    """Configura o pool partilhado; deve ser chamado antes do primeiro pedido"""
+    global _max_workers, _max_pending
+    _max_workers = max_workers
+    _max_pending = max_pending
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=_max_workers, thread_name_prefix="supabase")
+    return _executor
+
+
+def _get_slots() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    slots = _slots.get(loop)
+    if slots is None:
+        slots = _slots[loop] = asyncio.Semaphore(_max_pending)
+    return slots
+
+
+def shutdown_pool() -> None:
+    """Termina o pool partilhado"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+
+def _release(slots: asyncio.Semaphore, future: asyncio.Future) -> None:
+    slots.release()
+    # Recolhe o resultado de pedidos abandonados por timeout
+    if not future.cancelled():
+        future.exception()
+
+
+class AsyncSupabase:
+    """
+    Acesso não bloqueante a um cliente Supabase.
+
+    Os pedidos do cliente síncrono correm num pool de threads dedicado e
+    limitado, partilhado por todos os chamadores; com o cliente assíncrono
+    nativo o pedido é simplesmente aguardado. Todos os pedidos têm timeout.
+    """
+
+    def __init__(self, client: Any, timeout: float = 10.0, batch_window: float = 0.01):
+        """
+        Args:
+            client: Cliente Supabase (síncrono ou assíncrono)
+            timeout: Timeout por pedido em segundos
+            batch_window: Tempo a acumular inserts antes de os enviar em lote
+        """
+        self.client = client
+        self.timeout = timeout
+        self.batch_window = batch_window
+        self._batches: Dict[str, List] = {}
+        self._flushes: Set[asyncio.Task] = set()
+
+    def table(self, name: str):
+        """Atalho para construir uma query; a execução passa por ``execute``"""
+        return self.client.table(name)
+
+    def rpc(self, name: str, params: Dict[str, Any]):
+        """Atalho para construir uma chamada RPC"""
+        return self.client.rpc(name, params)
+
+    async def execute(self, query: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Executa uma query construída sem bloquear o event loop.
+
+        Em timeout o chamador é libertado, mas o pedido já enviado para o
+        pool termina em segundo plano e só então liberta a sua vaga.
+        """
+        timeout = self.timeout if timeout is None else timeout
+
+        if inspect.iscoroutinefunction(query.execute):
+            return await asyncio.wait_for(query.execute(), timeout)
+
+        slots = _get_slots()
+        await slots.acquire()
+        try:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(_get_executor(), query.execute)
+        except BaseException:
+            slots.release()
+            raise
+
+        # A vaga acompanha a thread, não o chamador que desistiu por timeout
+        future.add_done_callback(lambda done: _release(slots, done))
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+
+    async def execute_many(self, queries: List[Any], timeout: Optional[float] = None) -> List[Any]:
+        """Executa várias queries em paralelo, respeitando o limite do pool"""
+        return await asyncio.gather(*(self.execute(query, timeout) for query in queries))
+
+    async def insert(self, table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Insere uma linha, agrupando inserts concorrentes na mesma tabela.
+
+        Os inserts que chegam dentro de ``batch_window`` seguem num único
+        pedido; cada chamador recebe a sua linha ou a exceção do lote.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._batches.get(table)
+        if pending is None:
+            pending = self._batches[table] = []
+            loop.call_later(self.batch_window, self._start_flush, loop, table)
+        pending.append((row, future))
+        return await future
+
+    def _start_flush(self, loop: asyncio.AbstractEventLoop, table: str) -> None:
+        # Guarda a referência para a task não ser recolhida a meio do envio
+        task = loop.create_task(self._flush_batch(table))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush_batch(self, table: str) -> None:
+        pending = self._batches.pop(table, [])
+        if not pending:
+            return
+
+        try:
+            response = await self.execute(self.client.table(table).insert([row for row, _ in pending]))
+            data = getattr(response, "data", None) or []
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for index, (row, future) in enumerate(pending):
+            if not future.done():
+                future.set_result(data[index] if index < len(data) else row)
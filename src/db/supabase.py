@@ -2,6 +2,7 @@ from typing import Optional, Dict, Any
 from datetime import datetime
 from supabase import create_client, Client
 from pydantic import BaseModel
+from src.db.async_client import AsyncSupabase
 
 class CrawlMetadata(BaseModel):
     """Metadados de um crawl"""
@@ -18,21 +19,23 @@ class SupabaseClient:
     
     def __init__(self, url: str, key: str):
         self.client: Client = create_client(url, key)
+        self.db = AsyncSupabase(self.client)
     
     async def save_crawl(self, metadata: CrawlMetadata) -> None:
-        """Salva metadados de um crawl"""
+        """Salva metadados de um crawl (agrupado com outros inserts concorrentes)"""
         data = metadata.dict()
         data["timestamp"] = data["timestamp"].isoformat()
         
-        await self.client.table("crawls").insert(data).execute()
+        await self.db.insert("crawls", data)
     
     async def get_crawl_history(self, url: str) -> list:
         """Recupera histórico de crawls para uma URL"""
-        response = await self.client.table("crawls") \
-            .select("*") \
-            .eq("url", url) \
-            .order("timestamp", desc=True) \
-            .execute()
+        response = await self.db.execute(
+            self.client.table("crawls")
+            .select("*")
+            .eq("url", url)
+            .order("timestamp", desc=True)
+        )
             
         return response.data
     
@@ -44,17 +47,19 @@ class SupabaseClient:
             "updated_at": datetime.utcnow().isoformat()
         }
         
-        await self.client.table("configs") \
-            .upsert(data, on_conflict="name") \
-            .execute()
+        await self.db.execute(
+            self.client.table("configs")
+            .upsert(data, on_conflict="name")
+        )
     
     async def get_config(self, name: str) -> Optional[Dict[str, Any]]:
         """Recupera uma configuração"""
-        response = await self.client.table("configs") \
-            .select("config") \
-            .eq("name", name) \
-            .limit(1) \
-            .execute()
+        response = await self.db.execute(
+            self.client.table("configs")
+            .select("config")
+            .eq("name", name)
+            .limit(1)
+        )
             
         if response.data:
             return response.data[0]["config"]
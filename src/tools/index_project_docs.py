@@ -1,12 +1,25 @@
+import argparse
+import asyncio
+import hashlib
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from src.services.rag_service import RAGService
 from rich.console import Console
-from typing import List, Dict
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+from src.rag.chunking import chunk_id
 
 console = Console()
 
+# Padrões de arquivos a serem indexados
+PATTERNS = [
+    ("docs", "**/*.md"),
+    ("instructions", "*.md"),
+    ("requirements", "*.txt")
+]
+
+MANIFEST_FILE = ".index_manifest.json"
+
 def read_file(file_path: str) -> str:
     """Lê o conteúdo de um arquivo"""
     try:
@@ -18,6 +31,9 @@ def read_file(file_path: str) -> str:
 
 def split_large_text(text: str, max_tokens: int = 6000) -> List[str]:
     """Divide apenas textos grandes em chunks"""
+    # Importado aqui para não pesar no arranque de uma execução sem alterações
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=max_tokens,
         chunk_overlap=500,
@@ -26,82 +42,269 @@ def split_large_text(text: str, max_tokens: int = 6000) -> List[str]:
     )
     return text_splitter.split_text(text)
 
-def should_split_file(file_path: str, content: str) -> bool:
+def should_split_file(file_path: str, content: str, max_tokens: int = 6000) -> bool:
     """Determina se um arquivo deve ser dividido em chunks"""
     # Lista de arquivos que devem ser divididos
     large_files = ['instructions.md']
-    return any(large_file in file_path for large_file in large_files)
-
-def get_project_files() -> List[Dict]:
-    """Coleta todos os arquivos relevantes do projeto"""
-    docs = []
-    base_path = Path.cwd()  # Diretório atual
-    
-    # Padrões de arquivos a serem indexados
-    patterns = [
-        ("docs", "**/*.md"),
-        ("instructions", "*.md"),
-        ("requirements", "*.txt")
-    ]
-    
-    for section, pattern in patterns:
+    # Arquivos grandes também são divididos para que uma edição só reindexe a secção alterada
+    return len(content) > max_tokens or any(large_file in file_path for large_file in large_files)
+
+def is_indexed_path(relative_path: str) -> bool:
+    """Indica se um caminho relativo corresponde a um dos padrões indexados"""
+    parts = Path(relative_path).parts
+    if len(parts) < 2:
+        return False
+    return any(parts[0] == section and Path(relative_path).match(pattern.split("/")[-1]) for section, pattern in PATTERNS)
+
+def scan_project_files(base_path: Path) -> Dict[str, Tuple[str, int, int]]:
+    """Lista os arquivos do projeto com (secção, mtime_ns, tamanho), sem os ler"""
+    files = {}
+    for section, pattern in PATTERNS:
         section_path = base_path / section
         if section_path.exists():
             for file_path in section_path.rglob(pattern):
                 if file_path.is_file():
-                    content = read_file(str(file_path))
-                    if not content:
-                        continue
-                        
-                    relative_path = str(file_path.relative_to(base_path))
-                    
-                    # Decide se divide o arquivo em chunks
-                    if should_split_file(relative_path, content):
-                        chunks = split_large_text(content)
-                        for i, chunk in enumerate(chunks):
-                            docs.append({
-                                "content": chunk,
-                                "metadata": {
-                                    "path": relative_path,
-                                    "type": section,
-                                    "section": file_path.parent.name,
-                                    "filename": file_path.name,
-                                    "chunk": i + 1,
-                                    "total_chunks": len(chunks)
-                                }
-                            })
-                    else:
-                        # Mantém o arquivo como um único documento
-                        docs.append({
-                            "content": content,
-                            "metadata": {
-                                "path": relative_path,
-                                "type": section,
-                                "section": file_path.parent.name,
-                                "filename": file_path.name
-                            }
-                        })
-    
-    return docs
-
-def index_project_docs():
-    rag = RAGService()
-    docs = get_project_files()
-    
-    console.print(f"\n[bold blue]🔍 Encontrados {len(docs)} documentos/chunks para indexar[/bold blue]")
-    
-    for doc in docs:
-        chunk_info = f" (chunk {doc['metadata']['chunk']}/{doc['metadata']['total_chunks']})" if 'chunk' in doc['metadata'] else ""
-        console.print(f"\n[bold green]Indexando {doc['metadata']['path']}{chunk_info}...[/bold green]")
-        success = rag.index_document(
-            text=doc['content'],
-            metadata=doc['metadata']
-        )
-        if success:
-            console.print("✅ Documento indexado com sucesso!")
-        else:
-            console.print("❌ Erro ao indexar documento")
+                    stat = file_path.stat()
+                    files[str(file_path.relative_to(base_path))] = (section, stat.st_mtime_ns, stat.st_size)
+    return files
+
+def chunk_file(base_path: str, relative_path: str, section: str) -> Dict:
+    """Lê, calcula o hash e divide um arquivo; corre num processo do pool"""
+    file_path = Path(base_path) / relative_path
+    content = read_file(str(file_path))
+    result = {"sha256": hashlib.sha256(content.encode("utf-8")).hexdigest(), "chunks": []}
+    if not content:
+        return result
+
+    metadata = {
+        "path": relative_path,
+        "type": section,
+        "section": file_path.parent.name,
+        "filename": file_path.name
+    }
+
+    # Decide se divide o arquivo em chunks
+    if should_split_file(relative_path, content):
+        chunks = split_large_text(content)
+        for i, chunk in enumerate(chunks):
+            result["chunks"].append({
+                "id": chunk_id(chunk, relative_path),
+                "content": chunk,
+                "metadata": {**metadata, "chunk": i + 1, "total_chunks": len(chunks)}
+            })
+    else:
+        # Mantém o arquivo como um único documento
+        result["chunks"].append({"id": chunk_id(content, relative_path), "content": content, "metadata": metadata})
+    return result
+
+def load_manifest(manifest_path: Path) -> Dict:
+    """Carrega o manifest da última indexação"""
+    if manifest_path.exists():
+        return json.loads(manifest_path.read_text())
+    return {"files": {}}
+
+def save_manifest(manifest_path: Path, manifest: Dict):
+    """Grava o manifest de forma atómica"""
+    tmp_path = manifest_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=1, sort_keys=True))
+    os.replace(tmp_path, manifest_path)
+
+def _get_rag():
+    # O modelo de embeddings só é carregado quando há algo para indexar
+    from src.services.rag_service import RAGService
+    return RAGService()
+
+async def index_project_docs(
+    base_path: Optional[Path] = None,
+    manifest_path: Optional[Path] = None,
+    workers: Optional[int] = None,
+    rag=None
+) -> Dict[str, int]:
+    """
+    Indexa de forma incremental os documentos do projeto.
+
+    Arquivos com mtime e tamanho iguais aos do manifest não são lidos; os
+    restantes são lidos e divididos num pool de processos e só os que mudaram
+    de conteúdo são reindexados. Os vetores de arquivos removidos são apagados.
+
+    Returns:
+        Contagens da execução
+    """
+    base_path = Path(base_path or Path.cwd())
+    manifest_path = Path(manifest_path or base_path / MANIFEST_FILE)
+    manifest = load_manifest(manifest_path)
+    entries = manifest["files"]
+
+    files = scan_project_files(base_path)
+    changed = [
+        path for path, (_, mtime_ns, size) in files.items()
+        if path not in entries or entries[path]["mtime_ns"] != mtime_ns or entries[path]["size"] != size
+    ]
+    removed = [path for path in entries if path not in files]
+    stats = {"scanned": len(files), "changed": 0, "removed": len(removed), "added": 0, "reused": 0, "deleted": 0}
+
+    if not changed and not removed:
+        console.print("[bold green]✅ Nenhuma alteração, índice atualizado[/bold green]")
+        return stats
+
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = await asyncio.gather(*(
+            loop.run_in_executor(pool, chunk_file, str(base_path), path, files[path][0])
+            for path in changed
+        ))
+
+    stale_ids = set()
+    new_chunks = []
+    for path, result in zip(changed, results):
+        section, mtime_ns, size = files[path]
+        previous = entries.get(path)
+        chunk_ids = [chunk["id"] for chunk in result["chunks"]]
+        if previous is None or previous["sha256"] != result["sha256"]:
+            console.print(f"[bold green]Indexando {path}...[/bold green]")
+            stats["changed"] += 1
+            # Diff ao nível do chunk: só os chunks que o arquivo ainda não tinha são reindexados
+            known = set(previous["chunks"]) if previous is not None else set()
+            new_chunks.extend(chunk for chunk in result["chunks"] if chunk["id"] not in known)
+            stats["reused"] += len(known.intersection(chunk_ids))
+            stale_ids.update(known.difference(chunk_ids))
+        entries[path] = {"mtime_ns": mtime_ns, "size": size, "sha256": result["sha256"], "chunks": chunk_ids}
+
+    for path in removed:
+        console.print(f"[yellow]Removendo {path}...[/yellow]")
+        stale_ids.update(entries.pop(path)["chunks"])
+
+    # Chunks iguais em vários arquivos partilham o id; só se apaga o que deixou de ser usado
+    referenced = {chunk for entry in entries.values() for chunk in entry["chunks"]}
+    stale_ids -= referenced
+
+    if new_chunks or stale_ids:
+        rag = rag or _get_rag()
+        stats["added"] = await rag.add_chunks(new_chunks) if new_chunks else 0
+        if stale_ids:
+            await rag.delete_chunks(sorted(stale_ids))
+            stats["deleted"] = len(stale_ids)
+
+    save_manifest(manifest_path, manifest)
+    console.print(
+        f"\n[bold blue]🔍 {stats['changed']} arquivos reindexados, {stats['removed']} removidos, "
+        f"{stats['added']} chunks novos, {stats['reused']} reaproveitados, "
+        f"{stats['deleted']} chunks apagados[/bold blue]"
+    )
+    return stats
+
+async def _poll_changes(
+    base_path: Path,
+    debounce: float,
+    poll_interval: float,
+    stop_event: asyncio.Event
+) -> AsyncIterator[Set[str]]:
+    """Fallback sem inotify: compara snapshots de stat e agrupa alterações próximas"""
+    snapshot = scan_project_files(base_path)
+    pending: Set[str] = set()
+    quiet_since = 0.0
+    loop = asyncio.get_running_loop()
+
+    while not stop_event.is_set():
+        try:
+            await asyncio.wait_for(stop_event.wait(), poll_interval)
+            return
+        except asyncio.TimeoutError:
+            pass
+
+        current = scan_project_files(base_path)
+        changed = {
+            path for path in snapshot.keys() | current.keys()
+            if snapshot.get(path, (None,))[1:] != current.get(path, (None,))[1:]
+        }
+        snapshot = current
+        if changed:
+            pending |= changed
+            quiet_since = loop.time()
+        elif pending and loop.time() - quiet_since >= debounce:
+            yield pending
+            pending = set()
+
+async def _watch_changes(
+    base_path: Path,
+    debounce: float,
+    poll_interval: float,
+    force_polling: bool,
+    stop_event: asyncio.Event
+) -> AsyncIterator[Set[str]]:
+    """Produz conjuntos de caminhos alterados, agrupados por debounce"""
+    watch_paths = [base_path / section for section, _ in PATTERNS if (base_path / section).exists()]
+    try:
+        from watchfiles import awatch
+    except ImportError:
+        awatch = None
+
+    if awatch is None or force_polling or not watch_paths:
+        async for changed in _poll_changes(base_path, debounce, poll_interval, stop_event):
+            yield changed
+        return
+
+    # inotify no Linux; o watchfiles agrupa eventos durante a janela de debounce
+    async for changes in awatch(
+        *watch_paths,
+        watch_filter=lambda _, path: is_indexed_path(os.path.relpath(path, base_path)),
+        debounce=int(debounce * 1000),
+        stop_event=stop_event
+    ):
+        yield {os.path.relpath(path, base_path) for _, path in changes}
+
+async def watch_project_docs(
+    base_path: Optional[Path] = None,
+    manifest_path: Optional[Path] = None,
+    workers: Optional[int] = None,
+    rag=None,
+    debounce: float = 1.0,
+    poll_interval: float = 1.0,
+    force_polling: bool = False,
+    stop_event: Optional[asyncio.Event] = None
+):
+    """
+    Mantém o índice atualizado enquanto os documentos são editados.
+
+    Cada rajada de alterações resulta numa única execução incremental, que
+    só reindexa os chunks alterados.
+    """
+    base_path = Path(base_path or Path.cwd())
+    stop_event = stop_event or asyncio.Event()
+    rag = rag or _get_rag()
+
+    await index_project_docs(base_path, manifest_path, workers, rag)
+    console.print("[bold blue]👀 A observar alterações (Ctrl+C para sair)...[/bold blue]")
+
+    async for changed in _watch_changes(base_path, debounce, poll_interval, force_polling, stop_event):
+        console.print(f"[blue]{len(changed)} arquivo(s) alterado(s)[/blue]")
+        try:
+            await index_project_docs(base_path, manifest_path, workers, rag)
+        except Exception as e:
+            console.print(f"[red]Erro ao reindexar: {str(e)}[/red]")
+
+def main():
+    parser = argparse.ArgumentParser(description="Indexa os documentos do projeto")
+    parser.add_argument("--path", type=Path, default=None, help="Raiz do projeto (por omissão, o diretório atual)")
+    parser.add_argument("--workers", type=int, default=None, help="Processos para leitura e chunking")
+    parser.add_argument("--watch", action="store_true", help="Reindexa continuamente quando os arquivos mudam")
+    parser.add_argument("--debounce", type=float, default=1.0, help="Segundos de silêncio antes de reindexar")
+    parser.add_argument("--poll", action="store_true", help="Usa polling em vez de inotify")
+    args = parser.parse_args()
 
-if __name__ == "__main__":
     console.print("[bold blue]🚀 Iniciando indexação dos documentos do projeto...[/bold blue]")
-    index_project_docs() 
\ No newline at end of file
+    if args.watch:
+        try:
+            asyncio.run(watch_project_docs(
+                args.path,
+                workers=args.workers,
+                debounce=args.debounce,
+                force_polling=args.poll
+            ))
+        except KeyboardInterrupt:
+            pass
+    else:
+        asyncio.run(index_project_docs(args.path, workers=args.workers))
+
+if __name__ == "__main__":
+    main()
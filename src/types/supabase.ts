@@ -11,11 +11,12 @@ export interface Message {
   content: string;
   role: 'user' | 'assistant';
   session_id: string;
+  seq: number;
   created_at: string;
 }
 
 export type NewChatSession = Omit<ChatSession, 'id' | 'last_message'>;
-export type NewMessage = Omit<Message, 'id'>;
+export type NewMessage = Omit<Message, 'id' | 'seq'>;
 
 export interface Database {
   public: {
@@ -0,0 +1,40 @@
+-- Cursor de paginação por keyset para messages.
+--
+-- O seq vem de uma sequência da base de dados, por isso é único e crescente
+-- entre todos os workers da API; dentro de uma sessão ordena as mensagens
+-- pela ordem de inserção.
+
+create sequence if not exists public.messages_seq_seq as bigint;
+
+alter table public.messages add column if not exists seq bigint;
+
+-- Mensagens existentes recebem seq pela ordem de criação
+with ordered as (
+    select id, nextval('public.messages_seq_seq') as seq
+    from (
+        select id from public.messages
+        where seq is null
+        order by created_at, id
+    ) pending
+)
+update public.messages m
+set seq = ordered.seq
+from ordered
+where m.id = ordered.id;
+
+alter sequence public.messages_seq_seq owned by public.messages.seq;
+alter table public.messages
+    alter column seq set default nextval('public.messages_seq_seq'),
+    alter column seq set not null;
+
+create unique index if not exists messages_session_seq_idx
+    on public.messages (session_id, seq desc);
+
+-- Reserva o próximo seq antes do insert (ChatService.add_message)
+create or replace function public.next_message_seq()
+returns bigint
+language sql
+volatile
+as $$
+    select nextval('public.messages_seq_seq');
+$$;
@@ -1,13 +1,16 @@
+import asyncio
+
 from src.services.qdrant_service import QdrantService
-from src.config.settings import settings
+from src.config.settings import get_settings
 
-def test_collection_creation():
+async def test_collection_creation():
     qdrant = QdrantService()
-    collection_name = settings.QDRANT_COLLECTION
-    if qdrant.create_collection(collection_name, vector_size=768):
+    collection_name = get_settings().QDRANT_COLLECTION
+    if await qdrant.create_collection(collection_name, vector_size=768):
         print(f"Collection '{collection_name}' created successfully!")
     else:
         print(f"Failed to create collection '{collection_name}'")
+    await qdrant.close()
 
 if __name__ == "__main__":
-    test_collection_creation() 
\ No newline at end of file
+    asyncio.run(test_collection_creation())